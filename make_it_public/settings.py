@@ -93,6 +93,25 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Invalidated by the sync workers as well as the web server: has to be shared between processes
+    'index': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv("INDEX_CACHE_DIRECTORY", os.path.join(BASE_DIR, 'data', 'cache', 'index')),
+        # Two entries per user (see sync_youtube.index_cache), a third of them being culled at random beyond that
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv("INDEX_CACHE_MAX_ENTRIES", 20000)),
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -145,6 +164,52 @@ SOCIALACCOUNT_STORE_TOKENS = True
 
 SOCIALACCOUNT_LOGIN_ON_GET = True
 
+# YouTube synchronisation
+
+# Amount of YouTube Data API calls sent in a single batch HTTP request (the API accepts up to 50)
+YOUTUBE_BATCH_SIZE = int(os.getenv("YOUTUBE_BATCH_SIZE", 50))
+# Amount of new songs kept in memory before being written with a single bulk insert
+YOUTUBE_BULK_CHUNK_SIZE = int(os.getenv("YOUTUBE_BULK_CHUNK_SIZE", 500))
+# YouTube Data API quota, shared by every process through the database
+# https://developers.google.com/youtube/v3/getting-started#quota
+YOUTUBE_QUOTA_ENABLED = bool(int(os.getenv("YOUTUBE_QUOTA_ENABLED", 1)))
+YOUTUBE_QUOTA_UNITS_PER_DAY = int(os.getenv("YOUTUBE_QUOTA_UNITS_PER_DAY", 10000))
+YOUTUBE_QUOTA_UNITS_PER_SECOND = float(os.getenv("YOUTUBE_QUOTA_UNITS_PER_SECOND", 100))
+YOUTUBE_QUOTA_BURST_UNITS = int(os.getenv("YOUTUBE_QUOTA_BURST_UNITS", 500))
+# Order in which publishing spends quota, most important first (see sync_youtube.api.planner)
+YOUTUBE_SYNC_PRIORITIES = os.getenv(
+    "YOUTUBE_SYNC_PRIORITIES",
+    "create_playlist,unpublish_item,delete_item,insert_item",
+).split(",")
+# Retries of YouTube Data API calls failing with a transient error, with exponential backoff (in seconds)
+YOUTUBE_RETRY_MAX_ATTEMPTS = int(os.getenv("YOUTUBE_RETRY_MAX_ATTEMPTS", 5))
+YOUTUBE_RETRY_BASE_DELAY = float(os.getenv("YOUTUBE_RETRY_BASE_DELAY", 1))
+YOUTUBE_RETRY_MAX_DELAY = float(os.getenv("YOUTUBE_RETRY_MAX_DELAY", 32))
+# Liked musics crawl stops after this many already known musics in a row
+YOUTUBE_INCREMENTAL_KNOWN_STREAK = int(os.getenv("YOUTUBE_INCREMENTAL_KNOWN_STREAK", 50))
+# Days between full crawls of the liked musics, the only ones detecting removed likes
+YOUTUBE_FULL_CRAWL_INTERVAL_DAYS = int(os.getenv("YOUTUBE_FULL_CRAWL_INTERVAL_DAYS", 7))
+# Root URL of the YouTube Data API, to point the sync at a fake server (`manage.py run_fake_youtube`)
+YOUTUBE_API_ROOT_URL = os.getenv("YOUTUBE_API_ROOT_URL") or None
+# Keep-alive connections to the YouTube Data API shared by a process, which should be at least the amount of
+# users processed concurrently (--workers), dropped after this many seconds unused (timeouts in seconds too)
+YOUTUBE_HTTP_POOL_SIZE = int(os.getenv("YOUTUBE_HTTP_POOL_SIZE", 10))
+YOUTUBE_HTTP_IDLE_TIMEOUT = float(os.getenv("YOUTUBE_HTTP_IDLE_TIMEOUT", 60))
+YOUTUBE_HTTP_TIMEOUT = float(os.getenv("YOUTUBE_HTTP_TIMEOUT", 60))
+# Amount of songs listed per page on the index page, further pages being loaded while scrolling
+LIKED_SONGS_PAGE_SIZE = int(os.getenv("LIKED_SONGS_PAGE_SIZE", 100))
+# Seconds the index page context of a user stays cached, unless invalidated earlier by a change
+INDEX_CACHE_TIMEOUT = int(os.getenv("INDEX_CACHE_TIMEOUT", 3600))
+# Maximum amount of songs switched by a single request to /switch-songs/
+SWITCH_SONGS_MAX_IDS = int(os.getenv("SWITCH_SONGS_MAX_IDS", 5000))
+# Seconds after which a running sync job is considered dead (killed worker) and failed, so that it can be queued again
+SYNC_JOB_TIMEOUT = int(os.getenv("SYNC_JOB_TIMEOUT", 3600))
+# Directory where sync commands and job workers dump their metrics for /metrics to expose them, unset to only
+# expose the metrics of the web process
+METRICS_DIRECTORY = os.getenv("METRICS_DIRECTORY") or None
+# Comma separated client addresses allowed to scrape /metrics (e.g. the Prometheus server), staff users always are
+METRICS_ALLOWED_IPS = [ip for ip in os.getenv("METRICS_ALLOWED_IPS", "").split(",") if ip]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
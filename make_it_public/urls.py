@@ -15,7 +15,18 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from sync_youtube.views import index, fetch_songs, publish_songs, policies, switch_song, terms_of_service
+from sync_youtube.views import (
+    index,
+    export_metrics,
+    fetch_songs,
+    liked_songs,
+    publish_songs,
+    policies,
+    switch_song,
+    switch_songs,
+    sync_job_status,
+    terms_of_service,
+)
 from django.conf import settings
 from django.conf.urls.static import static
 
@@ -25,7 +36,11 @@ urlpatterns = [
     path("", index, name="index"),
     path("fetch-songs/", fetch_songs, name="fetch-songs"),
     path("publish-songs/", publish_songs, name="publish-songs"),
+    path("liked-songs/", liked_songs, name="liked-songs"),
     path("switch-song/", switch_song, name="switch_song"),
+    path("switch-songs/", switch_songs, name="switch_songs"),
+    path("jobs/<uuid:job_id>/", sync_job_status, name="sync-job-status"),
+    path("metrics", export_metrics, name="metrics"),
     path("policies/", policies, name="policies"),
     path("terms-of-service/", terms_of_service, name="terms_of_service"),
 ] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -1,4 +1,6 @@
 from django.contrib import admin
+from sync_youtube.models.job import SyncJob
 from sync_youtube.models.song import YoutubeSong
 # Register your models here.
 admin.site.register(YoutubeSong)
+admin.site.register(SyncJob)
@@ -0,0 +1,109 @@
+import logging
+import time
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from django.conf import settings
+from googleapiclient.discovery import Resource
+from googleapiclient.http import HttpRequest as GoogleHttpRequest
+
+from sync_youtube import metrics
+from sync_youtube.api import quota, retry
+
+logger = logging.getLogger("app")
+
+
+class BatchResult(NamedTuple):
+    item: Any
+    response: Optional[Dict[str, Any]]
+    exception: Optional[Exception]
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _send_batch(
+    youtube_service: Resource,
+    requests: List[Tuple[Any, GoogleHttpRequest]],
+) -> Tuple[List[Tuple[Any, GoogleHttpRequest, BatchResult]], Optional[quota.QuotaExhausted]]:
+    """
+    Send `requests` as a single batch, stopping short of the first request the daily quota cannot afford.
+    """
+    results: Dict[str, BatchResult] = {}
+    added: List[Tuple[Any, GoogleHttpRequest]] = []
+    quota_exhausted: Optional[quota.QuotaExhausted] = None
+
+    def callback(request_id: str, response: Optional[Dict[str, Any]], exception: Optional[Exception]) -> None:
+        results[request_id] = BatchResult(added[int(request_id)][0], response, exception)
+
+    try:
+        batch = youtube_service.new_batch_http_request(callback=callback)
+        for item, request in requests:
+            try:
+                quota.acquire_for(request)
+            except quota.QuotaExhausted as exception:
+                quota_exhausted = exception
+                break
+            batch.add(request, request_id=str(len(added)))
+            added.append((item, request))
+
+        if added:
+            started = time.monotonic()
+            try:
+                batch.execute()
+            finally:
+                metrics.youtube_api_request_duration.observe(time.monotonic() - started, method="batch")
+    except Exception as exception:
+        for index, (item, _) in enumerate(added):
+            results.setdefault(str(index), BatchResult(item, None, exception))
+
+    return [
+        (item, request, results.get(str(index), BatchResult(item, None, RuntimeError("Missing batch response"))))
+        for index, (item, request) in enumerate(added)
+    ], quota_exhausted
+
+
+def execute_batched(
+    youtube_service: Resource,
+    items: Iterable[Any],
+    make_request: Callable[[Any], GoogleHttpRequest],
+    batch_size: Optional[int] = None,
+) -> Iterator[BatchResult]:
+    """
+    Send one request per item through googleapiclient batch requests, `batch_size` requests per HTTP round trip.
+
+    Yields a BatchResult per item holding either the deserialized response or the exception raised for that item.
+    A failure of the whole batch is reported on every item it contained. Items failing with a transient error
+    are sent again in a later batch, after an exponential backoff, before being reported.
+
+    Quota is acquired for every request before it joins a batch: once the daily budget is spent, the requests
+    already added are still sent and reported, then QuotaExhausted is raised for the caller to defer the rest.
+    """
+    batch_size = batch_size or settings.YOUTUBE_BATCH_SIZE
+
+    for chunk in _chunks(items, batch_size):
+        pending = [(item, make_request(item)) for item in chunk]
+        attempt = 0
+        while pending:
+            sent, quota_exhausted = _send_batch(youtube_service, pending)
+
+            pending = []
+            for item, request, result in sent:
+                if result.exception is not None and retry.should_retry(result.exception, attempt, request):
+                    pending.append((item, make_request(item)))
+                else:
+                    yield result
+
+            if quota_exhausted is not None:
+                raise quota_exhausted
+
+            if pending:
+                delay = retry.backoff_delay(attempt)
+                logger.warning("Retrying %s batched YouTube requests in %.2fs", len(pending), delay)
+                time.sleep(delay)
+                attempt += 1
@@ -0,0 +1,34 @@
+import logging
+import time
+from typing import Any
+from googleapiclient.http import HttpRequest as GoogleHttpRequest
+
+from sync_youtube import metrics
+from sync_youtube.api import quota, retry
+
+logger = logging.getLogger("app")
+
+
+def execute(request: GoogleHttpRequest) -> Any:
+    """
+    Single entry point for executing YouTube Data API requests: quota is accounted for before each try, and
+    transient errors are retried with exponential backoff.
+    """
+    attempt = 0
+    method = getattr(request, "methodId", None) or "unknown"
+    while True:
+        quota.acquire_for(request)
+        started = time.monotonic()
+        try:
+            response = request.execute()
+        except Exception as exception:
+            metrics.youtube_api_request_duration.observe(time.monotonic() - started, method=method)
+            if not retry.should_retry(exception, attempt, request):
+                raise
+            delay = retry.backoff_delay(attempt)
+            logger.warning("Retrying YouTube request in %.2fs after %r", delay, exception)
+            time.sleep(delay)
+            attempt += 1
+        else:
+            metrics.youtube_api_request_duration.observe(time.monotonic() - started, method=method)
+            return response
@@ -0,0 +1,112 @@
+"""
+Explicit plan of the writes a publication sends to YouTube, each with its quota cost, in priority order.
+
+A plan is built from the database only, so that it can be costed - and reported by `--dry-run` - without calling
+YouTube, and cut to the remaining daily budget so that the units go to the most important changes first.
+"""
+from typing import AbstractSet, Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from django.conf import settings
+
+from sync_youtube.api.quota import YOUTUBE_DEFAULT_METHOD_COST, YOUTUBE_METHOD_COSTS
+
+CREATE_PLAYLIST = "create_playlist"
+INSERT_ITEM = "insert_item"
+DELETE_ITEM = "delete_item"
+UNPUBLISH_ITEM = "unpublish_item"
+
+OPERATION_METHODS = {
+    CREATE_PLAYLIST: "youtube.playlists.insert",
+    INSERT_ITEM: "youtube.playlistItems.insert",
+    DELETE_ITEM: "youtube.playlistItems.delete",
+    UNPUBLISH_ITEM: "youtube.playlistItems.delete",
+}
+
+
+class PlannedOperation(NamedTuple):
+    operation: str
+    # RemotePlaylist to create, or YoutubeSong whose item to insert, delete or unpublish
+    target: Any
+    cost: int
+
+
+def plan_operation(operation: str, target: Any) -> PlannedOperation:
+    cost = YOUTUBE_METHOD_COSTS.get(OPERATION_METHODS[operation], YOUTUBE_DEFAULT_METHOD_COST)
+    return PlannedOperation(operation, target, cost)
+
+
+class SyncPlan:
+    """
+    Operations ordered by the rank of their kind in `priorities`, YOUTUBE_SYNC_PRIORITIES by default, along with
+    the ids of the song changes they were planned from and the operations `deferred` to a later run.
+
+    Items can only be inserted in created playlists: ranking insert_item before create_playlist leaves the songs
+    of new playlists for the next run.
+    """
+
+    def __init__(
+        self,
+        operations: Iterable[PlannedOperation],
+        change_ids: AbstractSet[int] = frozenset(),
+        priorities: Optional[Sequence[str]] = None,
+        deferred: Iterable[PlannedOperation] = (),
+    ) -> None:
+        self.priorities = list(priorities or settings.YOUTUBE_SYNC_PRIORITIES)
+        ranks = {operation: rank for rank, operation in enumerate(self.priorities)}
+        self.operations = sorted(operations, key=lambda planned: ranks.get(planned.operation, len(ranks)))
+        self.change_ids = change_ids
+        self.deferred = list(deferred)
+
+    @property
+    def cost(self) -> int:
+        return sum(planned.cost for planned in self.operations)
+
+    def targets(self, operation: str) -> List[Any]:
+        return [planned.target for planned in self.operations if planned.operation == operation]
+
+    def groups(self) -> Iterator[Tuple[str, List[Any]]]:
+        """
+        Targets of the planned operations, by kind in priority order.
+        """
+        for operation in dict.fromkeys(planned.operation for planned in self.operations):
+            yield operation, self.targets(operation)
+
+    def reordered(self, priorities: Sequence[str]) -> "SyncPlan":
+        return SyncPlan(self.operations, self.change_ids, priorities, self.deferred)
+
+    def within_budget(self, units: Optional[int]) -> "SyncPlan":
+        """
+        Longest prefix of the plan costing at most `units`, the rest being deferred. `None` means no limit.
+        """
+        if units is None:
+            return self
+
+        spent = 0
+        for index, planned in enumerate(self.operations):
+            spent += planned.cost
+            if spent > units:
+                return SyncPlan(
+                    self.operations[:index],
+                    self.change_ids,
+                    self.priorities,
+                    self.operations[index:] + self.deferred,
+                )
+        return self
+
+    def summary(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Amount and quota cost of the planned operations, by kind.
+        """
+        summary: Dict[str, Tuple[int, int]] = {}
+        for planned in self.operations:
+            count, cost = summary.get(planned.operation, (0, 0))
+            summary[planned.operation] = (count + 1, cost + planned.cost)
+        return summary
+
+    def describe(self) -> str:
+        operations = ", ".join(
+            f"{operation} {count} ({cost} units)" for operation, (count, cost) in self.summary().items()
+        )
+        description = f"{operations or 'nothing to do'}, total {self.cost} units"
+        if self.deferred:
+            description += f", {len(self.deferred)} operations deferred"
+        return description
@@ -0,0 +1,119 @@
+import logging
+import time
+from datetime import datetime
+from typing import Any, Optional
+import pytz
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from sync_youtube import metrics
+from sync_youtube.models.quota import QuotaUsage
+
+# https://developers.google.com/youtube/v3/determine_quota_cost
+YOUTUBE_METHOD_COSTS = {
+    "youtube.videos.list": 1,
+    "youtube.playlists.list": 1,
+    "youtube.playlists.insert": 50,
+    "youtube.playlistItems.list": 1,
+    "youtube.playlistItems.insert": 50,
+    "youtube.playlistItems.delete": 50,
+}
+# Unknown methods are assumed to be writes
+YOUTUBE_DEFAULT_METHOD_COST = 50
+# The daily quota is reset at midnight Pacific Time
+YOUTUBE_QUOTA_TIMEZONE = pytz.timezone("America/Los_Angeles")
+
+logger = logging.getLogger("app")
+
+
+class QuotaExhausted(Exception):
+    """
+    The daily YouTube Data API budget is spent: the remaining work has to wait for the next quota day.
+    """
+
+
+def request_cost(request: Any) -> int:
+    return YOUTUBE_METHOD_COSTS.get(getattr(request, "methodId", None), YOUTUBE_DEFAULT_METHOD_COST)
+
+
+def _database_now() -> datetime:
+    """
+    Current time of the database, the clock shared by every node. Other databases being single node, the local
+    clock is used there.
+    """
+    if connection.vendor != "postgresql":
+        return timezone.now()
+
+    with connection.cursor() as cursor:
+        # Unlike now(), not frozen at the start of the transaction
+        cursor.execute("SELECT clock_timestamp()")
+        return cursor.fetchone()[0]
+
+
+def _try_acquire(units: int) -> float:
+    """
+    Spend `units` if the token bucket allows it, returning 0, or return how long to wait before trying again.
+    """
+    burst_units = max(settings.YOUTUBE_QUOTA_BURST_UNITS, units)
+
+    with transaction.atomic():
+        usage, _ = QuotaUsage.objects.select_for_update().get_or_create(
+            day=_database_now().astimezone(YOUTUBE_QUOTA_TIMEZONE).date(),
+            defaults={"tokens": burst_units, "refilled_at": _database_now()},
+        )
+        # Read once the bucket is locked: a time read before waiting for the lock would refill it twice
+        now = _database_now()
+        if usage.units_spent + units > settings.YOUTUBE_QUOTA_UNITS_PER_DAY:
+            raise QuotaExhausted(
+                f"{usage.units_spent} units spent on {usage.day}, cannot spend {units} more"
+            )
+
+        elapsed = max((now - usage.refilled_at).total_seconds(), 0)
+        usage.tokens = min(burst_units, usage.tokens + elapsed * settings.YOUTUBE_QUOTA_UNITS_PER_SECOND)
+        # A late clock must not move it backwards either, for the next caller to refill the same seconds again
+        usage.refilled_at = max(usage.refilled_at, now)
+
+        wait = 0.0
+        if usage.tokens >= units:
+            usage.tokens -= units
+            usage.units_spent += units
+        else:
+            wait = (units - usage.tokens) / settings.YOUTUBE_QUOTA_UNITS_PER_SECOND
+        usage.save(update_fields=["tokens", "units_spent", "refilled_at"])
+
+    return wait
+
+
+def remaining_units() -> Optional[int]:
+    """
+    Units left in today's budget, or None when the budget is not enforced.
+    """
+    if not settings.YOUTUBE_QUOTA_ENABLED:
+        return None
+
+    today = timezone.now().astimezone(YOUTUBE_QUOTA_TIMEZONE).date()
+    units_spent = QuotaUsage.objects.filter(day=today).values_list("units_spent", flat=True).first() or 0
+    return max(settings.YOUTUBE_QUOTA_UNITS_PER_DAY - units_spent, 0)
+
+
+def acquire(units: int) -> None:
+    """
+    Block until `units` can be spent without exceeding YOUTUBE_QUOTA_UNITS_PER_SECOND, the budget being shared
+    through the database. Raises QuotaExhausted once YOUTUBE_QUOTA_UNITS_PER_DAY would be exceeded.
+    """
+    if not settings.YOUTUBE_QUOTA_ENABLED:
+        return
+
+    while True:
+        wait = _try_acquire(units)
+        if not wait:
+            return
+        logger.debug("Waiting %.2fs for %s YouTube quota units", wait, units)
+        time.sleep(wait)
+
+
+def acquire_for(request: Any) -> None:
+    units = request_cost(request)
+    acquire(units)
+    metrics.youtube_api_quota_units.inc(units, method=getattr(request, "methodId", None) or "unknown")
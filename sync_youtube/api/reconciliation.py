@@ -0,0 +1,66 @@
+from typing import AbstractSet, Dict, Iterable, List, NamedTuple, Set
+
+
+class ReconciliationPlan(NamedTuple):
+    # Liked musics that are not stored yet, in liked order
+    to_create: List[str]
+    # Stored songs that are no longer liked and were never published: they can simply be deleted
+    to_delete: Set[str]
+    # Stored songs that are no longer liked but are published: they must be removed from YouTube first
+    to_mark_for_removal: Set[str]
+
+
+class LikedSongsReconciler:
+    """
+    Diff liked musics against stored songs, both keyed by third party id, in a single pass with hashed lookups.
+
+    Liked ids can be fed in several calls as they are fetched, each call returning the ids to create right away.
+    """
+    def __init__(self, stored_songs: Dict[str, bool]) -> None:
+        # third_party_id -> YoutubeSong.is_synched
+        self._stored_songs = stored_songs
+        self._liked: Set[str] = set()
+        self._to_create: List[str] = []
+
+    @property
+    def stored_third_party_ids(self) -> AbstractSet[str]:
+        return self._stored_songs.keys()
+
+    def add_liked(self, third_party_ids: Iterable[str]) -> List[str]:
+        to_create: List[str] = []
+        for third_party_id in third_party_ids:
+            if third_party_id in self._liked:
+                continue
+            self._liked.add(third_party_id)
+            if third_party_id not in self._stored_songs:
+                to_create.append(third_party_id)
+
+        self._to_create.extend(to_create)
+        return to_create
+
+    def plan(self, detect_removals: bool = True) -> ReconciliationPlan:
+        """
+        Build the plan from the liked ids fed so far. Removals can only be detected once every liked id was fed.
+        """
+        to_delete: Set[str] = set()
+        to_mark_for_removal: Set[str] = set()
+        if detect_removals:
+            for third_party_id, is_synched in self._stored_songs.items():
+                if third_party_id in self._liked:
+                    continue
+                if is_synched:
+                    to_mark_for_removal.add(third_party_id)
+                else:
+                    to_delete.add(third_party_id)
+
+        return ReconciliationPlan(
+            to_create=list(self._to_create),
+            to_delete=to_delete,
+            to_mark_for_removal=to_mark_for_removal,
+        )
+
+
+def reconcile(liked_third_party_ids: Iterable[str], stored_songs: Dict[str, bool]) -> ReconciliationPlan:
+    reconciler = LikedSongsReconciler(stored_songs)
+    reconciler.add_liked(liked_third_party_ids)
+    return reconciler.plan()
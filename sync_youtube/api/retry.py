@@ -0,0 +1,56 @@
+import json
+import random
+import socket
+from typing import Any, Set
+import httplib2
+from django.conf import settings
+from googleapiclient.errors import HttpError
+
+from sync_youtube import metrics
+
+RETRYABLE_HTTP_STATUSES = {429, 500, 502, 503, 504}
+# 403 errors are only transient for these reasons, "quotaExceeded" for instance lasts until the next quota day
+RETRYABLE_FORBIDDEN_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "backendError", "internalError"}
+
+
+def _error_reasons(error: HttpError) -> Set[str]:
+    try:
+        content = json.loads(error.content)
+        return {detail.get("reason") for detail in content["error"]["errors"]}
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return set()
+
+
+def is_retryable(exception: BaseException) -> bool:
+    if isinstance(exception, HttpError):
+        status = exception.resp.status
+        if status in RETRYABLE_HTTP_STATUSES:
+            return True
+        return status == 403 and bool(_error_reasons(exception) & RETRYABLE_FORBIDDEN_REASONS)
+
+    return isinstance(exception, (ConnectionError, TimeoutError, socket.timeout, httplib2.HttpLib2Error))
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Delay before retry number `attempt` (starting at 0): capped exponential backoff with full jitter.
+    """
+    ceiling = min(settings.YOUTUBE_RETRY_MAX_DELAY, settings.YOUTUBE_RETRY_BASE_DELAY * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
+def should_retry(exception: BaseException, attempt: int, request: Any) -> bool:
+    """
+    Whether a request that failed with `exception` on try number `attempt` (starting at 0) gets another try,
+    recording the decision in the retry metrics.
+    """
+    if not is_retryable(exception):
+        return False
+
+    method = getattr(request, "methodId", None) or "unknown"
+    if attempt + 1 >= settings.YOUTUBE_RETRY_MAX_ATTEMPTS:
+        metrics.youtube_api_give_ups.inc(method=method)
+        return False
+
+    metrics.youtube_api_retries.inc(method=method)
+    return True
@@ -0,0 +1,90 @@
+import socket
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple, Union
+import httplib2
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+
+class PooledHttp:
+    """
+    httplib2.Http compatible transport over a requests Session: unlike httplib2.Http it is thread-safe, and its
+    keep-alive connection pool is shared by every YouTube service of the process, so that users and sync steps
+    reuse the same TCP and TLS connections.
+
+    Connections unused for `idle_timeout` seconds are dropped before the next request, rather than risking a
+    request on a connection the server already closed.
+    """
+
+    def __init__(self, pool_size: int, idle_timeout: float, timeout: float) -> None:
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        # Read and written by google_auth_httplib2.AuthorizedHttp, not used by requests
+        self.connections: Dict[str, Any] = {}
+        self.follow_redirects = True
+        self.redirect_codes = httplib2.REDIRECT_CODES
+
+        self._adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session = requests.Session()
+        self._session.mount("https://", self._adapter)
+        self._session.mount("http://", self._adapter)
+        self._last_used = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _drop_idle_connections(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_used > self.idle_timeout:
+                self._adapter.poolmanager.clear()
+            self._last_used = now
+
+    def request(
+        self,
+        uri: str,
+        method: str = "GET",
+        body: Optional[Union[str, bytes]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        redirections: int = httplib2.DEFAULT_MAX_REDIRECTS,
+        connection_type: Any = None,
+    ) -> Tuple[httplib2.Response, bytes]:
+        self._drop_idle_connections()
+        if isinstance(body, str):
+            # requests would encode it as latin-1, JSON bodies are UTF-8
+            body = body.encode("utf-8")
+
+        try:
+            response = self._session.request(
+                method,
+                uri,
+                data=body,
+                headers=headers,
+                timeout=self.timeout,
+                allow_redirects=self.follow_redirects and redirections > 0,
+            )
+        except requests.exceptions.Timeout as error:
+            raise socket.timeout(str(error)) from error
+        except requests.exceptions.ConnectionError as error:
+            raise ConnectionError(str(error)) from error
+
+        response_headers = {name.lower(): value for name, value in response.headers.items()}
+        # The content is already decoded
+        response_headers.pop("content-encoding", None)
+        response_headers["status"] = str(response.status_code)
+        http_response = httplib2.Response(response_headers)
+        http_response.reason = response.reason
+        return http_response, response.content
+
+    def close(self) -> None:
+        self._session.close()
+
+
+@lru_cache(maxsize=None)
+def get_shared_http() -> PooledHttp:
+    return PooledHttp(
+        pool_size=settings.YOUTUBE_HTTP_POOL_SIZE,
+        idle_timeout=settings.YOUTUBE_HTTP_IDLE_TIMEOUT,
+        timeout=settings.YOUTUBE_HTTP_TIMEOUT,
+    )
@@ -1,14 +1,39 @@
+import json
 import logging
-from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple, Union
+from collections import defaultdict
+from datetime import timedelta
+from functools import lru_cache
+from typing import AbstractSet, Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+from django.conf import settings
 from django.http import HttpRequest
+from django.utils import timezone
 from django.contrib.auth.models import User
 from math import ceil
+from django.db import transaction
 from django.db.models import Count
-from googleapiclient import discovery
-from googleapiclient.errors import Error as GoogleError
+from googleapiclient import discovery, discovery_cache
+from googleapiclient.errors import Error as GoogleError, HttpError
 from googleapiclient.discovery import Resource
+from googleapiclient.http import HttpRequest as GoogleHttpRequest
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from allauth.socialaccount.models import SocialToken, SocialApp
+from sync_youtube import index_cache, journal, metrics, pending_work
+from sync_youtube.api import quota
+from sync_youtube.api.batch import BatchResult, execute_batched
+from sync_youtube.api.execution import execute
+from sync_youtube.api.planner import (
+    CREATE_PLAYLIST,
+    DELETE_ITEM,
+    INSERT_ITEM,
+    UNPUBLISH_ITEM,
+    SyncPlan,
+    plan_operation,
+)
+from sync_youtube.api.quota import QuotaExhausted
+from sync_youtube.api.reconciliation import LikedSongsReconciler
+from sync_youtube.api.transport import get_shared_http
+from sync_youtube.models.journal import SongChange
 from sync_youtube.models.playlist import LocalPlaylist, RemotePlaylist
 
 from sync_youtube.models.song import YoutubeSong
@@ -20,6 +45,11 @@ GOOGLE_YOUTUBE_SERVICE_VERSION = "v3"
 GOOGLE_OAUTH2_URI = 'https://oauth2.googleapis.com/token'
 YOUTUBE_CATEGORY_ID_MUSIC = "10"
 YOUTUBE_MAX_VIDEO_PER_PLAYLIST = 200
+HTTP_NOT_MODIFIED = 304
+HTTP_NOT_FOUND = 404
+# Fields written back once a remote playlist or a song is synced
+REMOTE_PLAYLIST_SYNC_FIELDS = ["third_party_id", "third_party_etag", "is_synched"]
+SONG_SYNC_FIELDS = ["third_party_playlist_item_id", "is_synched"]
 
 logger = logging.getLogger("app")
 
@@ -28,77 +58,166 @@ class DummyRequest(NamedTuple):
     user: User
 
 
+class LikedVideosNotModified(Exception):
+    """
+    The first page of liked videos did not change since its ETag was stored.
+    """
+
+
+class SocialTokenCredentials(Credentials):
+    """
+    Credentials writing the access tokens google-auth refreshes back to their SocialToken, so that later runs
+    reuse them until they expire instead of refreshing them again.
+    """
+
+    def __init__(self, social_token_id: int, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.social_token_id = social_token_id
+
+    def refresh(self, request: Any) -> None:
+        super().refresh(request)
+        SocialToken.objects.filter(id=self.social_token_id).update(
+            token=self.token,
+            token_secret=self.refresh_token,
+            # google-auth handles naive UTC datetimes
+            expires_at=timezone.make_aware(self.expiry, timezone.utc) if self.expiry else None,
+        )
+
+
 class YoutubeAPI:
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_social_app() -> SocialApp:
+        """
+        The Google SocialApp only changes with a deployment: it is fetched once per process.
+        """
+        return SocialApp.objects.get(name=GOOGLE_SOCIAL_APP_NAME)
+
     @staticmethod
     def _get_user_credentials(
         context: Union[HttpRequest, DummyRequest],
     ) -> Credentials:
         token = SocialToken.objects.get(account__user=context.user, account__provider=GOOGLE_ACCOUNT_PROVIDER)
-        social_app = SocialApp.objects.get(name=GOOGLE_SOCIAL_APP_NAME)
-        credentials = Credentials(
+        social_app = YoutubeAPI._get_social_app()
+        credentials = SocialTokenCredentials(
+            social_token_id=token.id,
             token=token.token,
             refresh_token=token.token_secret,
             token_uri=GOOGLE_OAUTH2_URI,
             client_id=social_app.client_id,
             client_secret=social_app.secret,
+            # Still valid access tokens are used as is, expired ones are refreshed before the first request
+            expiry=timezone.make_naive(token.expires_at, timezone.utc) if token.expires_at else None,
         )
         return credentials
 
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_discovery_document() -> Dict[str, Any]:
+        """
+        Parse the YouTube discovery document bundled with googleapiclient once per process, so that building
+        a service for a user only binds credentials to it. Requests go to YOUTUBE_API_ROOT_URL when it is set.
+        """
+        document = json.loads(
+            discovery_cache.get_static_doc(GOOGLE_SERVICE_NAME_YOUTUBE, GOOGLE_YOUTUBE_SERVICE_VERSION)
+        )
+        if settings.YOUTUBE_API_ROOT_URL:
+            document["rootUrl"] = document["mtlsRootUrl"] = settings.YOUTUBE_API_ROOT_URL
+        return document
+
     @staticmethod
     def _get_youtube_service(
         context: Union[HttpRequest, DummyRequest],
     ) -> Resource:
         credentials = YoutubeAPI._get_user_credentials(context)
-        return discovery.build(GOOGLE_SERVICE_NAME_YOUTUBE, GOOGLE_YOUTUBE_SERVICE_VERSION, credentials=credentials)
+        # Services only differ by their credentials: they all send their requests through the process' pool
+        http = AuthorizedHttp(credentials, http=get_shared_http())
+        return discovery.build_from_document(YoutubeAPI._get_discovery_document(), http=http)
 
     @staticmethod
-    def get_liked_videos(
-        context: Union[HttpRequest, DummyRequest]
-    ) -> List[Dict[str, Any]]:
-        youtube_service = YoutubeAPI._get_youtube_service(context)
+    def get_liked_video_pages(
+        context: Union[HttpRequest, DummyRequest],
+        known_third_party_ids: Optional[AbstractSet[str]] = None,
+        youtube_service: Optional[Resource] = None,
+        first_page_etag: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily fetch the pages of the user's liked videos, most recently liked first.
+
+        When `known_third_party_ids` is given, paging stops once YOUTUBE_INCREMENTAL_KNOWN_STREAK musics in a row
+        are already known: anything liked before them has been seen by a previous run.
+
+        When `first_page_etag` is given, the first page is requested conditionally and LikedVideosNotModified is
+        raised instead if it did not change.
+        """
+        youtube_service = youtube_service or YoutubeAPI._get_youtube_service(context)
 
-        all_items: List[Dict[str, Any]] = []
         page_token: Optional[str] = ""
+        known_streak = 0
         while True:
+            request = youtube_service.videos().list(
+                part="snippet",
+                maxResults=50,
+                myRating="like",
+                pageToken=page_token,
+            )
+            if first_page_etag and not page_token:
+                request.headers["If-None-Match"] = first_page_etag
+
             try:
-                response = youtube_service.videos().list(
-                    part="snippet",
-                    maxResults=50,
-                    myRating="like",
-                    pageToken=page_token,
-                ).execute()
+                response = execute(request)
+            except HttpError as error:
+                if error.resp.status == HTTP_NOT_MODIFIED:
+                    raise LikedVideosNotModified()
+                logger.exception("Failed to fetch videos", exc_info=True)
+                raise
+            except QuotaExhausted:
+                raise
             except Exception:
                 logger.exception("Failed to fetch videos", exc_info=True)
                 raise
-            else:
-                all_items.extend(response["items"])
-                page_token = response.get("nextPageToken")
 
-                if page_token is None:
+            yield response
+            page_token = response.get("nextPageToken")
+
+            if known_third_party_ids is not None:
+                for video in response["items"]:
+                    if not YoutubeAPI._is_music(video):
+                        continue
+                    known_streak = known_streak + 1 if video["id"] in known_third_party_ids else 0
+
+                if known_streak >= settings.YOUTUBE_INCREMENTAL_KNOWN_STREAK:
                     break
 
-        return all_items
+            if page_token is None:
+                break
 
     @staticmethod
-    def extract_liked_musics(
+    def get_liked_videos(
         context: Union[HttpRequest, DummyRequest],
-    ) -> Tuple[List[YoutubeSong], Set[str]]:
-        all_liked_videos = YoutubeAPI.get_liked_videos(context)
-        all_likeds_music = [
-            video
-            for video in all_liked_videos
-            if video["snippet"]["categoryId"] == YOUTUBE_CATEGORY_ID_MUSIC
-        ]
+        known_third_party_ids: Optional[AbstractSet[str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        for page in YoutubeAPI.get_liked_video_pages(context, known_third_party_ids=known_third_party_ids):
+            yield from page["items"]
 
-        existing_youtube_song_third_party_ids = set(
-            YoutubeSong.objects.filter(
-                user=context.user
-            ).values_list("third_party_id", flat=True)
-        )
+    @staticmethod
+    def _is_music(video: Dict[str, Any]) -> bool:
+        return video["snippet"]["categoryId"] == YOUTUBE_CATEGORY_ID_MUSIC
 
-        local_playlist, _ = LocalPlaylist.objects.get_or_create(user=context.user)
+    @staticmethod
+    def _should_crawl_fully(local_playlist: LocalPlaylist) -> bool:
+        if local_playlist.last_full_crawl is None:
+            return True
+        full_crawl_interval = timedelta(days=settings.YOUTUBE_FULL_CRAWL_INTERVAL_DAYS)
+        return timezone.now() - local_playlist.last_full_crawl >= full_crawl_interval
 
-        youtube_songs_to_create: List[YoutubeSong] = [
+    @staticmethod
+    def _create_songs(
+        context: Union[HttpRequest, DummyRequest],
+        local_playlist: LocalPlaylist,
+        musics: List[Dict[str, Any]],
+    ) -> None:
+        songs = YoutubeSong.objects.bulk_create(
             YoutubeSong(
                 user=context.user,
                 title=music["snippet"]["title"],
@@ -108,51 +227,133 @@ class YoutubeAPI:
                 third_party_etag=music["etag"],
                 local_playlist=local_playlist,
             )
-            for music in all_likeds_music
-            if music["id"] not in existing_youtube_song_third_party_ids
-        ]
+            for music in musics
+        )
+        journal.record(context.user.id, (song.id for song in songs), SongChange.Kind.ADDED)
 
-        created_youtube_songs = YoutubeSong.objects.bulk_create(youtube_songs_to_create)
+    @staticmethod
+    @metrics.tracked_stage("extract_liked_musics")
+    def extract_liked_musics(
+        context: Union[HttpRequest, DummyRequest],
+        full_crawl: Optional[bool] = None,
+        youtube_service: Optional[Resource] = None,
+    ) -> Tuple[Set[str], Set[str]]:
+        """
+        Store newly liked musics and drop the ones that are no longer liked, returning the created and removed
+        YoutubeSong.third_party_id.
+
+        Liked videos are streamed page by page and new musics are created by chunks of YOUTUBE_BULK_CHUNK_SIZE,
+        so that memory does not grow with the user's like history.
+
+        Unless `full_crawl` is forced, only the most recent likes are crawled, and a full crawl - the only kind
+        able to detect removed likes - happens every YOUTUBE_FULL_CRAWL_INTERVAL_DAYS.
+
+        Running out of daily quota stops the crawl: the musics found so far are stored, and the crawl is left for
+        the next run to do again.
+        """
+        local_playlist, _ = LocalPlaylist.objects.get_or_create(user=context.user)
+        if full_crawl is None:
+            full_crawl = YoutubeAPI._should_crawl_fully(local_playlist)
+        crawl_started = timezone.now()
+
+        reconciler = LikedSongsReconciler(
+            dict(
+                YoutubeSong.objects.filter(
+                    user=context.user
+                ).values_list("third_party_id", "is_synched")
+            )
+        )
 
-        logger.info(
-            "Created %s youtube songs (%s)",
-            len(created_youtube_songs),
-            ",".join(created_youtube_song.third_party_id for created_youtube_song in created_youtube_songs)
+        musics_to_create: List[Dict[str, Any]] = []
+        first_page_etag: Optional[str] = None
+        quota_exhausted = False
+        liked_video_pages = YoutubeAPI.get_liked_video_pages(
+            context,
+            known_third_party_ids=None if full_crawl else reconciler.stored_third_party_ids,
+            youtube_service=youtube_service,
+            # Removing an old like leaves the first page untouched: only incremental crawls can rely on its ETag
+            first_page_etag=None if full_crawl else local_playlist.liked_videos_etag,
         )
+        try:
+            for page in liked_video_pages:
+                if first_page_etag is None:
+                    first_page_etag = page.get("etag")
+
+                liked_musics = {video["id"]: video for video in page["items"] if YoutubeAPI._is_music(video)}
+                musics_to_create.extend(
+                    liked_musics[third_party_id]
+                    for third_party_id in reconciler.add_liked(liked_musics)
+                )
+
+                if len(musics_to_create) >= settings.YOUTUBE_BULK_CHUNK_SIZE:
+                    YoutubeAPI._create_songs(context, local_playlist, musics_to_create)
+                    musics_to_create = []
+        except LikedVideosNotModified:
+            logger.info("Liked videos of user %s did not change", context.user.email)
+            return set(), set()
+        except QuotaExhausted:
+            logger.warning(
+                "YouTube quota exhausted, deferring the crawl of liked videos of user %s to the next run",
+                context.user.email,
+            )
+            quota_exhausted = True
+
+        if not quota_exhausted:
+            local_playlist.liked_videos_etag = first_page_etag
+            local_playlist.save(update_fields=["liked_videos_etag"])
 
-        existing_youtube_song_third_party_ids.update(
-            {song.third_party_id for song in created_youtube_songs}
+        if musics_to_create:
+            YoutubeAPI._create_songs(context, local_playlist, musics_to_create)
+
+        plan = reconciler.plan(detect_removals=full_crawl)
+        created_third_party_ids = set(plan.to_create)
+        metrics.sync_songs.inc(len(created_third_party_ids), operation="created")
+        logger.info(
+            "Created %s youtube songs (%s)",
+            len(created_third_party_ids),
+            ",".join(created_third_party_ids)
         )
 
-        songs_to_remove_third_party_ids = {
-            third_party_id
-            for third_party_id in existing_youtube_song_third_party_ids
-            if third_party_id not in {
-                music["id"]
-                for music in all_likeds_music
-            }
-        }
+        # Likes missing from an interrupted crawl were not removed
+        if not full_crawl or quota_exhausted:
+            if created_third_party_ids:
+                pending_work.mark(context.user.id)
+                index_cache.invalidate(context.user.id)
+            return created_third_party_ids, set()
 
         YoutubeSong.objects.filter(
             user=context.user,
-            third_party_id__in=songs_to_remove_third_party_ids,
+            third_party_id__in=plan.to_delete,
             is_synched=False,
         ).delete()
 
-        YoutubeSong.objects.filter(
-            user=context.user,
-            third_party_id__in=songs_to_remove_third_party_ids,
-            is_synched=True,
-        ).update(should_not_exist=True)
+        songs_to_remove_ids = list(
+            YoutubeSong.objects.filter(
+                user=context.user,
+                third_party_id__in=plan.to_mark_for_removal,
+                is_synched=True,
+            ).values_list("id", flat=True)
+        )
+        YoutubeSong.objects.filter(id__in=songs_to_remove_ids).update(should_not_exist=True)
+        journal.record(context.user.id, songs_to_remove_ids, SongChange.Kind.REMOVED)
 
+        songs_to_remove_third_party_ids = plan.to_delete | plan.to_mark_for_removal
+        metrics.sync_songs.inc(len(songs_to_remove_third_party_ids), operation="unliked")
         logger.info(
             "Deleted %s youtube songs (%s)",
             len(songs_to_remove_third_party_ids),
             ",".join(songs_to_remove_third_party_ids)
         )
-        return created_youtube_songs, songs_to_remove_third_party_ids
+
+        local_playlist.last_full_crawl = crawl_started
+        local_playlist.save(update_fields=["last_full_crawl"])
+        if created_third_party_ids or songs_to_remove_third_party_ids:
+            pending_work.mark(context.user.id)
+            index_cache.invalidate(context.user.id)
+        return created_third_party_ids, songs_to_remove_third_party_ids
 
     @staticmethod
+    @metrics.tracked_stage("make_playlists_split")
     def make_playlists_split(
         context: Union[HttpRequest, DummyRequest],
     ) -> None:
@@ -207,6 +408,11 @@ class YoutubeAPI:
             songs_to_update,
             fields=["remote_playlist"],
         )
+        # Songs can only be published once in a remote playlist
+        journal.record(context.user.id, (song.id for song in songs_to_update), SongChange.Kind.ADDED)
+        if songs_to_update:
+            pending_work.mark(context.user.id)
+            index_cache.invalidate(context.user.id)
 
     def _create_remote_playlists(
         context: Union[HttpRequest, DummyRequest],
@@ -229,133 +435,499 @@ class YoutubeAPI:
         return remote_playlist_to_create
 
     @staticmethod
+    def _execute_batched(
+        youtube_service: Resource,
+        items: Iterable[Any],
+        make_request: Callable[[Any], GoogleHttpRequest],
+    ) -> Iterator[BatchResult]:
+        """
+        Same as execute_batched, except that running out of daily quota ends the results instead of raising:
+        items that were not sent stay pending for the next run.
+        """
+        try:
+            yield from execute_batched(youtube_service, items, make_request)
+        except QuotaExhausted:
+            logger.warning("YouTube quota exhausted, deferring remaining requests to the next run", exc_info=True)
+
+    @staticmethod
+    def _bulk_update(objects: List[Any], fields: List[str]) -> None:
+        """
+        Write `fields` of the `objects` synced by a batch in a single transaction. Callers keep YouTube calls out
+        of it, so that no database transaction stays open during a round trip to the API.
+        """
+        if not objects:
+            return
+        with transaction.atomic():
+            type(objects[0]).objects.bulk_update(objects, fields)
+
+    @staticmethod
+    @metrics.tracked_stage("sync_remote_playlists")
     def sync_remote_playlists(
         context: Union[HttpRequest, DummyRequest],
+        youtube_service: Optional[Resource] = None,
+        remote_playlists: Optional[List[RemotePlaylist]] = None,
     ) -> None:
-        youtube_service = YoutubeAPI._get_youtube_service(context=context)
-        for remote_playlist in RemotePlaylist.objects.filter(is_synched=False, local_playlist__user=context.user):
-            try:
-                response = youtube_service.playlists().insert(
-                    part="snippet, status",
-                    body={
-                        "snippet": {
-                            "title": remote_playlist.title,
-                        },
-                        "status": {
-                            "privacyStatus": "public"
-                        }
+        """
+        Create `remote_playlists` on YouTube, every remote playlist not synced yet by default.
+        """
+        youtube_service = youtube_service or YoutubeAPI._get_youtube_service(context=context)
+        remote_playlists_to_sync = remote_playlists if remote_playlists is not None else RemotePlaylist.objects.filter(
+            is_synched=False,
+            local_playlist__user=context.user,
+        )
+
+        results = YoutubeAPI._execute_batched(
+            youtube_service,
+            remote_playlists_to_sync,
+            lambda remote_playlist: youtube_service.playlists().insert(
+                part="snippet, status",
+                body={
+                    "snippet": {
+                        "title": remote_playlist.title,
+                    },
+                    "status": {
+                        "privacyStatus": "public"
                     }
-                ).execute()
-            except Exception:
-                logger.exception("Failed to sync RemotePlaylist %s", remote_playlist.id, exc_info=True)
-            else:
-                remote_playlist.third_party_id = response["id"]
-                remote_playlist.third_party_etag = response["etag"]
-                remote_playlist.is_synched = True
-                remote_playlist.save()
-                logger.info(
-                    "Created youtube playlist: %s",
-                    remote_playlist.third_party_id
-                )
+                }
+            ),
+        )
+        synched_remote_playlists: List[RemotePlaylist] = []
+        synched_count = 0
+        for remote_playlist, response, exception in results:
+            if exception is not None:
+                logger.exception("Failed to sync RemotePlaylist %s", remote_playlist.id, exc_info=exception)
+                continue
+
+            remote_playlist.third_party_id = response["id"]
+            remote_playlist.third_party_etag = response["etag"]
+            remote_playlist.is_synched = True
+            synched_remote_playlists.append(remote_playlist)
+            synched_count += 1
+            logger.info(
+                "Created youtube playlist: %s",
+                remote_playlist.third_party_id
+            )
+            if len(synched_remote_playlists) >= settings.YOUTUBE_BATCH_SIZE:
+                YoutubeAPI._bulk_update(synched_remote_playlists, REMOTE_PLAYLIST_SYNC_FIELDS)
+                synched_remote_playlists = []
+
+        YoutubeAPI._bulk_update(synched_remote_playlists, REMOTE_PLAYLIST_SYNC_FIELDS)
+        if synched_count:
+            index_cache.invalidate(context.user.id)
 
     @staticmethod
-    def sync_remote_playlists_content(
+    def plan_sync(
         context: Union[HttpRequest, DummyRequest],
-    ) -> None:
-        youtube_service = YoutubeAPI._get_youtube_service(context=context)
-        remote_playlist_ids = RemotePlaylist.objects.filter(
-            local_playlist__user=context.user,
-            is_synched=True,
-        ).values_list("id", flat=True)
+    ) -> SyncPlan:
+        """
+        Plan the remote playlists to create, and the items to insert, delete or unpublish for the songs changed
+        since the last publication, according to their current state. Only the database is read.
+        """
+        remote_playlists_to_create = list(
+            RemotePlaylist.objects.filter(is_synched=False, local_playlist__user=context.user).order_by("created")
+        )
+        operations = [
+            plan_operation(CREATE_PLAYLIST, remote_playlist) for remote_playlist in remote_playlists_to_create
+        ]
 
-        # -------------------------------- #
-        # Add new songs to remote playlist #
-        # -------------------------------- #
+        changed_song_ids, change_ids = journal.read(context.user.id)
+        changed_songs = YoutubeSong.objects.filter(
+            user=context.user,
+            id__in=changed_song_ids,
+            remote_playlist__isnull=False,
+        ).select_related("remote_playlist")
+        remote_playlists_to_create_by_id = {
+            remote_playlist.id: remote_playlist for remote_playlist in remote_playlists_to_create
+        }
+        for song in changed_songs:
+            # Sharing the instance of the playlist to create, its items are inserted once it is
+            song.remote_playlist = remote_playlists_to_create_by_id.get(song.remote_playlist_id, song.remote_playlist)
+            if song.is_synched and song.should_not_exist:
+                operations.append(plan_operation(DELETE_ITEM, song))
+            elif song.is_synched and song.should_not_be_published:
+                operations.append(plan_operation(UNPUBLISH_ITEM, song))
+            elif not song.is_synched and not song.should_not_exist and not song.should_not_be_published:
+                operations.append(plan_operation(INSERT_ITEM, song))
+        return SyncPlan(operations, change_ids)
 
-        songs_to_add = YoutubeSong.objects.filter(
-            is_synched=False,
-            should_not_exist=False,
-            should_not_be_published=False,
-            remote_playlist_id__in=remote_playlist_ids,
-        )
+    @staticmethod
+    def _insert_songs(
+        youtube_service: Resource,
+        songs: List[YoutubeSong],
+    ) -> Tuple[List[YoutubeSong], List[YoutubeSong]]:
+        """
+        Add `songs` to their remote playlist, returning the songs added and the ones left to add.
+        """
+        songs_waiting = [song for song in songs if not song.remote_playlist.is_synched]
+        songs_to_add = [song for song in songs if song.remote_playlist.is_synched]
 
         songs_saved: List[YoutubeSong] = []
-        for song in songs_to_add:
-            try:
-                response = youtube_service.playlistItems().insert(
-                    part="snippet,id",
-                    body={
-                        "snippet": {
-                            "playlistId": song.remote_playlist.third_party_id,
-                            "resourceId": {
-                                "kind": "youtube#video",
-                                "videoId": song.third_party_id
-                            }
+        songs_to_save: List[YoutubeSong] = []
+        results = YoutubeAPI._execute_batched(
+            youtube_service,
+            songs_to_add,
+            lambda song: youtube_service.playlistItems().insert(
+                part="snippet,id",
+                body={
+                    "snippet": {
+                        "playlistId": song.remote_playlist.third_party_id,
+                        "resourceId": {
+                            "kind": "youtube#video",
+                            "videoId": song.third_party_id
                         }
                     }
-                ).execute()
-            except Exception:
-                logger.error("Failed to sync song %s %s", song.title, song.id, exc_info=True)
-            else:
-                song.third_party_playlist_item_id = response.get("id", "NOT FOUND")
-                song.is_synched = True
-                song.save()
-                songs_saved.append(song)
-
+                }
+            ),
+        )
+        for song, response, exception in results:
+            if exception is not None:
+                logger.error("Failed to sync song %s %s", song.title, song.id, exc_info=exception)
+                continue
+
+            song.third_party_playlist_item_id = response.get("id", "NOT FOUND")
+            song.is_synched = True
+            songs_to_save.append(song)
+            songs_saved.append(song)
+            if len(songs_to_save) >= settings.YOUTUBE_BATCH_SIZE:
+                YoutubeAPI._bulk_update(songs_to_save, SONG_SYNC_FIELDS)
+                songs_to_save = []
+
+        YoutubeAPI._bulk_update(songs_to_save, SONG_SYNC_FIELDS)
+
+        metrics.sync_songs.inc(len(songs_saved), operation="published")
         logger.info(
             "Added %s youtube songs (%s) to remote playlists ",
             len(songs_saved),
             ",".join(song.third_party_id for song in songs_saved)
         )
+        saved_song_ids = {song.id for song in songs_saved}
+        return songs_saved, songs_waiting + [song for song in songs_to_add if song.id not in saved_song_ids]
 
-        # -------------------------- #
-        # Remove songs from playlist #
-        # -------------------------- #
-
-        songs_to_remove = YoutubeSong.objects.filter(
-            is_synched=True,
-            should_not_exist=True,
-            remote_playlist_id__in=remote_playlist_ids,
-        )
-
+    @staticmethod
+    def _delete_songs(
+        youtube_service: Resource,
+        songs: List[YoutubeSong],
+    ) -> Tuple[List[YoutubeSong], List[YoutubeSong]]:
+        """
+        Remove the items of the unliked `songs` then the songs themselves, returning the songs deleted and the
+        ones left to delete. A failed removal still deletes its song, the item being most likely gone already.
+        """
+        attempted_removal_songs = []
         removed_songs = []
-        for song in songs_to_remove:
-            try:
-                youtube_service.playlistItems().delete(
-                    id=song.third_party_playlist_item_id
-                ).execute()
-            except Exception:
-                logger.error("Failed to remove song %s", song.id, exc_info=True)
+        results = YoutubeAPI._execute_batched(
+            youtube_service,
+            songs,
+            lambda song: youtube_service.playlistItems().delete(
+                id=song.third_party_playlist_item_id
+            ),
+        )
+        for song, _, exception in results:
+            attempted_removal_songs.append(song)
+            if exception is not None:
+                logger.error("Failed to remove song %s", song.id, exc_info=exception)
             else:
                 removed_songs.append(song)
+        metrics.sync_songs.inc(len(removed_songs), operation="removed")
         logger.info(
             "Removed %s youtube songs (%s) from remote playlists ",
             len(removed_songs),
             ",".join(song.third_party_id for song in removed_songs)
         )
 
-        YoutubeSong.objects.filter(id__in={song.id for song in songs_to_remove}).delete()
-
-        songs_to_unpublish = YoutubeSong.objects.filter(
-            is_synched=True,
-            should_not_be_published=True,
-            remote_playlist_id__in=remote_playlist_ids,
-        )
+        attempted_removal_song_ids = {song.id for song in attempted_removal_songs}
+        YoutubeSong.objects.filter(id__in=attempted_removal_song_ids).delete()
+        return attempted_removal_songs, [song for song in songs if song.id not in attempted_removal_song_ids]
 
+    @staticmethod
+    def _unpublish_songs(
+        youtube_service: Resource,
+        songs: List[YoutubeSong],
+    ) -> Tuple[List[YoutubeSong], List[YoutubeSong]]:
+        """
+        Remove the items of `songs` from their remote playlist, returning the songs unpublished and the ones left
+        to unpublish.
+        """
         unpublished_songs = []
-        for song in songs_to_unpublish:
-            try:
-                youtube_service.playlistItems().delete(
-                    id=song.third_party_playlist_item_id
-                ).execute()
-            except Exception:
-                logger.error("Failed to unpublish song %s", song.id, exc_info=True)
+        results = YoutubeAPI._execute_batched(
+            youtube_service,
+            songs,
+            lambda song: youtube_service.playlistItems().delete(
+                id=song.third_party_playlist_item_id
+            ),
+        )
+        for song, _, exception in results:
+            if exception is not None:
+                logger.error("Failed to unpublish song %s", song.id, exc_info=exception)
             else:
                 unpublished_songs.append(song)
 
+        metrics.sync_songs.inc(len(unpublished_songs), operation="unpublished")
         logger.info(
             "Unpublished %s youtube songs (%s) from remote playlists ",
             len(unpublished_songs),
             ",".join(song.third_party_id for song in unpublished_songs)
         )
-        YoutubeSong.objects.filter(id__in={song.id for song in unpublished_songs}).update(is_synched=False)
+        unpublished_song_ids = {song.id for song in unpublished_songs}
+        YoutubeSong.objects.filter(id__in=unpublished_song_ids).update(is_synched=False)
+        return unpublished_songs, [song for song in songs if song.id not in unpublished_song_ids]
+
+    @staticmethod
+    @metrics.tracked_stage("sync_remote_playlists_content")
+    def sync_remote_playlists_content(
+        context: Union[HttpRequest, DummyRequest],
+        youtube_service: Optional[Resource] = None,
+        plan: Optional[SyncPlan] = None,
+    ) -> None:
+        """
+        Apply the item operations of `plan` - planned from the songs changes journaled since the last publication
+        by default - kind by kind in priority order. Songs which could not be published, or whose operations were
+        deferred, are journaled again for the next publication to retry them.
+        """
+        youtube_service = youtube_service or YoutubeAPI._get_youtube_service(context=context)
+        plan = plan or YoutubeAPI.plan_sync(context)
+        item_operations = {
+            INSERT_ITEM: (YoutubeAPI._insert_songs, SongChange.Kind.ADDED),
+            DELETE_ITEM: (YoutubeAPI._delete_songs, SongChange.Kind.REMOVED),
+            UNPUBLISH_ITEM: (YoutubeAPI._unpublish_songs, SongChange.Kind.UNPUBLISHED),
+        }
+
+        songs_changed = False
+        songs_left: Dict[str, List[YoutubeSong]] = defaultdict(list)
+        for operation, songs in plan.groups():
+            # Playlists are created by sync_remote_playlists
+            if operation not in item_operations:
+                continue
+            apply_operation, kind = item_operations[operation]
+            songs_done, songs_not_done = apply_operation(youtube_service, songs)
+            songs_changed = songs_changed or bool(songs_done)
+            songs_left[kind].extend(songs_not_done)
+        for planned in plan.deferred:
+            if planned.operation in item_operations:
+                songs_left[item_operations[planned.operation][1]].append(planned.target)
+
+        for kind, songs in songs_left.items():
+            journal.record(context.user.id, (song.id for song in songs), kind)
+        journal.acknowledge(plan.change_ids)
+        if songs_changed:
+            index_cache.invalidate(context.user.id)
+
+    @staticmethod
+    def _list_playlist_items(youtube_service: Resource, playlist_id: str) -> Dict[str, str]:
+        """
+        Video id of every item of the remote playlist `playlist_id`, by playlist item id.
+        """
+        items: Dict[str, str] = {}
+        page_token: Optional[str] = ""
+        while page_token is not None:
+            response = execute(
+                youtube_service.playlistItems().list(
+                    part="snippet",
+                    playlistId=playlist_id,
+                    maxResults=50,
+                    pageToken=page_token,
+                )
+            )
+            for item in response["items"]:
+                items[item["id"]] = item["snippet"]["resourceId"]["videoId"]
+            page_token = response.get("nextPageToken")
+        return items
+
+    @staticmethod
+    def _find_drifting_playlists(
+        youtube_service: Resource,
+        remote_playlists: List[RemotePlaylist],
+        full: bool,
+    ) -> Tuple[List[Tuple[RemotePlaylist, str]], List[RemotePlaylist], List[RemotePlaylist]]:
+        """
+        Compare the synced remote playlists with their YouTube counterpart, fetched 50 at a time, returning:
+        - the playlists whose items must be listed, with their current ETag,
+        - the playlists whose ETag changed while their item count still matches, updated with their new ETag,
+        - the playlists which no longer exist on YouTube.
+
+        A playlist is assumed unchanged when its ETag is the one last mirrored, or its item count the amount of
+        songs synced to it. Unless `full`, only the others are listed. Playlists YouTube fails to return are left
+        for the next mirror.
+        """
+        synched_counts = dict(
+            YoutubeSong.objects.filter(
+                remote_playlist__in=remote_playlists,
+                is_synched=True,
+            ).values_list("remote_playlist_id").annotate(count=Count("id")).order_by()
+        )
+        drifting: List[Tuple[RemotePlaylist, str]] = []
+        etag_changed: List[RemotePlaylist] = []
+        vanished: List[RemotePlaylist] = []
+        for start in range(0, len(remote_playlists), 50):
+            chunk = remote_playlists[start:start + 50]
+            try:
+                response = execute(
+                    youtube_service.playlists().list(
+                        part="contentDetails",
+                        id=",".join(remote_playlist.third_party_id for remote_playlist in chunk),
+                        maxResults=50,
+                    )
+                )
+            except HttpError:
+                logger.exception("Failed to fetch %s remote playlists, skipping them", len(chunk), exc_info=True)
+                continue
+            listed = {playlist["id"]: playlist for playlist in response["items"]}
+            for remote_playlist in chunk:
+                playlist = listed.get(remote_playlist.third_party_id)
+                if playlist is None:
+                    vanished.append(remote_playlist)
+                elif full or (
+                    playlist["etag"] != remote_playlist.third_party_etag
+                    and playlist["contentDetails"]["itemCount"] != synched_counts.get(remote_playlist.id, 0)
+                ):
+                    drifting.append((remote_playlist, playlist["etag"]))
+                elif playlist["etag"] != remote_playlist.third_party_etag:
+                    remote_playlist.third_party_etag = playlist["etag"]
+                    etag_changed.append(remote_playlist)
+        return drifting, etag_changed, vanished
+
+    @staticmethod
+    @metrics.tracked_stage("mirror_remote_playlists")
+    def mirror_remote_playlists(
+        context: Union[HttpRequest, DummyRequest],
+        full: bool = False,
+        youtube_service: Optional[Resource] = None,
+    ) -> None:
+        """
+        Reconcile the synced songs with the items actually in their remote playlist, fixing only the differences:
+        - songs whose item was removed on YouTube are no longer synched, and journaled to be added again,
+        - items inserted without their song being saved are adopted by the song,
+        - extra items of an already synced song are deleted,
+        - songs of a playlist deleted on YouTube wait for the playlist to be created again.
+        Items of videos unknown to the playlist's songs are left alone.
+
+        Only the playlists whose ETag and item count both changed since the last mirror are listed, unless `full`.
+        """
+        youtube_service = youtube_service or YoutubeAPI._get_youtube_service(context=context)
+        remote_playlists = list(
+            RemotePlaylist.objects.filter(local_playlist__user=context.user, is_synched=True).order_by("created")
+        )
+        try:
+            drifting, etag_changed, vanished = YoutubeAPI._find_drifting_playlists(
+                youtube_service,
+                remote_playlists,
+                full,
+            )
+        except QuotaExhausted:
+            logger.warning("YouTube quota exhausted, deferring the mirror to the next run", exc_info=True)
+            return
+
+        changed_songs: Dict[Any, YoutubeSong] = {}
+        items_to_delete: List[str] = []
+        for remote_playlist, etag in drifting:
+            try:
+                remote_items = YoutubeAPI._list_playlist_items(youtube_service, remote_playlist.third_party_id)
+            except QuotaExhausted:
+                logger.warning("YouTube quota exhausted, deferring the mirror to the next run", exc_info=True)
+                break
+            except HttpError as error:
+                if error.resp.status == HTTP_NOT_FOUND:
+                    # Deleted since it was listed
+                    vanished.append(remote_playlist)
+                else:
+                    logger.exception(
+                        "Failed to list items of remote playlist %s, skipping it",
+                        remote_playlist.third_party_id,
+                        exc_info=True,
+                    )
+                continue
+            remote_playlist.third_party_etag = etag
+            etag_changed.append(remote_playlist)
+
+            songs = list(remote_playlist.songs.all())
+            for song in songs:
+                if song.is_synched and song.third_party_playlist_item_id not in remote_items:
+                    song.is_synched = False
+                    song.third_party_playlist_item_id = None
+                    changed_songs[song.id] = song
+
+            synched_item_ids = {song.third_party_playlist_item_id for song in songs if song.is_synched}
+            songs_by_video_id = {song.third_party_id: song for song in songs}
+            for item_id, video_id in remote_items.items():
+                song = songs_by_video_id.get(video_id)
+                if item_id in synched_item_ids or song is None:
+                    continue
+                if song.is_synched:
+                    items_to_delete.append(item_id)
+                    continue
+                song.is_synched = True
+                song.third_party_playlist_item_id = item_id
+                changed_songs[song.id] = song
+
+        for remote_playlist in vanished:
+            remote_playlist.is_synched = False
+            remote_playlist.third_party_id = None
+            remote_playlist.third_party_etag = None
+            for song in remote_playlist.songs.filter(is_synched=True):
+                song.is_synched = False
+                song.third_party_playlist_item_id = None
+                changed_songs[song.id] = song
+
+        # Songs unliked and no longer on YouTube need no removal anymore
+        song_ids_to_delete = {
+            song.id for song in changed_songs.values() if song.should_not_exist and not song.is_synched
+        }
+        songs_to_save = [song for song in changed_songs.values() if song.id not in song_ids_to_delete]
+        YoutubeAPI._bulk_update(songs_to_save, SONG_SYNC_FIELDS)
+        YoutubeSong.objects.filter(id__in=song_ids_to_delete).delete()
+        YoutubeAPI._bulk_update(etag_changed + vanished, REMOTE_PLAYLIST_SYNC_FIELDS)
+
+        deleted_items = [
+            item_id
+            for item_id, _, exception in YoutubeAPI._execute_batched(
+                youtube_service,
+                items_to_delete,
+                lambda item_id: youtube_service.playlistItems().delete(id=item_id),
+            )
+            if exception is None
+        ]
+
+        metrics.sync_songs.inc(len(songs_to_save) + len(song_ids_to_delete), operation="mirrored")
+        metrics.sync_songs.inc(len(deleted_items), operation="deduplicated")
+        logger.info(
+            "Mirrored %s remote playlists (%s listed, %s vanished): fixed %s songs, deleted %s duplicate items",
+            len(remote_playlists),
+            len(drifting),
+            len(vanished),
+            len(songs_to_save) + len(song_ids_to_delete),
+            len(deleted_items),
+        )
+        if songs_to_save or vanished:
+            # The publisher decides from the songs state what they still need
+            journal.record(context.user.id, (song.id for song in songs_to_save), SongChange.Kind.ADDED)
+            pending_work.mark(context.user.id)
+        if songs_to_save or song_ids_to_delete or vanished:
+            index_cache.invalidate(context.user.id)
+
+    @staticmethod
+    def publish(
+        context: Union[HttpRequest, DummyRequest],
+    ) -> None:
+        """
+        Plan the sync, then create the missing remote playlists and sync their content, both steps sharing one
+        YouTube service. Operations which do not fit in the remaining daily quota are deferred to the next run,
+        those ranked first in YOUTUBE_SYNC_PRIORITIES being kept.
+
+        Users without pending work are skipped. Work left over by failures or the quota is flagged for the next run.
+        """
+        if not pending_work.claim(context.user.id):
+            logger.info("Nothing to publish for user %s", context.user.email)
+            return
+
+        try:
+            plan = YoutubeAPI.plan_sync(context).within_budget(quota.remaining_units())
+            logger.info("Sync plan of user %s: %s", context.user.email, plan.describe())
+            youtube_service = YoutubeAPI._get_youtube_service(context=context)
+            YoutubeAPI.sync_remote_playlists(
+                context,
+                youtube_service=youtube_service,
+                remote_playlists=plan.targets(CREATE_PLAYLIST),
+            )
+            YoutubeAPI.sync_remote_playlists_content(context, youtube_service=youtube_service, plan=plan)
+        finally:
+            if pending_work.remains(context.user.id):
+                pending_work.mark(context.user.id)
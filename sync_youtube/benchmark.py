@@ -0,0 +1,101 @@
+"""
+Synthetic-scale benchmark of the fetch/split/publish pipeline, run against a FakeYoutube account.
+"""
+import time
+import tracemalloc
+import uuid
+from typing import Any, Callable, Dict, List, NamedTuple
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import override_settings
+from googleapiclient import discovery
+
+from sync_youtube.api.youtube import DummyRequest, YoutubeAPI
+from sync_youtube.fake_youtube import FakeYoutube, FakeYoutubeHttp, make_liked_videos
+from sync_youtube.models.song import YoutubeSong
+
+
+class StageResult(NamedTuple):
+    stage: str
+    wall_time: float
+    peak_memory: int
+    db_queries: int
+    api_calls: Dict[str, int]
+    http_round_trips: int
+
+
+def _measure_stage(
+    stage: str,
+    run: Callable[[], Any],
+    youtube_http: FakeYoutubeHttp,
+    trace_memory: bool,
+) -> StageResult:
+    db_queries = 0
+
+    def count_query(execute: Callable[..., Any], sql: str, params: Any, many: bool, context: Dict[str, Any]) -> Any:
+        nonlocal db_queries
+        db_queries += 1
+        return execute(sql, params, many, context)
+
+    calls_before = youtube_http.youtube.calls.copy()
+    round_trips_before = youtube_http.round_trips
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(count_query):
+            run()
+        wall_time = time.perf_counter() - started
+        peak_memory = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    return StageResult(
+        stage=stage,
+        wall_time=wall_time,
+        peak_memory=peak_memory,
+        db_queries=db_queries,
+        api_calls=dict(youtube_http.youtube.calls - calls_before),
+        http_round_trips=youtube_http.round_trips - round_trips_before,
+    )
+
+
+@override_settings(YOUTUBE_QUOTA_ENABLED=False)
+def run_benchmark(liked_videos: int, music_ratio: float = 0.9, trace_memory: bool = True) -> Dict[str, Any]:
+    """
+    Run every pipeline stage for a new user liking `liked_videos` videos, then roll the database back.
+
+    The quota limiter is disabled so that its throttling does not hide the cost of the pipeline itself. Memory
+    tracing slows Python code down: wall times are only comparable between runs with the same `trace_memory`.
+    """
+    youtube_http = FakeYoutubeHttp(FakeYoutube(make_liked_videos(liked_videos, music_ratio)))
+    youtube_service = discovery.build_from_document(YoutubeAPI._get_discovery_document(), http=youtube_http)
+
+    with transaction.atomic():
+        user = User.objects.create_user(username=f"benchmark-{uuid.uuid4().hex}")
+        context = DummyRequest(user=user)
+        stages: List[Any] = [
+            (
+                "extract_liked_musics",
+                lambda: YoutubeAPI.extract_liked_musics(context, full_crawl=True, youtube_service=youtube_service),
+            ),
+            ("make_playlists_split", lambda: YoutubeAPI.make_playlists_split(context)),
+            (
+                "sync_remote_playlists",
+                lambda: YoutubeAPI.sync_remote_playlists(context, youtube_service=youtube_service),
+            ),
+            (
+                "sync_remote_playlists_content",
+                lambda: YoutubeAPI.sync_remote_playlists_content(context, youtube_service=youtube_service),
+            ),
+        ]
+        results = [_measure_stage(stage, run, youtube_http, trace_memory) for stage, run in stages]
+        songs = YoutubeSong.objects.filter(user=user).count()
+        transaction.set_rollback(True)
+
+    return {
+        "liked_videos": liked_videos,
+        "songs": songs,
+        "stages": [result._asdict() for result in results],
+    }
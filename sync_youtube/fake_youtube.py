@@ -0,0 +1,353 @@
+"""
+Stand-in for the YouTube Data API endpoints used by YoutubeAPI, for benchmarks and offline runs: served
+in process through FakeYoutubeHttp, or over HTTP by make_server (see `manage.py run_fake_youtube`).
+"""
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from email.parser import FeedParser, Parser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+import httplib2
+
+from sync_youtube.api.quota import YOUTUBE_DEFAULT_METHOD_COST, YOUTUBE_METHOD_COSTS
+from sync_youtube.api.youtube import YOUTUBE_CATEGORY_ID_MUSIC
+
+YOUTUBE_PAGE_SIZE = 50
+HTTP_REASONS = {
+    200: "OK",
+    204: "No Content",
+    304: "Not Modified",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+}
+INJECTED_ERROR_REASONS = {
+    403: "userRateLimitExceeded",
+    429: "rateLimitExceeded",
+    500: "backendError",
+    503: "backendError",
+}
+
+logger = logging.getLogger("app")
+
+FakeResponse = Tuple[int, Optional[Dict[str, Any]]]
+
+
+def make_liked_videos(count: int, music_ratio: float = 0.9) -> List[Dict[str, Any]]:
+    """
+    Synthetic liked videos as returned by videos.list, one in every 1 / (1 - `music_ratio`) not being a music.
+    """
+    non_music_every = round(1 / (1 - music_ratio)) if music_ratio < 1 else 0
+    return [
+        {
+            "kind": "youtube#video",
+            "etag": f"etag-video-{index}",
+            "id": f"video{index:08d}",
+            "snippet": {
+                "title": f"Liked video {index}",
+                "description": f"Description of liked video {index}",
+                "thumbnails": {"default": {"url": f"https://i.ytimg.com/vi/video{index:08d}/default.jpg"}},
+                "categoryId": (
+                    "22" if non_music_every and index % non_music_every == non_music_every - 1
+                    else YOUTUBE_CATEGORY_ID_MUSIC
+                ),
+            },
+        }
+        for index in range(count)
+    ]
+
+
+class FakeYoutube:
+    """
+    State of a single YouTube account: its liked videos, most recent first, and the playlists created for it.
+    Every handled call is counted by method in `calls`.
+
+    Each call waits `latency` seconds, fails with status S with probability `error_rates[S]`, and is denied with
+    a quotaExceeded error once `quota_units_per_day` would be exceeded (if given).
+    """
+
+    def __init__(
+        self,
+        liked_videos: List[Dict[str, Any]],
+        latency: float = 0,
+        error_rates: Optional[Dict[int, float]] = None,
+        quota_units_per_day: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.liked_videos = liked_videos
+        self.latency = latency
+        self.error_rates = error_rates or {}
+        self.quota_units_per_day = quota_units_per_day
+        self.quota_units_spent = 0
+        self.playlists: Dict[str, Dict[str, Any]] = {}
+        self.playlist_items: Dict[str, Dict[str, Any]] = {}
+        # Bumped by every change to a playlist's items, changing its ETag
+        self.playlist_revisions: Counter = Counter()
+        self.calls: Counter = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def handle(
+        self,
+        method: str,
+        path: str,
+        query: Dict[str, str],
+        body: Optional[Dict[str, Any]],
+        headers: Dict[str, str],
+    ) -> Tuple[str, FakeResponse]:
+        """
+        Answer a YouTube Data API call, returning the API method name with the HTTP status and JSON body.
+        """
+        routes = {
+            ("GET", "/youtube/v3/videos"): ("youtube.videos.list", self._list_videos),
+            ("GET", "/youtube/v3/playlists"): ("youtube.playlists.list", self._list_playlists),
+            ("POST", "/youtube/v3/playlists"): ("youtube.playlists.insert", self._insert_playlist),
+            ("GET", "/youtube/v3/playlistItems"): ("youtube.playlistItems.list", self._list_playlist_items),
+            ("POST", "/youtube/v3/playlistItems"): ("youtube.playlistItems.insert", self._insert_playlist_item),
+            ("DELETE", "/youtube/v3/playlistItems"): ("youtube.playlistItems.delete", self._delete_playlist_item),
+        }
+        if (method, path) not in routes:
+            return "unknown", (404, _error_body(404, "notFound", f"No fake for {method} {path}"))
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        method_id, handler = routes[(method, path)]
+        with self._lock:
+            self.calls[method_id] += 1
+
+            for status, rate in self.error_rates.items():
+                if self._random.random() < rate:
+                    reason = INJECTED_ERROR_REASONS.get(status, "error")
+                    return method_id, (status, _error_body(status, reason, "Injected error"))
+
+            cost = YOUTUBE_METHOD_COSTS.get(method_id, YOUTUBE_DEFAULT_METHOD_COST)
+            if self.quota_units_per_day is not None and self.quota_units_spent + cost > self.quota_units_per_day:
+                return method_id, (403, _error_body(403, "quotaExceeded", "The request cannot be completed"))
+            self.quota_units_spent += cost
+
+            return method_id, handler(query, body, headers)
+
+    def _list_videos(self, query: Dict[str, str], body: Any, headers: Dict[str, str]) -> FakeResponse:
+        if query.get("myRating") != "like":
+            return 400, _error_body(400, "badRequest", "Only myRating=like is faked")
+
+        page, offset, items = _page(self.liked_videos, query, "youtube#videoListResponse")
+        page["etag"] = "etag-likes-{}-{}".format(len(self.liked_videos), items[0]["id"] if items else "")
+        if offset == 0 and headers.get("if-none-match") == page["etag"]:
+            return 304, None
+        return 200, page
+
+    def _list_playlists(self, query: Dict[str, str], body: Any, headers: Dict[str, str]) -> FakeResponse:
+        playlist_ids = query["id"].split(",") if query.get("id") else list(self.playlists)
+        playlists = [
+            {
+                **self.playlists[playlist_id],
+                "etag": "{}-{}".format(self.playlists[playlist_id]["etag"], self.playlist_revisions[playlist_id]),
+                "contentDetails": {"itemCount": self._playlist_item_count(playlist_id)},
+            }
+            for playlist_id in playlist_ids
+            if playlist_id in self.playlists
+        ]
+        page, _, _ = _page(playlists, query, "youtube#playlistListResponse")
+        return 200, page
+
+    def _playlist_item_count(self, playlist_id: str) -> int:
+        return sum(1 for item in self.playlist_items.values() if item["snippet"]["playlistId"] == playlist_id)
+
+    def _insert_playlist(self, query: Dict[str, str], body: Any, headers: Dict[str, str]) -> FakeResponse:
+        playlist = {
+            "kind": "youtube#playlist",
+            "etag": f"etag-playlist-{len(self.playlists)}",
+            "id": f"PL{uuid.uuid4().hex}",
+            "snippet": (body or {}).get("snippet", {}),
+            "status": (body or {}).get("status", {}),
+        }
+        self.playlists[playlist["id"]] = playlist
+        return 200, playlist
+
+    def _list_playlist_items(self, query: Dict[str, str], body: Any, headers: Dict[str, str]) -> FakeResponse:
+        if query.get("playlistId") not in self.playlists:
+            return 404, _error_body(404, "playlistNotFound", "Playlist not found")
+
+        items = [
+            item for item in self.playlist_items.values() if item["snippet"]["playlistId"] == query["playlistId"]
+        ]
+        page, _, _ = _page(items, query, "youtube#playlistItemListResponse")
+        return 200, page
+
+    def _insert_playlist_item(self, query: Dict[str, str], body: Any, headers: Dict[str, str]) -> FakeResponse:
+        snippet = (body or {}).get("snippet", {})
+        if snippet.get("playlistId") not in self.playlists:
+            return 404, _error_body(404, "playlistNotFound", "Playlist not found")
+
+        playlist_item = {
+            "kind": "youtube#playlistItem",
+            "etag": f"etag-playlist-item-{len(self.playlist_items)}",
+            "id": uuid.uuid4().hex,
+            "snippet": snippet,
+        }
+        self.playlist_items[playlist_item["id"]] = playlist_item
+        self.playlist_revisions[snippet["playlistId"]] += 1
+        return 200, playlist_item
+
+    def _delete_playlist_item(self, query: Dict[str, str], body: Any, headers: Dict[str, str]) -> FakeResponse:
+        playlist_item = self.playlist_items.pop(query.get("id"), None)
+        if playlist_item is None:
+            return 404, _error_body(404, "playlistItemNotFound", "Playlist item not found")
+        self.playlist_revisions[playlist_item["snippet"]["playlistId"]] += 1
+        return 204, None
+
+
+def _page(items: List[Dict[str, Any]], query: Dict[str, str], kind: str) -> Tuple[Dict[str, Any], int, List[Any]]:
+    offset = int(query.get("pageToken") or 0)
+    page_size = min(int(query.get("maxResults") or 5), YOUTUBE_PAGE_SIZE)
+    page_items = items[offset:offset + page_size]
+    page: Dict[str, Any] = {
+        "kind": kind,
+        "etag": f"etag-page-{offset}-{len(items)}",
+        "items": page_items,
+        "pageInfo": {"totalResults": len(items), "resultsPerPage": page_size},
+    }
+    if offset + page_size < len(items):
+        page["nextPageToken"] = str(offset + page_size)
+    return page, offset, page_items
+
+
+def _error_body(status: int, reason: str, message: str) -> Dict[str, Any]:
+    return {"error": {"code": status, "message": message, "errors": [{"reason": reason, "message": message}]}}
+
+
+def _parse_request_line(request_line: str) -> Tuple[str, str, Dict[str, str]]:
+    method, target = request_line.split(" ")[:2]
+    parsed = urlparse(target)
+    return method, parsed.path, dict(parse_qsl(parsed.query))
+
+
+def _http_part(status: int, body: Optional[Dict[str, Any]]) -> str:
+    content = json.dumps(body) if body is not None else ""
+    return (
+        f"HTTP/1.1 {status} {HTTP_REASONS.get(status, 'Error')}\r\n"
+        "Content-Type: application/json; charset=UTF-8\r\n"
+        f"\r\n{content}"
+    )
+
+
+def _dispatch_batch(youtube: FakeYoutube, body: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+    parser = FeedParser()
+    parser.feed(f"content-type: {headers['content-type']}\r\n\r\n{body}")
+    boundary = f"batch_{uuid.uuid4().hex}"
+
+    parts = []
+    for part in parser.close().get_payload():
+        request_line, serialized_request = part.get_payload().split("\n", 1)
+        request = Parser().parsestr(serialized_request)
+        method, path, query = _parse_request_line(request_line)
+        request_body = request.get_payload()
+        _, (status, content) = youtube.handle(
+            method,
+            path,
+            query,
+            json.loads(request_body) if request_body else None,
+            {key.lower(): value for key, value in request.items()},
+        )
+        parts.append(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <response-{part['Content-ID'][1:-1]}>\r\n"
+            f"\r\n{_http_part(status, content)}\r\n"
+        )
+
+    return (
+        200,
+        {"content-type": f"multipart/mixed; boundary={boundary}"},
+        ("".join(parts) + f"--{boundary}--\r\n").encode(),
+    )
+
+
+def dispatch(
+    youtube: FakeYoutube,
+    method: str,
+    uri: str,
+    body: Optional[str],
+    headers: Dict[str, str],
+) -> Tuple[int, Dict[str, str], bytes]:
+    """
+    Answer a raw HTTP request sent by googleapiclient, batched or not, returning its status, headers and body.
+    """
+    headers = {key.lower(): value for key, value in headers.items()}
+    parsed = urlparse(uri)
+    if parsed.path == "/batch":
+        return _dispatch_batch(youtube, body or "", headers)
+
+    _, (status, content) = youtube.handle(
+        method,
+        parsed.path,
+        dict(parse_qsl(parsed.query)),
+        json.loads(body) if body else None,
+        headers,
+    )
+    return (
+        status,
+        {"content-type": "application/json; charset=UTF-8"},
+        json.dumps(content).encode() if content is not None else b"",
+    )
+
+
+class FakeYoutubeHttp:
+    """
+    httplib2.Http replacement routing googleapiclient requests to a FakeYoutube in the same process.
+    """
+
+    def __init__(self, youtube: FakeYoutube) -> None:
+        self.youtube = youtube
+        self.round_trips = 0
+
+    def request(
+        self,
+        uri: str,
+        method: str = "GET",
+        body: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs: Any,
+    ) -> Tuple[httplib2.Response, bytes]:
+        self.round_trips += 1
+        status, response_headers, content = dispatch(self.youtube, method, uri, body, headers or {})
+        return httplib2.Response({"status": status, **response_headers}), content
+
+
+def make_server(youtube: FakeYoutube, host: str, port: int) -> ThreadingHTTPServer:
+    """
+    HTTP server answering YouTube Data API requests from `youtube`, to point YOUTUBE_API_ROOT_URL at.
+    """
+
+    class FakeYoutubeRequestHandler(BaseHTTPRequestHandler):
+        # Keep connections alive, as YouTube does
+        protocol_version = "HTTP/1.1"
+
+        def _dispatch(self) -> None:
+            length = int(self.headers.get("content-length") or 0)
+            body = self.rfile.read(length).decode() if length else None
+            status, headers, content = dispatch(youtube, self.command, self.path, body, dict(self.headers.items()))
+
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("content-length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+        def log_message(self, format: str, *args: Any) -> None:
+            logger.debug(format, *args)
+
+    return ThreadingHTTPServer((host, port), FakeYoutubeRequestHandler)
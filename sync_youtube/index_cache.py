@@ -0,0 +1,52 @@
+"""
+Per-user cache of the index page context.
+
+Entries are dropped by whatever changes what the page shows: the user's songs, synced playlists or sync jobs.
+The cache backend has to be shared by the web server and the sync workers, hence a file based one by default.
+
+Each user takes two entries, the context and its generation. Beyond MAX_ENTRIES (INDEX_CACHE_MAX_ENTRIES), the file
+based backend drops a third of the entries at random: a user losing either one gets their context computed again.
+"""
+import uuid
+from typing import Any, Dict, Optional, Tuple
+from django.conf import settings
+from django.core.cache import caches
+
+INDEX_CACHE_ALIAS = "index"
+
+
+def _context_key(user_id: int) -> str:
+    return f"index-context:{user_id}"
+
+
+def _generation_key(user_id: int) -> str:
+    return f"index-generation:{user_id}"
+
+
+def get(user_id: int) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Cached context of `user_id`, if still valid, and the current generation to `store` a freshly computed one with.
+    """
+    cache = caches[INDEX_CACHE_ALIAS]
+    cached = cache.get_many([_context_key(user_id), _generation_key(user_id)])
+    generation = cached.get(_generation_key(user_id))
+    if generation is None:
+        cache.add(_generation_key(user_id), uuid.uuid4().hex, timeout=None)
+        return None, cache.get(_generation_key(user_id))
+
+    entry = cached.get(_context_key(user_id))
+    if entry is not None and entry[0] == generation:
+        return entry[1], generation
+    return None, generation
+
+
+def store(user_id: int, context: Dict[str, Any], generation: str) -> None:
+    """
+    Cache `context`, computed after `get` returned `generation`: an invalidation happening in between makes the
+    entry stale right away.
+    """
+    caches[INDEX_CACHE_ALIAS].set(_context_key(user_id), (generation, context), timeout=settings.INDEX_CACHE_TIMEOUT)
+
+
+def invalidate(user_id: int) -> None:
+    caches[INDEX_CACHE_ALIAS].set(_generation_key(user_id), uuid.uuid4().hex, timeout=None)
@@ -0,0 +1,145 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from sync_youtube import index_cache, metrics
+from sync_youtube.api.youtube import DummyRequest, YoutubeAPI
+from sync_youtube.locks import user_lock
+from sync_youtube.models.job import SyncJob
+
+logger = logging.getLogger("app")
+
+ACTIVE_JOB_STATUSES = [SyncJob.Status.QUEUED, SyncJob.Status.RUNNING]
+
+JOB_STAGES: Dict[str, List[Tuple[str, Callable[[DummyRequest], Any]]]] = {
+    SyncJob.Kind.FETCH_SONGS: [
+        ("Extracting liked musics", YoutubeAPI.extract_liked_musics),
+        ("Splitting songs into playlists", YoutubeAPI.make_playlists_split),
+    ],
+    SyncJob.Kind.PUBLISH_SONGS: [
+        ("Publishing songs", YoutubeAPI.publish),
+    ],
+}
+
+
+def _queue_depth() -> Dict[Tuple[str, ...], float]:
+    depth = {(status,): 0.0 for status in ACTIVE_JOB_STATUSES}
+    for status, count in SyncJob.objects.filter(
+        status__in=ACTIVE_JOB_STATUSES,
+    ).values_list("status").annotate(count=Count("id")).order_by():
+        depth[(status,)] = count
+    return depth
+
+
+queue_depth = metrics.Gauge(
+    "sync_job_queue_depth",
+    "Sync jobs waiting for or being run by a worker",
+    _queue_depth,
+    labelnames=("status",),
+)
+
+
+def _stale_before() -> datetime:
+    return timezone.now() - timedelta(seconds=settings.SYNC_JOB_TIMEOUT)
+
+
+def active_jobs() -> Q:
+    """
+    Filter of the queued jobs and of the running ones started less than SYNC_JOB_TIMEOUT ago, older running jobs
+    having lost their worker.
+    """
+    return Q(status=SyncJob.Status.QUEUED) | Q(status=SyncJob.Status.RUNNING, started__gte=_stale_before())
+
+
+def fail_stale_jobs() -> int:
+    """
+    Flag as failed the jobs running for longer than SYNC_JOB_TIMEOUT, whose worker was killed before it could.
+    """
+    stale_jobs = SyncJob.objects.filter(status=SyncJob.Status.RUNNING, started__lt=_stale_before())
+    user_ids = set(stale_jobs.values_list("user_id", flat=True))
+    failed = stale_jobs.update(
+        status=SyncJob.Status.FAILED,
+        error=f"Timed out, not finished after {settings.SYNC_JOB_TIMEOUT}s",
+        progress="",
+        finished=timezone.now(),
+    )
+    for user_id in user_ids:
+        logger.warning("Failed stale sync jobs of user %s", user_id)
+        index_cache.invalidate(user_id)
+    return failed
+
+
+def enqueue(user: User, kind: str) -> SyncJob:
+    """
+    Queue a job of `kind` for `user`, unless one is already queued or running.
+    """
+    with transaction.atomic():
+        # Serialises concurrent requests of the user (double clicks): with no active job, there is no job row to lock
+        User.objects.select_for_update().get(pk=user.pk)
+        active_job = SyncJob.objects.filter(
+            active_jobs(),
+            user=user,
+            kind=kind,
+        ).first()
+        if active_job is not None:
+            return active_job
+        job = SyncJob.objects.create(user=user, kind=kind)
+    index_cache.invalidate(user.id)
+    return job
+
+
+def claim_next_job() -> Optional[SyncJob]:
+    """
+    Mark the oldest queued job as running and return it. Rows locked by other workers are skipped, so that
+    concurrent workers never claim the same job.
+    """
+    fail_stale_jobs()
+    with transaction.atomic():
+        job = SyncJob.objects.select_for_update(skip_locked=True).filter(
+            status=SyncJob.Status.QUEUED,
+        ).order_by("created").first()
+        if job is None:
+            return None
+
+        job.status = SyncJob.Status.RUNNING
+        job.started = timezone.now()
+        job.save(update_fields=["status", "started"])
+    index_cache.invalidate(job.user_id)
+    return job
+
+
+def run_job(job: SyncJob) -> None:
+    """
+    Run the stages of `job`, which always ends up finished: even when interrupted (SIGTERM, Ctrl+C), it is flagged
+    as failed before the interruption goes on. It fails right away if its user is locked by another run.
+    """
+    context = DummyRequest(user=job.user)
+    job.status = SyncJob.Status.FAILED
+    try:
+        with user_lock(job.user_id) as acquired:
+            if not acquired:
+                logger.info("Sync job %s skipped, user %s is processed by another run", job.id, job.user.email)
+                job.error = "Already being synchronised by another run, try again later"
+            else:
+                for progress, stage in JOB_STAGES[job.kind]:
+                    SyncJob.objects.filter(id=job.id).update(progress=progress)
+                    stage(context)
+                job.status = SyncJob.Status.SUCCEEDED
+    except Exception as error:
+        logger.exception("Sync job %s failed for user %s", job.id, job.user.email, exc_info=True)
+        job.error = repr(error)
+    except BaseException as error:
+        logger.warning("Sync job %s interrupted for user %s", job.id, job.user.email)
+        job.error = f"Interrupted: {error!r}"
+        raise
+    finally:
+        job.progress = ""
+        job.finished = timezone.now()
+        job.save(update_fields=["status", "error", "progress", "finished"])
+        index_cache.invalidate(job.user_id)
+        metrics.flush()
@@ -0,0 +1,49 @@
+"""
+Song change journal driving incremental publishing.
+
+Whatever changes what should be on YouTube - fetched, unliked, split or toggled songs - appends a SongChange. The
+publisher reads the pending changes of a user, looks the changed songs up and applies their current state, so that
+its cost follows the amount of changes rather than the size of the library. Songs it could not publish are appended
+again, for the next run to retry them.
+
+Read changes are deleted by id once published, rather than up to the highest id read: ids are handed out when rows
+are inserted, not when they are committed, so a change committed late may have a lower id than one already read.
+"""
+import uuid
+from typing import Collection, Iterable, Set, Tuple
+from sync_youtube.models.journal import SongChange
+
+# Amount of change ids deleted per query, within the bound parameters limits of every database
+ACKNOWLEDGE_CHUNK_SIZE = 900
+
+
+def record(user_id: int, song_ids: Iterable[uuid.UUID], kind: str) -> None:
+    SongChange.objects.bulk_create(
+        (SongChange(user_id=user_id, song_id=song_id, kind=kind) for song_id in song_ids),
+        batch_size=1000,
+    )
+
+
+def read(user_id: int) -> Tuple[Set[uuid.UUID], Set[int]]:
+    """
+    Ids of the songs changed for `user_id`, and the ids of the changes to `acknowledge` once they are published.
+    """
+    song_ids: Set[uuid.UUID] = set()
+    change_ids: Set[int] = set()
+    for change_id, song_id in SongChange.objects.filter(user_id=user_id).values_list("id", "song_id"):
+        song_ids.add(song_id)
+        change_ids.add(change_id)
+    return song_ids, change_ids
+
+
+def acknowledge(change_ids: Collection[int]) -> None:
+    """
+    Drop the published changes `change_ids`, leaving those recorded since they were read for the next run.
+    """
+    change_ids = sorted(change_ids)
+    for start in range(0, len(change_ids), ACKNOWLEDGE_CHUNK_SIZE):
+        SongChange.objects.filter(id__in=change_ids[start:start + ACKNOWLEDGE_CHUNK_SIZE]).delete()
+
+
+def has_unread(user_id: int) -> bool:
+    return SongChange.objects.filter(user_id=user_id).exists()
@@ -0,0 +1,33 @@
+"""
+Per-user locks, held by whatever runs the sync stages of a user - management commands on any node as well as job
+workers - so that a user is never processed twice at once.
+"""
+from contextlib import contextmanager
+from typing import Iterator
+from django.db import connection
+
+# First key of the advisory locks taken on users, the second one being the user id
+USER_LOCK_NAMESPACE = 7_362_811
+
+
+@contextmanager
+def user_lock(user_id: int) -> Iterator[bool]:
+    """
+    Try to take the session advisory lock of `user_id` for the duration of the block, yielding whether it was.
+
+    Other runs hold it while processing the same user. Other databases being single node, the lock is always
+    considered taken there.
+    """
+    if connection.vendor != "postgresql":
+        yield True
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", [USER_LOCK_NAMESPACE, user_id])
+        acquired = cursor.fetchone()[0]
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s, %s)", [USER_LOCK_NAMESPACE, user_id])
@@ -0,0 +1,66 @@
+import json
+import platform
+import subprocess
+from typing import Optional
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from sync_youtube.benchmark import run_benchmark
+
+
+def _current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = "Benchmark the fetch/split/publish pipeline on synthetic users, against a fake YouTube API"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="1000,10000,50000",
+            help="Comma separated amounts of liked videos, one synthetic user per amount",
+        )
+        parser.add_argument(
+            "--music-ratio",
+            type=float,
+            default=0.9,
+            help="Share of the liked videos being musics",
+        )
+        parser.add_argument(
+            "--no-memory",
+            action="store_true",
+            help="Skip peak memory tracing, which slows the stages down",
+        )
+        parser.add_argument(
+            "--output",
+            help="File to write the JSON results to, instead of the standard output",
+        )
+
+    def handle(self, *args, **options):
+        results = {
+            "commit": _current_commit(),
+            "python": platform.python_version(),
+            "database": connection.vendor,
+            "started": timezone.now().isoformat(),
+            "runs": [
+                run_benchmark(int(size), options["music_ratio"], trace_memory=not options["no_memory"])
+                for size in options["sizes"].split(",")
+            ],
+        }
+
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as output_file:
+                output_file.write(output)
+        else:
+            self.stdout.write(output)
@@ -1,25 +1,42 @@
 import logging
 from django.core.management.base import BaseCommand
 
-from sync_youtube.models.playlist import LocalPlaylist
 from sync_youtube.api.youtube import YoutubeAPI, DummyRequest
+from sync_youtube.management.runner import format_summary, parse_shard, playlists_to_update, run_for_users
 
 logger = logging.getLogger("app")
 
 
+def fetch_user_songs(context: DummyRequest) -> None:
+    try:
+        YoutubeAPI.extract_liked_musics(context=context)
+    finally:
+        YoutubeAPI.make_playlists_split(context=context)
+
+
 class Command(BaseCommand):
     help = "Fetch youtube songs for all users that have opted in"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Amount of users processed concurrently",
+        )
+        parser.add_argument(
+            "--shard",
+            help="INDEX/COUNT, only process the users of this shard out of COUNT, such as 0/4 on the first of 4 nodes",
+        )
+
     def handle(self, *args, **options):
-        playlists_to_update = LocalPlaylist.objects.filter(should_update=True)
-        for local_playlist in playlists_to_update:
-            try:
-                context = DummyRequest(user=local_playlist.user)
-                YoutubeAPI.extract_liked_musics(context=context)
-            except Exception:
-                logger.exception(
-                    "Failed to extract liked musics for user %s",
-                    local_playlist.user.email,
-                    exc_info=True
-                )
-            YoutubeAPI.make_playlists_split(context=context)
+        shard = parse_shard(options["shard"]) if options["shard"] else None
+        results = run_for_users(
+            playlists_to_update(shard),
+            fetch_user_songs,
+            description="extract liked musics",
+            workers=options["workers"],
+        )
+        summary = format_summary(results)
+        logger.info(summary)
+        self.stdout.write(summary)
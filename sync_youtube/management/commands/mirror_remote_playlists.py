@@ -0,0 +1,44 @@
+import logging
+from django.core.management.base import BaseCommand
+
+from sync_youtube.api.youtube import YoutubeAPI, DummyRequest
+from sync_youtube.management.runner import format_summary, parse_shard, playlists_to_update, run_for_users
+
+logger = logging.getLogger("app")
+
+
+class Command(BaseCommand):
+    help = "Reconcile synced songs with the items actually in their remote playlist"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="List the items of every remote playlist, instead of those whose ETag and item count changed",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Amount of users processed concurrently",
+        )
+        parser.add_argument(
+            "--shard",
+            help="INDEX/COUNT, only process the users of this shard out of COUNT, such as 0/4 on the first of 4 nodes",
+        )
+
+    def handle(self, *args, **options):
+        shard = parse_shard(options["shard"]) if options["shard"] else None
+
+        def mirror_user_playlists(context: DummyRequest) -> None:
+            YoutubeAPI.mirror_remote_playlists(context, full=options["full"])
+
+        results = run_for_users(
+            playlists_to_update(shard),
+            mirror_user_playlists,
+            description="mirror remote playlists",
+            workers=options["workers"],
+        )
+        summary = format_summary(results)
+        logger.info(summary)
+        self.stdout.write(summary)
@@ -0,0 +1,76 @@
+import logging
+from typing import Tuple
+from django.core.management.base import BaseCommand, CommandError
+
+from sync_youtube.fake_youtube import FakeYoutube, make_liked_videos, make_server
+
+logger = logging.getLogger("app")
+
+
+def _parse_error_rate(value: str) -> Tuple[int, float]:
+    try:
+        status, rate = value.split("=")
+        return int(status), float(rate)
+    except ValueError:
+        raise CommandError(f"Invalid error rate {value!r}, expected STATUS=RATE such as 429=0.05")
+
+
+class Command(BaseCommand):
+    help = "Serve a fake YouTube Data API account, for YOUTUBE_API_ROOT_URL to point at"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--liked-videos",
+            type=int,
+            default=1000,
+            help="Amount of videos liked by the fake account",
+        )
+        parser.add_argument(
+            "--music-ratio",
+            type=float,
+            default=0.9,
+            help="Share of the liked videos being musics",
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0,
+            help="Seconds every API call waits before being answered",
+        )
+        parser.add_argument(
+            "--error-rate",
+            action="append",
+            default=[],
+            help="STATUS=RATE, share of API calls failing with STATUS (403, 429, 500...), may be repeated",
+        )
+        parser.add_argument(
+            "--quota-units-per-day",
+            type=int,
+            help="Quota units after which API calls are denied with quotaExceeded, unlimited by default",
+        )
+        parser.add_argument("--seed", type=int, help="Seed of the error injection")
+
+    def handle(self, *args, **options):
+        youtube = FakeYoutube(
+            make_liked_videos(options["liked_videos"], options["music_ratio"]),
+            latency=options["latency"],
+            error_rates=dict(_parse_error_rate(value) for value in options["error_rate"]),
+            quota_units_per_day=options["quota_units_per_day"],
+            seed=options["seed"],
+        )
+        server = make_server(youtube, options["host"], options["port"])
+        self.stdout.write(
+            "Serving a fake YouTube Data API on http://{}:{}/, set YOUTUBE_API_ROOT_URL to it".format(
+                *server.server_address
+            )
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            summary = ", ".join(f"{method}: {count}" for method, count in sorted(youtube.calls.items()))
+            logger.info("Fake YouTube answered %s (%s quota units)", summary, youtube.quota_units_spent)
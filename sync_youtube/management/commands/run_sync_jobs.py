@@ -0,0 +1,47 @@
+import logging
+import signal
+import sys
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from sync_youtube.jobs import claim_next_job, run_job
+
+logger = logging.getLogger("app")
+
+
+def _exit_on_sigterm(signum, frame):
+    # Raised in the running job, which is then flagged as failed instead of being left running
+    sys.exit(128 + signum)
+
+
+class Command(BaseCommand):
+    help = "Run queued fetch and publish jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of waiting for new jobs",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2,
+            help="Seconds to wait before checking an empty queue again",
+        )
+
+    def handle(self, *args, **options):
+        signal.signal(signal.SIGTERM, _exit_on_sigterm)
+        while True:
+            close_old_connections()
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+
+            logger.info("Running sync job %s (%s) for user %s", job.id, job.kind, job.user.email)
+            run_job(job)
+            logger.info("Sync job %s finished: %s", job.id, job.status)
@@ -1,8 +1,10 @@
 import logging
+from typing import Optional
 from django.core.management.base import BaseCommand
 
-from sync_youtube.models.playlist import LocalPlaylist
-from sync_youtube.api.youtube import YoutubeAPI, DummyRequest
+from sync_youtube.api import quota
+from sync_youtube.api.youtube import DummyRequest, YoutubeAPI
+from sync_youtube.management.runner import Shard, format_summary, parse_shard, playlists_to_update, run_for_users
 
 logger = logging.getLogger("app")
 
@@ -10,16 +12,50 @@ logger = logging.getLogger("app")
 class Command(BaseCommand):
     help = "Update remote playlist"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Amount of users processed concurrently",
+        )
+        parser.add_argument(
+            "--shard",
+            help="INDEX/COUNT, only process the users of this shard out of COUNT, such as 0/4 on the first of 4 nodes",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the planned operations of every user and their quota cost, without calling YouTube",
+        )
+
+    def report_plans(self, shard: Optional[Shard]) -> str:
+        lines = []
+        total_cost = 0
+        for local_playlist in playlists_to_update(shard, pending_work_only=True):
+            plan = YoutubeAPI.plan_sync(DummyRequest(user=local_playlist.user))
+            total_cost += plan.cost
+            lines.append(f"{local_playlist.user.email}: {plan.describe()}")
+
+        remaining_units = quota.remaining_units()
+        lines.append(
+            f"Planned {len(lines)} users, total {total_cost} units"
+            + (f", {remaining_units} units left today" if remaining_units is not None else "")
+        )
+        return "\n".join(lines)
+
     def handle(self, *args, **options):
-        playlists_to_update = LocalPlaylist.objects.filter(should_update=True)
-        for local_playlist in playlists_to_update:
-            context = DummyRequest(user=local_playlist.user)
-            try:
-                YoutubeAPI.sync_remote_playlists(context=context)
-                YoutubeAPI.sync_remote_playlists_content(context=context)
-            except Exception:
-                logger.exception(
-                    "Failed synching remote content for user %s",
-                    local_playlist.user.email,
-                    exc_info=True
-                )
+        shard = parse_shard(options["shard"]) if options["shard"] else None
+        if options["dry_run"]:
+            self.stdout.write(self.report_plans(shard))
+            return
+
+        results = run_for_users(
+            playlists_to_update(shard, pending_work_only=True),
+            YoutubeAPI.publish,
+            description="sync remote content",
+            workers=options["workers"],
+        )
+        summary = format_summary(results)
+        logger.info(summary)
+        self.stdout.write(summary)
@@ -0,0 +1,137 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional
+from django.core.management.base import CommandError
+from django.db import close_old_connections, connections
+from django.db.models.functions import Mod
+
+from sync_youtube import metrics
+from sync_youtube.locks import user_lock
+from sync_youtube.models.playlist import LocalPlaylist
+from sync_youtube.api.youtube import DummyRequest
+
+logger = logging.getLogger("app")
+
+
+class Shard(NamedTuple):
+    number: int
+    total: int
+
+
+class UserRunResult(NamedTuple):
+    user_email: str
+    duration: float
+    succeeded: bool
+    error: Optional[str] = None
+    skipped: bool = False
+
+
+def parse_shard(value: str) -> Shard:
+    try:
+        number, total = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise CommandError(f"Invalid shard {value!r}, expected INDEX/COUNT such as 0/4")
+    if not 0 <= number < total:
+        raise CommandError(f"Invalid shard {value!r}, INDEX must be between 0 and COUNT - 1")
+    return Shard(number, total)
+
+
+def playlists_to_update(shard: Optional[Shard] = None, pending_work_only: bool = False) -> Iterator[LocalPlaylist]:
+    """
+    Playlists of the users having opted in, restricted to those of `shard` when several nodes share the users and
+    to those with something to publish if `pending_work_only`, streamed through a server-side cursor with their user.
+    """
+    local_playlists = LocalPlaylist.objects.filter(should_update=True).select_related("user")
+    if pending_work_only:
+        local_playlists = local_playlists.filter(has_pending_work=True)
+    if shard is not None:
+        local_playlists = local_playlists.annotate(
+            shard=Mod("user_id", shard.total),
+        ).filter(shard=shard.number)
+    return local_playlists.order_by("user_id").iterator()
+
+
+def _run_for_user(
+    local_playlist: LocalPlaylist,
+    task: Callable[[DummyRequest], None],
+    description: str,
+) -> UserRunResult:
+    with user_lock(local_playlist.user_id) as acquired:
+        if not acquired:
+            logger.info("Skipping user %s, already processed by another run", local_playlist.user.email)
+            return UserRunResult(local_playlist.user.email, 0, True, skipped=True)
+
+        started = time.monotonic()
+        try:
+            task(DummyRequest(user=local_playlist.user))
+        except Exception as error:
+            logger.exception(
+                "Failed to %s for user %s",
+                description,
+                local_playlist.user.email,
+                exc_info=True
+            )
+            return UserRunResult(local_playlist.user.email, time.monotonic() - started, False, repr(error))
+
+        return UserRunResult(local_playlist.user.email, time.monotonic() - started, True)
+
+
+def _run_in_worker(
+    local_playlist: LocalPlaylist,
+    task: Callable[[DummyRequest], None],
+    description: str,
+) -> UserRunResult:
+    # Worker threads each get their own database connections, which Django only closes for request threads.
+    close_old_connections()
+    try:
+        return _run_for_user(local_playlist, task, description)
+    finally:
+        connections.close_all()
+
+
+def run_for_users(
+    local_playlists: Iterable[LocalPlaylist],
+    task: Callable[[DummyRequest], None],
+    description: str,
+    workers: int = 1,
+) -> List[UserRunResult]:
+    """
+    Run `task` once per playlist owner, either sequentially or spread over a pool of `workers` threads.
+
+    A failing user is logged and reported in the results without interrupting the other users, a user locked by
+    another run is skipped.
+    """
+    try:
+        if workers <= 1:
+            return [_run_for_user(local_playlist, task, description) for local_playlist in local_playlists]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_run_in_worker, local_playlist, task, description)
+                for local_playlist in local_playlists
+            ]
+            return [future.result() for future in futures]
+    finally:
+        metrics.flush()
+
+
+def _format_result(result: UserRunResult) -> str:
+    if result.skipped:
+        return f"{result.user_email}: SKIPPED, locked by another run"
+    return (
+        f"{result.user_email}: {'OK' if result.succeeded else 'FAILED'} in {result.duration:.2f}s"
+        + (f" ({result.error})" if result.error else "")
+    )
+
+
+def format_summary(results: List[UserRunResult]) -> str:
+    lines = [_format_result(result) for result in results]
+    failures = sum(1 for result in results if not result.succeeded)
+    skipped = sum(1 for result in results if result.skipped)
+    total_duration = sum(result.duration for result in results)
+    lines.append(
+        f"Processed {len(results)} users ({failures} failed), {skipped} skipped, "
+        f"cumulated user time {total_duration:.2f}s"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,382 @@
+"""
+In-process metrics, rendered in the Prometheus text exposition format by the /metrics view.
+
+Processes other than the web server (sync commands, job workers) dump their metrics as JSON files in
+METRICS_DIRECTORY, which /metrics merges with its own when that setting is configured. Exiting processes fold
+their dump into a single one, so that counters keep growing across runs and the directory does not.
+"""
+import atexit
+import fcntl
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from django.conf import settings
+from django.db import connection
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+DURATION_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600)
+QUERY_COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 10000)
+# Name of the dump accumulating the metrics of the exited processes
+FINISHED_PROCESSES = "finished"
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, Any] = {}
+        self._lock = threading.Lock()
+        REGISTRY[name] = self
+
+    def _label_values(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels[labelname]) for labelname in self.labelnames)
+
+    def _labels(self, label_values: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, label_values))
+
+    def snapshot(self) -> Dict[LabelValues, Any]:
+        with self._lock:
+            return {key: json.loads(json.dumps(value)) for key, value in self._values.items()}
+
+    def merge(self, values: Dict[LabelValues, Any], other_values: Dict[LabelValues, Any]) -> None:
+        raise NotImplementedError
+
+    def samples(self, values: Dict[LabelValues, Any]) -> Iterator[Sample]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """
+    Monotonic counter, optionally split by label values.
+    """
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._label_values(labels), 0)
+
+    def merge(self, values: Dict[LabelValues, Any], other_values: Dict[LabelValues, Any]) -> None:
+        for key, value in other_values.items():
+            values[key] = values.get(key, 0) + value
+
+    def samples(self, values: Dict[LabelValues, Any]) -> Iterator[Sample]:
+        for key, value in values.items():
+            yield self.name, self._labels(key), value
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values over fixed buckets, optionally split by label values.
+    """
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            # Per bucket counts (not cumulative), then the +Inf bucket, the sum and the count of observations
+            state = self._values.setdefault(key, [0] * (len(self.buckets) + 3))
+            index = next((index for index, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, **labels: Any) -> int:
+        return self._values.get(self._label_values(labels), [0])[-1]
+
+    def merge(self, values: Dict[LabelValues, Any], other_values: Dict[LabelValues, Any]) -> None:
+        for key, other_state in other_values.items():
+            state = values.setdefault(key, [0] * len(other_state))
+            values[key] = [value + other_value for value, other_value in zip(state, other_state)]
+
+    def samples(self, values: Dict[LabelValues, Any]) -> Iterator[Sample]:
+        for key, state in values.items():
+            labels = self._labels(key)
+            cumulated = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), state):
+                cumulated += bucket_count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulated
+            yield f"{self.name}_sum", labels, state[-2]
+            yield f"{self.name}_count", labels, state[-1]
+
+
+class Gauge(Metric):
+    """
+    Value computed when metrics are rendered, `function` returning it for each set of label values.
+    """
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        function: Callable[[], Dict[LabelValues, float]],
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def snapshot(self) -> Dict[LabelValues, Any]:
+        return dict(self.function())
+
+    def merge(self, values: Dict[LabelValues, Any], other_values: Dict[LabelValues, Any]) -> None:
+        # Gauges describe the shared state at render time: other processes have nothing to add
+        pass
+
+    def samples(self, values: Dict[LabelValues, Any]) -> Iterator[Sample]:
+        for key, value in values.items():
+            yield self.name, self._labels(key), value
+
+
+REGISTRY: Dict[str, Metric] = {}
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        '{}="{}"'.format(name, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _dump_path(process: str) -> Optional[str]:
+    if not settings.METRICS_DIRECTORY:
+        return None
+    return os.path.join(settings.METRICS_DIRECTORY, f"metrics-{process}.json")
+
+
+def _process_name() -> str:
+    # Containers sharing METRICS_DIRECTORY have their own pids, their host names tell them apart
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+@contextmanager
+def _locked_directory(operation: int) -> Iterator[None]:
+    """
+    Hold the lock of METRICS_DIRECTORY, shared to read the dumps and exclusive to fold them, so that a folded dump
+    is never missed nor counted twice.
+    """
+    os.makedirs(settings.METRICS_DIRECTORY, exist_ok=True)
+    with open(os.path.join(settings.METRICS_DIRECTORY, "metrics.lock"), "a") as lock_file:
+        fcntl.flock(lock_file, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_dump(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as dump_file:
+            return json.load(dump_file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_dump(path: str, dump: Dict[str, Any]) -> None:
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w") as dump_file:
+        json.dump(dump, dump_file)
+    os.replace(temporary_path, path)
+
+
+def _fold(path: str) -> None:
+    """
+    Add the dump at `path` to the one of the finished processes, then delete it. The directory must be locked.
+    """
+    dump = _read_dump(path)
+    if dump is not None:
+        finished_path = _dump_path(FINISHED_PROCESSES)
+        finished_dump = _read_dump(finished_path) or {}
+        for name, metric in REGISTRY.items():
+            if isinstance(metric, Gauge):
+                continue
+            values = {tuple(key): value for key, value in finished_dump.get(name, [])}
+            metric.merge(values, {tuple(key): value for key, value in dump.get(name, [])})
+            finished_dump[name] = [[list(key), value] for key, value in values.items()]
+        _write_dump(finished_path, finished_dump)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+# Pid of the process once it dumped its metrics, and whether it folded them for good
+_flushed_pid: Optional[int] = None
+_finished = False
+
+
+def flush() -> None:
+    """
+    Dump this process's metrics for /metrics to pick them up. Does nothing unless METRICS_DIRECTORY is set.
+
+    The dump is folded into the one of the finished processes when the process exits, so that the directory holds
+    a dump per running process only.
+    """
+    global _flushed_pid
+    path = _dump_path(_process_name())
+    if path is None or _finished:
+        return
+
+    dump = {
+        name: [[list(key), value] for key, value in metric.snapshot().items()]
+        for name, metric in REGISTRY.items()
+        if not isinstance(metric, Gauge)
+    }
+    with _locked_directory(fcntl.LOCK_EX):
+        if _flushed_pid != os.getpid():
+            # Left by a killed process whose pid was reused: its values are kept rather than overwritten
+            _fold(path)
+            _flushed_pid = os.getpid()
+            atexit.register(finish)
+        _write_dump(path, dump)
+
+
+def finish() -> None:
+    """
+    Fold this process's metrics into the dump of the finished processes, for an exiting process. Later metrics
+    are not dumped anymore.
+    """
+    global _finished
+    path = _dump_path(_process_name())
+    if path is None or _flushed_pid != os.getpid() or _finished:
+        return
+
+    flush()
+    with _locked_directory(fcntl.LOCK_EX):
+        _fold(path)
+    _finished = True
+
+
+def _other_processes_values() -> List[Dict[str, Any]]:
+    own_path = _dump_path(_process_name())
+    if own_path is None:
+        return []
+
+    dumps: List[Dict[str, Any]] = []
+    with _locked_directory(fcntl.LOCK_SH):
+        for filename in os.listdir(settings.METRICS_DIRECTORY):
+            path = os.path.join(settings.METRICS_DIRECTORY, filename)
+            if path == own_path or not filename.endswith(".json"):
+                continue
+            dump = _read_dump(path)
+            if dump is not None:
+                dumps.append(dump)
+    return dumps
+
+
+def render() -> str:
+    other_processes_values = _other_processes_values()
+    lines: List[str] = []
+    for name, metric in REGISTRY.items():
+        values = metric.snapshot()
+        for dump in other_processes_values:
+            metric.merge(values, {tuple(key): value for key, value in dump.get(name, [])})
+
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.type}")
+        for sample_name, labels, value in metric.samples(values):
+            lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """
+    Record the duration and the amount of database queries of a pipeline stage run in the current thread.
+    """
+    queries = 0
+
+    def count_query(execute: Callable[..., Any], sql: str, params: Any, many: bool, context: Dict[str, Any]) -> Any:
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    started = time.monotonic()
+    try:
+        with connection.execute_wrapper(count_query):
+            yield
+    finally:
+        sync_stage_duration.observe(time.monotonic() - started, stage=stage)
+        sync_stage_db_queries.observe(queries, stage=stage)
+
+
+def tracked_stage(stage: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with track_stage(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+youtube_api_retries = Counter(
+    "youtube_api_retries_total",
+    "YouTube Data API requests retried after a transient error",
+    labelnames=("method",),
+)
+youtube_api_give_ups = Counter(
+    "youtube_api_give_ups_total",
+    "YouTube Data API requests abandoned after exhausting their retries",
+    labelnames=("method",),
+)
+youtube_api_request_duration = Histogram(
+    "youtube_api_request_duration_seconds",
+    "Duration of YouTube Data API HTTP requests, batches being reported as the 'batch' method",
+    labelnames=("method",),
+)
+youtube_api_quota_units = Counter(
+    "youtube_api_quota_units_total",
+    "YouTube Data API quota units spent",
+    labelnames=("method",),
+)
+sync_songs = Counter(
+    "sync_songs_total",
+    "Songs handled by the sync pipeline, by operation",
+    labelnames=("operation",),
+)
+sync_stage_duration = Histogram(
+    "sync_stage_duration_seconds",
+    "Duration of a sync pipeline stage for one user",
+    labelnames=("stage",),
+    buckets=DURATION_BUCKETS,
+)
+sync_stage_db_queries = Histogram(
+    "sync_stage_db_queries",
+    "Database queries issued by a sync pipeline stage for one user",
+    labelnames=("stage",),
+    buckets=QUERY_COUNT_BUCKETS,
+)
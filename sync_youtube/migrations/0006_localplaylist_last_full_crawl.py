@@ -0,0 +1,18 @@
+# Generated by Django 3.2.18 on 2026-10-17 23:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync_youtube', '0005_youtubesong_should_not_be_published'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='localplaylist',
+            name='last_full_crawl',
+            field=models.DateTimeField(default=None, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.18 on 2026-10-17 23:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync_youtube', '0006_localplaylist_last_full_crawl'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuotaUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('units_spent', models.PositiveIntegerField(default=0)),
+                ('tokens', models.FloatField()),
+                ('refilled_at', models.DateTimeField()),
+            ],
+        ),
+    ]
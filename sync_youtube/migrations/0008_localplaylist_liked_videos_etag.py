@@ -0,0 +1,18 @@
+# Generated by Django 3.2.18 on 2026-10-17 23:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync_youtube', '0007_quotausage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='localplaylist',
+            name='liked_videos_etag',
+            field=models.CharField(default=None, max_length=255, null=True),
+        ),
+    ]
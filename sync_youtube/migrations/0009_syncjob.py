@@ -0,0 +1,35 @@
+# Generated by Django 3.2.18 on 2026-10-17 23:39
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('sync_youtube', '0008_localplaylist_liked_videos_etag'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('fetch_songs', 'Récupération des musiques'), ('publish_songs', 'Publication des musiques')], max_length=32)),
+                ('status', models.CharField(choices=[('queued', 'En attente'), ('running', 'En cours'), ('succeeded', 'Terminée'), ('failed', 'Échouée')], default='queued', max_length=32)),
+                ('progress', models.CharField(default='', max_length=255)),
+                ('error', models.TextField(default='')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('started', models.DateTimeField(default=None, null=True)),
+                ('finished', models.DateTimeField(default=None, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='syncjob',
+            index=models.Index(fields=['status', 'created'], name='syncjob_status_created_idx'),
+        ),
+    ]
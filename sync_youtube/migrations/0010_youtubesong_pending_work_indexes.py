@@ -0,0 +1,29 @@
+# Generated by Django 3.2.18 on 2026-10-17 23:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync_youtube', '0009_syncjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='youtubesong',
+            index=models.Index(condition=models.Q(('is_synched', False), ('should_not_be_published', False), ('should_not_exist', False)), fields=['remote_playlist'], name='ytsong_pending_add_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='youtubesong',
+            index=models.Index(condition=models.Q(('is_synched', True), ('should_not_exist', True)), fields=['remote_playlist'], name='ytsong_pending_remove_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='youtubesong',
+            index=models.Index(condition=models.Q(('is_synched', True), ('should_not_be_published', True)), fields=['remote_playlist'], name='ytsong_pending_unpublish_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='youtubesong',
+            index=models.Index(condition=models.Q(('should_not_exist', False)), fields=['local_playlist', 'should_not_be_published', 'is_synched', 'title'], name='ytsong_listed_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.18 on 2026-10-17 23:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync_youtube', '0010_youtubesong_pending_work_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='youtubesong',
+            name='ytsong_listed_idx',
+        ),
+        migrations.AddIndex(
+            model_name='youtubesong',
+            index=models.Index(condition=models.Q(('should_not_exist', False)), fields=['local_playlist', 'should_not_be_published', 'is_synched', 'title', 'id'], name='ytsong_listed_idx'),
+        ),
+    ]
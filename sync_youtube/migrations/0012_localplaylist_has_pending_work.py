@@ -0,0 +1,18 @@
+# Generated by Django 3.2.18 on 2026-10-17 23:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync_youtube', '0011_youtubesong_listed_idx_keyset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='localplaylist',
+            name='has_pending_work',
+            field=models.BooleanField(default=True),
+        ),
+    ]
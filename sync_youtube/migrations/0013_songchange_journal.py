@@ -0,0 +1,63 @@
+# Generated by Django 3.2.18 on 2026-10-18 00:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def journal_pending_songs(apps, schema_editor):
+    """
+    Journal the songs whose flags are waiting for publication, which the publisher used to find by scanning them.
+    """
+    YoutubeSong = apps.get_model("sync_youtube", "YoutubeSong")
+    SongChange = apps.get_model("sync_youtube", "SongChange")
+    pending_songs = [
+        ("added", models.Q(is_synched=False, should_not_exist=False, should_not_be_published=False)),
+        ("removed", models.Q(is_synched=True, should_not_exist=True)),
+        ("unpublished", models.Q(is_synched=True, should_not_exist=False, should_not_be_published=True)),
+    ]
+    for kind, condition in pending_songs:
+        songs = YoutubeSong.objects.filter(condition, remote_playlist__isnull=False).values_list("user_id", "id")
+        SongChange.objects.bulk_create(
+            (SongChange(user_id=user_id, song_id=song_id, kind=kind) for user_id, song_id in songs.iterator()),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('sync_youtube', '0012_localplaylist_has_pending_work'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SongChange',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('song_id', models.UUIDField()),
+                ('kind', models.CharField(choices=[('added', 'Ajoutée'), ('removed', 'Supprimée'), ('unpublished', 'Dépubliée'), ('republished', 'Republiée')], max_length=32)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='songchange',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='song_changes', to=settings.AUTH_USER_MODEL),
+        ),
+        # Before the indexes it relies on are removed
+        migrations.RunPython(journal_pending_songs, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='youtubesong',
+            name='ytsong_pending_add_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='youtubesong',
+            name='ytsong_pending_remove_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='youtubesong',
+            name='ytsong_pending_unpublish_idx',
+        ),
+    ]
@@ -1,2 +1,5 @@
 from .song import *
 from .playlist import *
+from .quota import *
+from .job import *
+from .journal import *
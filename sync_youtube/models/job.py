@@ -0,0 +1,35 @@
+import uuid
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class SyncJob(models.Model):
+    class Kind(models.TextChoices):
+        FETCH_SONGS = "fetch_songs", "Récupération des musiques"
+        PUBLISH_SONGS = "publish_songs", "Publication des musiques"
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "En attente"
+        RUNNING = "running", "En cours"
+        SUCCEEDED = "succeeded", "Terminée"
+        FAILED = "failed", "Échouée"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created"], name="syncjob_status_created_idx"),
+        ]
+
+    id = models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="sync_jobs")
+
+    kind = models.CharField(max_length=32, choices=Kind.choices)
+    status = models.CharField(max_length=32, choices=Status.choices, default=Status.QUEUED)
+    progress = models.CharField(max_length=255, default="")
+    error = models.TextField(default="")
+
+    created = models.DateTimeField(auto_now_add=True, editable=False)
+    started = models.DateTimeField(null=True, default=None)
+    finished = models.DateTimeField(null=True, default=None)
+
+    def __str__(self) -> str:
+        return f"{self.user.username} - {self.kind} ({self.status})"
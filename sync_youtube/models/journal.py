@@ -0,0 +1,24 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class SongChange(models.Model):
+    """
+    Journal of song state transitions waiting for the publisher, see sync_youtube.journal.
+    """
+    class Kind(models.TextChoices):
+        ADDED = "added", "Ajoutée"
+        REMOVED = "removed", "Supprimée"
+        UNPUBLISHED = "unpublished", "Dépubliée"
+        REPUBLISHED = "republished", "Republiée"
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="song_changes")
+    # Not a foreign key: removed songs are deleted once unpublished, their changes stay
+    song_id = models.UUIDField()
+
+    kind = models.CharField(max_length=32, choices=Kind.choices)
+    created = models.DateTimeField(auto_now_add=True, editable=False)
+
+    def __str__(self) -> str:
+        return f"{self.user_id} - {self.song_id} {self.kind}"
@@ -9,6 +9,11 @@ class LocalPlaylist(models.Model):
 
     should_update = models.BooleanField(default=True)
     created = models.DateTimeField(auto_now_add=True, editable=False)
+    last_full_crawl = models.DateTimeField(null=True, default=None)
+    # ETag of the first page of liked videos, as of the last crawl
+    liked_videos_etag = models.CharField(max_length=255, null=True, default=None)
+    # Whether songs or remote playlists may be waiting to be published, see sync_youtube.pending_work
+    has_pending_work = models.BooleanField(default=True)
 
 
 class RemotePlaylist(models.Model):
@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class QuotaUsage(models.Model):
+    """
+    YouTube Data API units spent on a given quota day, shared by every thread and process issuing calls.
+
+    Also holds the token bucket smoothing the units spent per second.
+    """
+    day = models.DateField(unique=True)
+    units_spent = models.PositiveIntegerField(default=0)
+
+    tokens = models.FloatField()
+    refilled_at = models.DateTimeField()
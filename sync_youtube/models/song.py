@@ -9,6 +9,15 @@ class YoutubeSong(models.Model):
         unique_together = [
             ("user_id", "third_party_id")
         ]
+        # Partial index matching the songs listed on the index page, so that their pages only visit listed rows.
+        # Publishing finds its work through the SongChange journal instead of scanning songs.
+        indexes = [
+            models.Index(
+                fields=["local_playlist", "should_not_be_published", "is_synched", "title", "id"],
+                name="ytsong_listed_idx",
+                condition=models.Q(should_not_exist=False),
+            ),
+        ]
     id = models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="songs")
 
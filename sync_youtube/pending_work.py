@@ -0,0 +1,31 @@
+"""
+Per-user flag telling whether publishing has anything to do, so that idle users are skipped without building a
+YouTube service nor looking up their songs.
+
+It is raised by whatever may leave something to publish: fetched or unliked songs, playlists split and toggled
+songs. Publishing claims it before syncing, and raises it again if anything is left once done.
+"""
+from sync_youtube import journal
+from sync_youtube.models.playlist import LocalPlaylist, RemotePlaylist
+
+
+def mark(user_id: int) -> None:
+    LocalPlaylist.objects.filter(user_id=user_id).update(has_pending_work=True)
+
+
+def claim(user_id: int) -> bool:
+    """
+    Lower the flag of `user_id`, returning whether it was raised. Changes happening from then on raise it again,
+    so that they are published by the next run if this one misses them.
+    """
+    return bool(LocalPlaylist.objects.filter(user_id=user_id, has_pending_work=True).update(has_pending_work=False))
+
+
+def remains(user_id: int) -> bool:
+    """
+    Whether `user_id` has remote playlists left to create or song changes left to publish.
+    """
+    return (
+        RemotePlaylist.objects.filter(local_playlist__user_id=user_id, is_synched=False).exists()
+        or journal.has_unread(user_id)
+    )
@@ -32,3 +32,64 @@ function handleSongClick(event) {
 Array.from(liked_songs).forEach((element) => {
     element.addEventListener("click", handleSongClick);
 })
+
+// Load further pages of songs when reaching the end of the list
+const liked_songs_url = document.getElementById("liked_songs_url");
+let next_cursor = liked_songs_url.dataset.nextCursor;
+let loading_songs = false;
+
+function loadNextSongs() {
+    if (!next_cursor || loading_songs) {
+        return;
+    }
+    loading_songs = true;
+    fetch(liked_songs_url.textContent + "?cursor=" + encodeURIComponent(next_cursor), { mode: "same-origin" })
+        .then((response) => response.json())
+        .then((page) => {
+            const container = document.querySelector(".liked-songs");
+            const known_songs = container.getElementsByClassName("filler").length;
+            container.insertAdjacentHTML("beforeend", page.html);
+            Array.from(container.getElementsByClassName("filler")).slice(known_songs).forEach((element) => {
+                element.addEventListener("click", handleSongClick);
+            });
+            next_cursor = page.next_cursor;
+        })
+        .finally(() => {
+            loading_songs = false;
+            // Observing again reports whether the end of the list is still visible, for short pages
+            liked_songs_observer.unobserve(liked_songs_end);
+            liked_songs_observer.observe(liked_songs_end);
+        });
+}
+
+const liked_songs_end = document.getElementById("liked_songs_end");
+const liked_songs_observer = new IntersectionObserver((entries) => {
+    if (entries.some((entry) => entry.isIntersecting)) {
+        loadNextSongs();
+    }
+});
+liked_songs_observer.observe(liked_songs_end);
+
+// Reload the page once every queued fetch or publish job is over
+const sync_jobs = Array.from(document.getElementsByClassName("sync-job"));
+
+function pollSyncJobs() {
+    Promise.all(
+        sync_jobs.map((element) => fetch(element.dataset.statusUrl, { mode: "same-origin" })
+            .then((response) => response.json())
+            .then((job) => {
+                element.querySelector(".sync-job-status").textContent = job.progress || job.status;
+                return job.status === "queued" || job.status === "running";
+            }))
+    ).then((active) => {
+        if (active.some((is_active) => is_active)) {
+            setTimeout(pollSyncJobs, 3000);
+        } else {
+            window.location.reload();
+        }
+    });
+}
+
+if (sync_jobs.length > 0) {
+    setTimeout(pollSyncJobs, 3000);
+}
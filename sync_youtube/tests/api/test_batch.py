@@ -0,0 +1,187 @@
+from unittest.mock import MagicMock, NonCallableMagicMock, patch
+from django.test import SimpleTestCase, override_settings
+from sync_youtube.api.batch import BatchResult, execute_batched
+from sync_youtube.api.quota import QuotaExhausted
+from sync_youtube.tests.api.test_retry import make_http_error
+from sync_youtube.tests.shared import make_new_batch_http_request_mock
+
+
+@override_settings(YOUTUBE_QUOTA_ENABLED=False)
+class ExecuteBatchedTestCase(SimpleTestCase):
+    def test_execute_batched_success(self):
+        # ------------------------- #
+        # Setting up data and mocks #
+        # ------------------------- #
+
+        failure = RuntimeError("Failed")
+        mocked_new_batch_http_request = make_new_batch_http_request_mock()
+        youtube_service = NonCallableMagicMock(
+            spec=[],
+            new_batch_http_request=mocked_new_batch_http_request,
+        )
+        responses = {
+            "a": {"id": "a_id"},
+            "b": failure,
+            "c": {"id": "c_id"},
+        }
+
+        def make_request(item: str) -> NonCallableMagicMock:
+            execute = MagicMock(spec=[])
+            if isinstance(responses[item], Exception):
+                execute.side_effect = responses[item]
+            else:
+                execute.return_value = responses[item]
+            return NonCallableMagicMock(spec=[], execute=execute)
+
+        # --------------------- #
+        # Executing tested code #
+        # --------------------- #
+
+        results = list(execute_batched(youtube_service, ["a", "b", "c"], make_request, batch_size=2))
+
+        # -------------------- #
+        # Asserting mock calls #
+        # -------------------- #
+
+        self.assertEqual(
+            2,
+            mocked_new_batch_http_request.call_count,
+            "Unexpected amount of batch requests",
+        )
+
+        # ----------- #
+        # Assert data #
+        # ----------- #
+
+        self.assertEqual(
+            [
+                BatchResult("a", {"id": "a_id"}, None),
+                BatchResult("b", None, failure),
+                BatchResult("c", {"id": "c_id"}, None),
+            ],
+            results,
+            "Unexpected batch results",
+        )
+
+    def test_execute_batched_whole_batch_error(self):
+        # ------------------------- #
+        # Setting up data and mocks #
+        # ------------------------- #
+
+        failure = RuntimeError("Network is down")
+        mocked_batch = NonCallableMagicMock(
+            spec=[],
+            add=MagicMock(spec=[]),
+            execute=MagicMock(spec=[], side_effect=failure),
+        )
+        youtube_service = NonCallableMagicMock(
+            spec=[],
+            new_batch_http_request=MagicMock(spec=[], return_value=mocked_batch),
+        )
+
+        # --------------------- #
+        # Executing tested code #
+        # --------------------- #
+
+        results = list(execute_batched(youtube_service, ["a", "b"], lambda item: item, batch_size=50))
+
+        # ----------- #
+        # Assert data #
+        # ----------- #
+
+        self.assertEqual(
+            [
+                BatchResult("a", None, failure),
+                BatchResult("b", None, failure),
+            ],
+            results,
+            "Whole batch failure was not reported on every item",
+        )
+
+    @patch("sync_youtube.api.batch.quota.acquire_for")
+    def test_execute_batched_quota_exhausted(
+        self,
+        mocked_acquire_for: MagicMock,
+    ):
+        # ------------------------- #
+        # Setting up data and mocks #
+        # ------------------------- #
+
+        mocked_acquire_for.side_effect = [None, QuotaExhausted()]
+        youtube_service = NonCallableMagicMock(
+            spec=[],
+            new_batch_http_request=make_new_batch_http_request_mock(),
+        )
+
+        def make_request(item: str) -> NonCallableMagicMock:
+            return NonCallableMagicMock(spec=[], execute=MagicMock(spec=[], return_value={"id": item}))
+
+        # --------------------- #
+        # Executing tested code #
+        # --------------------- #
+
+        results = []
+        with self.assertRaises(QuotaExhausted):
+            for result in execute_batched(youtube_service, ["a", "b", "c"], make_request):
+                results.append(result)
+
+        # ----------- #
+        # Assert data #
+        # ----------- #
+
+        self.assertEqual(
+            [BatchResult("a", {"id": "a"}, None)],
+            results,
+            "Requests acquired before the quota ran out were not sent",
+        )
+
+    @patch("sync_youtube.api.batch.time.sleep")
+    def test_execute_batched_retries_transient_errors(
+        self,
+        mocked_sleep: MagicMock,
+    ):
+        # ------------------------- #
+        # Setting up data and mocks #
+        # ------------------------- #
+
+        mocked_new_batch_http_request = make_new_batch_http_request_mock()
+        youtube_service = NonCallableMagicMock(
+            spec=[],
+            new_batch_http_request=mocked_new_batch_http_request,
+        )
+        throttled_execute = MagicMock(spec=[], side_effect=[make_http_error(429), {"id": "b"}])
+
+        def make_request(item: str) -> NonCallableMagicMock:
+            if item == "b":
+                return NonCallableMagicMock(spec=[], execute=throttled_execute)
+            return NonCallableMagicMock(spec=[], execute=MagicMock(spec=[], return_value={"id": item}))
+
+        # --------------------- #
+        # Executing tested code #
+        # --------------------- #
+
+        results = list(execute_batched(youtube_service, ["a", "b"], make_request))
+
+        # -------------------- #
+        # Asserting mock calls #
+        # -------------------- #
+
+        self.assertEqual(
+            2,
+            mocked_new_batch_http_request.call_count,
+            "Throttled request was not sent in a second batch",
+        )
+        mocked_sleep.assert_called_once()
+
+        # ----------- #
+        # Assert data #
+        # ----------- #
+
+        self.assertCountEqual(
+            [
+                BatchResult("a", {"id": "a"}, None),
+                BatchResult("b", {"id": "b"}, None),
+            ],
+            results,
+            "Unexpected batch results",
+        )
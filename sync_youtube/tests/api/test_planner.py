@@ -0,0 +1,69 @@
+from django.test import SimpleTestCase, override_settings
+from sync_youtube.api.planner import (
+    CREATE_PLAYLIST,
+    DELETE_ITEM,
+    INSERT_ITEM,
+    UNPUBLISH_ITEM,
+    SyncPlan,
+    plan_operation,
+)
+
+
+@override_settings(YOUTUBE_SYNC_PRIORITIES=[CREATE_PLAYLIST, UNPUBLISH_ITEM, DELETE_ITEM, INSERT_ITEM])
+class SyncPlanTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self.plan = SyncPlan(
+            [
+                plan_operation(INSERT_ITEM, "song_to_add"),
+                plan_operation(DELETE_ITEM, "song_to_remove"),
+                plan_operation(UNPUBLISH_ITEM, "song_to_unpublish"),
+                plan_operation(CREATE_PLAYLIST, "playlist"),
+                plan_operation(INSERT_ITEM, "other_song_to_add"),
+            ],
+            change_ids={42},
+        )
+        return super().setUp()
+
+    def test_priority_order(self):
+        self.assertEqual(
+            [
+                (CREATE_PLAYLIST, ["playlist"]),
+                (UNPUBLISH_ITEM, ["song_to_unpublish"]),
+                (DELETE_ITEM, ["song_to_remove"]),
+                (INSERT_ITEM, ["song_to_add", "other_song_to_add"]),
+            ],
+            list(self.plan.groups()),
+            "Operations were not ordered by priority",
+        )
+        self.assertEqual(
+            [INSERT_ITEM, DELETE_ITEM],
+            [operation for operation, _ in self.plan.reordered([INSERT_ITEM, DELETE_ITEM]).groups()][:2],
+            "Operations were not reordered",
+        )
+
+    def test_cost(self):
+        self.assertEqual(250, self.plan.cost, "Unexpected plan cost")
+        self.assertEqual(
+            {
+                CREATE_PLAYLIST: (1, 50),
+                UNPUBLISH_ITEM: (1, 50),
+                DELETE_ITEM: (1, 50),
+                INSERT_ITEM: (2, 100),
+            },
+            self.plan.summary(),
+            "Unexpected plan summary",
+        )
+
+    def test_within_budget(self):
+        plan = self.plan.within_budget(120)
+
+        self.assertEqual(
+            (["playlist", "song_to_unpublish"], ["song_to_remove", "song_to_add", "other_song_to_add"], {42}),
+            (
+                [planned.target for planned in plan.operations],
+                [planned.target for planned in plan.deferred],
+                plan.change_ids,
+            ),
+            "Operations over budget were not deferred, most important first",
+        )
+        self.assertIs(self.plan, self.plan.within_budget(None), "Unlimited budget changed the plan")
@@ -0,0 +1,100 @@
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from sync_youtube.api import quota
+from sync_youtube.models.quota import QuotaUsage
+
+
+@override_settings(
+    YOUTUBE_QUOTA_ENABLED=True,
+    YOUTUBE_QUOTA_UNITS_PER_DAY=120,
+    YOUTUBE_QUOTA_UNITS_PER_SECOND=10,
+    YOUTUBE_QUOTA_BURST_UNITS=60,
+)
+class QuotaTestCase(TestCase):
+    def test_request_cost(self):
+        self.assertEqual(
+            50,
+            quota.request_cost(MagicMock(methodId="youtube.playlistItems.insert")),
+            "Unexpected cost for playlistItems.insert",
+        )
+        self.assertEqual(
+            1,
+            quota.request_cost(MagicMock(methodId="youtube.videos.list")),
+            "Unexpected cost for videos.list",
+        )
+        self.assertEqual(
+            quota.YOUTUBE_DEFAULT_METHOD_COST,
+            quota.request_cost(object()),
+            "Unexpected cost for an unknown request",
+        )
+
+    @patch("sync_youtube.api.quota.time.sleep")
+    def test_acquire_waits_for_tokens(
+        self,
+        mocked_sleep: MagicMock,
+    ):
+        # ------------------------- #
+        # Setting up data and mocks #
+        # ------------------------- #
+
+        def sleep(seconds: float) -> None:
+            # Let the bucket refill as if `seconds` had elapsed
+            QuotaUsage.objects.update(refilled_at=F("refilled_at") - timedelta(seconds=seconds))
+
+        mocked_sleep.side_effect = sleep
+
+        # ------------------- #
+        # Execute tested code #
+        # ------------------- #
+
+        quota.acquire(50)
+        mocked_sleep.assert_not_called()
+
+        quota.acquire(50)
+
+        # ----------------- #
+        # Assert mock calls #
+        # ----------------- #
+
+        self.assertTrue(mocked_sleep.called, "Acquiring beyond the burst did not wait")
+        [waited], _ = mocked_sleep.call_args_list[0]
+        self.assertAlmostEqual(4, waited, places=1, msg="Unexpected wait for 40 missing units at 10 units/s")
+
+        # ----------- #
+        # Assert data #
+        # ----------- #
+
+        usage = QuotaUsage.objects.get()
+        self.assertEqual(100, usage.units_spent, "Unexpected amount of units spent")
+
+    def test_acquire_daily_budget_exhausted(self):
+        quota.acquire(60)
+        QuotaUsage.objects.update(tokens=60)
+
+        with self.assertRaises(quota.QuotaExhausted):
+            quota.acquire(61)
+
+        self.assertEqual(60, QuotaUsage.objects.get().units_spent, "Units were spent beyond the daily budget")
+
+    @patch("sync_youtube.api.quota._database_now")
+    def test_acquire_late_clock_does_not_refill(
+        self,
+        mocked__database_now: MagicMock,
+    ):
+        now = timezone.now()
+        mocked__database_now.return_value = now
+        quota.acquire(50)
+
+        # Read before the previous caller released the bucket, or from a node whose clock is behind
+        mocked__database_now.return_value = now - timedelta(seconds=10)
+        quota.acquire(10)
+
+        mocked__database_now.return_value = now + timedelta(seconds=1)
+        quota.acquire(10)
+
+        usage = QuotaUsage.objects.get()
+        self.assertAlmostEqual(0, usage.tokens, msg="Seconds elapsed before the last refill were refilled again")
+        self.assertEqual(now + timedelta(seconds=1), usage.refilled_at, "Refill time went backwards")
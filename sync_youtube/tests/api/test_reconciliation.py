@@ -0,0 +1,75 @@
+import time
+from django.test import SimpleTestCase
+from sync_youtube.api.reconciliation import LikedSongsReconciler, ReconciliationPlan, reconcile
+
+
+class ReconciliationTestCase(SimpleTestCase):
+    def test_reconcile_success(self):
+        stored_songs = {
+            "kept": False,
+            "published_and_kept": True,
+            "unliked": False,
+            "published_and_unliked": True,
+        }
+
+        plan = reconcile(["new", "kept", "published_and_kept", "new"], stored_songs)
+
+        self.assertEqual(
+            ReconciliationPlan(
+                to_create=["new"],
+                to_delete={"unliked"},
+                to_mark_for_removal={"published_and_unliked"},
+            ),
+            plan,
+            "Unexpected reconciliation plan",
+        )
+
+    def test_reconciler_incremental(self):
+        reconciler = LikedSongsReconciler({"kept": False, "unliked": True})
+
+        self.assertEqual(["first"], reconciler.add_liked(["first", "kept"]), "Unexpected songs to create")
+        self.assertEqual(["second"], reconciler.add_liked(["first", "second"]), "Unexpected songs to create")
+
+        self.assertEqual(
+            ReconciliationPlan(
+                to_create=["first", "second"],
+                to_delete=set(),
+                to_mark_for_removal=set(),
+            ),
+            reconciler.plan(detect_removals=False),
+            "Removals were detected on a partial crawl",
+        )
+
+
+class ReconciliationBenchmarkTestCase(SimpleTestCase):
+    """
+    Guards against quadratic regressions: reconciling N stored songs against N likes must stay linear.
+    """
+    # Generous bounds, roughly 20 times what a laptop needs, so that only a change of complexity trips them
+    MAX_DURATIONS = {
+        10_000: 0.2,
+        100_000: 2.0,
+    }
+
+    def test_reconcile_benchmark(self):
+        for size, max_duration in self.MAX_DURATIONS.items():
+            # Half the stored songs are still liked, half of the likes are new
+            stored_songs = {f"stored-{index}": index % 4 == 0 for index in range(size)}
+            liked_third_party_ids = [f"stored-{index}" for index in range(0, size, 2)]
+            liked_third_party_ids += [f"liked-{index}" for index in range(size // 2)]
+
+            started = time.perf_counter()
+            plan = reconcile(liked_third_party_ids, stored_songs)
+            duration = time.perf_counter() - started
+
+            self.assertEqual(size // 2, len(plan.to_create), "Unexpected amount of songs to create")
+            self.assertEqual(
+                size // 2,
+                len(plan.to_delete) + len(plan.to_mark_for_removal),
+                "Unexpected amount of songs to remove",
+            )
+            self.assertLess(
+                duration,
+                max_duration,
+                f"Reconciling {size} songs took {duration:.3f}s",
+            )
@@ -0,0 +1,95 @@
+import json
+from unittest.mock import MagicMock, NonCallableMagicMock, patch
+import httplib2
+from django.test import SimpleTestCase, override_settings
+from googleapiclient.errors import HttpError
+from sync_youtube import metrics
+from sync_youtube.api import retry
+from sync_youtube.api.execution import execute
+
+
+def make_http_error(status: int, reason: str = "") -> HttpError:
+    content = {"error": {"code": status, "errors": [{"reason": reason}]}}
+    return HttpError(httplib2.Response({"status": status}), json.dumps(content).encode())
+
+
+class RetryTestCase(SimpleTestCase):
+    def test_is_retryable(self):
+        retryable_errors = [
+            make_http_error(429),
+            make_http_error(503),
+            make_http_error(403, "rateLimitExceeded"),
+            ConnectionResetError(),
+        ]
+        for error in retryable_errors:
+            self.assertTrue(retry.is_retryable(error), f"{error!r} should be retried")
+
+        non_retryable_errors = [
+            make_http_error(400),
+            make_http_error(404),
+            make_http_error(403, "quotaExceeded"),
+            RuntimeError(),
+        ]
+        for error in non_retryable_errors:
+            self.assertFalse(retry.is_retryable(error), f"{error!r} should not be retried")
+
+    @override_settings(YOUTUBE_RETRY_BASE_DELAY=1, YOUTUBE_RETRY_MAX_DELAY=5)
+    def test_backoff_delay_is_capped(self):
+        for attempt in range(10):
+            delay = retry.backoff_delay(attempt)
+            self.assertGreaterEqual(delay, 0, "Negative backoff delay")
+            self.assertLessEqual(delay, min(5, 2 ** attempt), "Backoff delay exceeded its cap")
+
+
+@override_settings(YOUTUBE_QUOTA_ENABLED=False, YOUTUBE_RETRY_MAX_ATTEMPTS=3)
+@patch("sync_youtube.api.execution.time.sleep")
+class ExecuteTestCase(SimpleTestCase):
+    def test_execute_retries_transient_errors(
+        self,
+        mocked_sleep: MagicMock,
+    ):
+        method = "youtube.test.retried"
+        request = NonCallableMagicMock(
+            spec=[],
+            methodId=method,
+            execute=MagicMock(spec=[], side_effect=[make_http_error(503), {"id": "foo"}]),
+        )
+
+        self.assertEqual({"id": "foo"}, execute(request), "Unexpected response")
+
+        mocked_sleep.assert_called_once()
+        self.assertEqual(1, metrics.youtube_api_retries.value(method=method), "Retry was not counted")
+
+    def test_execute_gives_up(
+        self,
+        mocked_sleep: MagicMock,
+    ):
+        method = "youtube.test.given_up"
+        error = make_http_error(429)
+        request = NonCallableMagicMock(
+            spec=[],
+            methodId=method,
+            execute=MagicMock(spec=[], side_effect=error),
+        )
+
+        with self.assertRaises(HttpError):
+            execute(request)
+
+        self.assertEqual(3, request.execute.call_count, "Unexpected amount of tries")
+        self.assertEqual(2, metrics.youtube_api_retries.value(method=method), "Retries were not counted")
+        self.assertEqual(1, metrics.youtube_api_give_ups.value(method=method), "Give up was not counted")
+
+    def test_execute_does_not_retry_permanent_errors(
+        self,
+        mocked_sleep: MagicMock,
+    ):
+        request = NonCallableMagicMock(
+            spec=[],
+            execute=MagicMock(spec=[], side_effect=make_http_error(404)),
+        )
+
+        with self.assertRaises(HttpError):
+            execute(request)
+
+        request.execute.assert_called_once_with()
+        mocked_sleep.assert_not_called()
@@ -0,0 +1,66 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List
+from django.test import SimpleTestCase
+from sync_youtube.api.transport import PooledHttp
+
+
+class PooledHttpTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        client_ports: List[int] = []
+        self.client_ports = client_ports
+
+        class EchoRequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:
+                client_ports.append(self.client_address[1])
+                content = self.rfile.read(int(self.headers["content-length"]))
+                self.send_response(201)
+                self.send_header("content-type", "text/plain; charset=utf-8")
+                self.send_header("content-length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), EchoRequestHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.uri = "http://{}:{}/".format(*server.server_address)
+        return super().setUp()
+
+    def test_request_success(self):
+        http = PooledHttp(pool_size=1, idle_timeout=60, timeout=5)
+        self.addCleanup(http.close)
+
+        responses = [http.request(self.uri, "POST", body="Ève 🎵") for _ in range(2)]
+
+        self.assertEqual(
+            [(201, "text/plain; charset=utf-8", "Ève 🎵".encode())] * 2,
+            [(response.status, response["content-type"], content) for response, content in responses],
+            "Unexpected httplib2 responses",
+        )
+        self.assertEqual(1, len(set(self.client_ports)), "The connection was not reused")
+
+    def test_request_idle_connections_dropped(self):
+        http = PooledHttp(pool_size=1, idle_timeout=0, timeout=5)
+        self.addCleanup(http.close)
+
+        http.request(self.uri, "POST", body="a")
+        http.request(self.uri, "POST", body="b")
+
+        self.assertEqual(2, len(set(self.client_ports)), "The idle connection was reused")
+
+    def test_request_connection_error(self):
+        with socket.socket() as unused:
+            unused.bind(("127.0.0.1", 0))
+            uri = "http://{}:{}/".format(*unused.getsockname())
+        http = PooledHttp(pool_size=1, idle_timeout=60, timeout=5)
+        self.addCleanup(http.close)
+
+        with self.assertRaises(ConnectionError):
+            http.request(uri)
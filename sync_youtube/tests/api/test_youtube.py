@@ -1,26 +1,39 @@
-from typing import Any, Dict
+from datetime import timedelta
+from typing import Any, Dict, Iterator
+from django.utils import timezone
 from unittest.mock import MagicMock, NonCallableMagicMock, call, patch
-from sync_youtube.tests.shared import SyncYoutubeTestCase
-from google.oauth2.credentials import Credentials
+from sync_youtube.tests.shared import SyncYoutubeTestCase, make_new_batch_http_request_mock
+import httplib2
+from allauth.socialaccount.models import SocialToken
+from googleapiclient.errors import HttpError
 from sync_youtube.api.youtube import (
     GOOGLE_OAUTH2_URI,
     GOOGLE_SERVICE_NAME_YOUTUBE,
     GOOGLE_YOUTUBE_SERVICE_VERSION,
     YOUTUBE_CATEGORY_ID_MUSIC,
+    LikedVideosNotModified,
+    SocialTokenCredentials,
     YoutubeAPI
 )
-from sync_youtube.models.playlist import RemotePlaylist
+from sync_youtube.api.transport import get_shared_http
+from sync_youtube import journal
+from sync_youtube.api.planner import CREATE_PLAYLIST
+from sync_youtube.api.quota import QuotaExhausted
+from sync_youtube.models.journal import SongChange
+from sync_youtube.models.playlist import LocalPlaylist, RemotePlaylist
 from sync_youtube.models.song import YoutubeSong
 
 
 class YoutubeAPITestCase(SyncYoutubeTestCase):
     def test__get_user_credentials_success(self):
-        expected_credentials = Credentials(
+        expected_credentials = SocialTokenCredentials(
+            social_token_id=self.social_token.id,
             token=self.social_token.token,
             refresh_token=self.social_token.token_secret,
             token_uri=GOOGLE_OAUTH2_URI,
             client_id=self.social_app.client_id,
             client_secret=self.social_app.secret,
+            expiry=timezone.make_naive(self.social_token.expires_at, timezone.utc),
         )
 
         credentials = YoutubeAPI._get_user_credentials(self.context)
@@ -30,23 +43,70 @@ class YoutubeAPITestCase(SyncYoutubeTestCase):
             vars(credentials),
             "Unexpected credentials generated"
         )
+        self.assertTrue(credentials.valid, "Unexpired access token would be refreshed")
+
+    def test__get_user_credentials_caches_social_app(self):
+        YoutubeAPI._get_user_credentials(self.context)
+
+        with self.assertNumQueries(1):
+            YoutubeAPI._get_user_credentials(self.context)
+
+    @patch("google.oauth2.credentials.reauth.refresh_grant")
+    def test__get_user_credentials_refresh_write_back(
+        self,
+        mocked_refresh_grant: MagicMock,
+    ):
+        # ------------------------- #
+        # Setting up data and mocks #
+        # ------------------------- #
+
+        SocialToken.objects.filter(id=self.social_token.id).update(expires_at=timezone.now() - timedelta(minutes=5))
+        new_expiry = (timezone.now() + timedelta(hours=1)).replace(microsecond=0)
+        mocked_refresh_grant.return_value = (
+            "refreshed_token",
+            self.social_token.token_secret,
+            timezone.make_naive(new_expiry, timezone.utc),
+            {},
+            None,
+        )
+
+        # --------------------- #
+        # Executing tested code #
+        # --------------------- #
+
+        credentials = YoutubeAPI._get_user_credentials(self.context)
+        self.assertFalse(credentials.valid, "Expired access token would not be refreshed")
+        credentials.refresh(MagicMock(spec=[]))
+
+        # ----------- #
+        # Assert data #
+        # ----------- #
+
+        social_token = SocialToken.objects.get(id=self.social_token.id)
+        self.assertEqual(
+            ("refreshed_token", new_expiry),
+            (social_token.token, social_token.expires_at),
+            "Refreshed access token was not written back",
+        )
 
     @patch.object(YoutubeAPI, "_get_user_credentials")
+    @patch("sync_youtube.api.youtube.AuthorizedHttp")
     @patch("sync_youtube.api.youtube.discovery")
     def test__get_youtube_service(
         self,
         mocked_discovery: NonCallableMagicMock,
+        mocked_authorized_http: MagicMock,
         mocked__get_user_credentials: MagicMock,
     ):
         # ------------------------- #
         # Setting up data and mocks #
         # ------------------------- #
 
-        mocked_build = MagicMock(
+        mocked_build_from_document = MagicMock(
             spec=[],
         )
         mocked_discovery.spec = []
-        mocked_discovery.build = mocked_build
+        mocked_discovery.build_from_document = mocked_build_from_document
 
         mocked__get_user_credentials.return_value = "FILLER"
 
@@ -61,11 +121,89 @@ class YoutubeAPITestCase(SyncYoutubeTestCase):
         # -------------------- #
 
         mocked__get_user_credentials.assert_called_once_with(self.context)
-        mocked_build.assert_called_once_with(
-            GOOGLE_SERVICE_NAME_YOUTUBE,
-            GOOGLE_YOUTUBE_SERVICE_VERSION,
-            credentials="FILLER"
+        mocked_authorized_http.assert_called_once_with("FILLER", http=get_shared_http())
+        mocked_build_from_document.assert_called_once_with(
+            YoutubeAPI._get_discovery_document(),
+            http=mocked_authorized_http.return_value,
+        )
+
+    def test__get_discovery_document(self):
+        discovery_document = YoutubeAPI._get_discovery_document()
+
+        self.assertEqual(
+            (GOOGLE_SERVICE_NAME_YOUTUBE, GOOGLE_YOUTUBE_SERVICE_VERSION),
+            (discovery_document["name"], discovery_document["version"]),
+            "Unexpected discovery document",
+        )
+        self.assertIs(
+            discovery_document,
+            YoutubeAPI._get_discovery_document(),
+            "Discovery document was parsed twice",
+        )
+
+    @patch.object(YoutubeAPI, "sync_remote_playlists_content")
+    @patch.object(YoutubeAPI, "sync_remote_playlists")
+    @patch.object(YoutubeAPI, "_get_youtube_service")
+    def test_publish(
+        self,
+        mocked__get_youtube_service: MagicMock,
+        mocked_sync_remote_playlists: MagicMock,
+        mocked_sync_remote_playlists_content: MagicMock,
+    ):
+        remote_playlist = RemotePlaylist.objects.create(local_playlist=self.local_playlist, title="Not synched")
+        mocked_sync_remote_playlists.side_effect = lambda *args, **kwargs: RemotePlaylist.objects.filter(
+            id=remote_playlist.id,
+        ).update(is_synched=True)
+
+        YoutubeAPI.publish(self.context)
+
+        mocked__get_youtube_service.assert_called_once_with(context=self.context)
+        mocked_sync_remote_playlists.assert_called_once_with(
+            self.context,
+            youtube_service=mocked__get_youtube_service.return_value,
+            remote_playlists=[remote_playlist],
+        )
+        plan = mocked_sync_remote_playlists_content.call_args.kwargs["plan"]
+        mocked_sync_remote_playlists_content.assert_called_once_with(
+            self.context,
+            youtube_service=mocked__get_youtube_service.return_value,
+            plan=plan,
         )
+        self.assertEqual(
+            {CREATE_PLAYLIST: (1, 50)},
+            plan.summary(),
+            "Unexpected sync plan",
+        )
+        self.local_playlist.refresh_from_db()
+        self.assertFalse(self.local_playlist.has_pending_work, "Pending work flag was not cleared")
+
+    @patch.object(YoutubeAPI, "_get_youtube_service")
+    def test_publish_no_pending_work(
+        self,
+        mocked__get_youtube_service: MagicMock,
+    ):
+        LocalPlaylist.objects.filter(id=self.local_playlist.id).update(has_pending_work=False)
+
+        YoutubeAPI.publish(self.context)
+
+        mocked__get_youtube_service.assert_not_called()
+
+    @patch.object(YoutubeAPI, "sync_remote_playlists_content")
+    @patch.object(YoutubeAPI, "sync_remote_playlists")
+    @patch.object(YoutubeAPI, "_get_youtube_service")
+    def test_publish_pending_work_left(
+        self,
+        mocked__get_youtube_service: MagicMock,
+        mocked_sync_remote_playlists: MagicMock,
+        mocked_sync_remote_playlists_content: MagicMock,
+    ):
+        # The remote playlist stays unsynced, as if its creation failed
+        RemotePlaylist.objects.create(local_playlist=self.local_playlist, title="Not synched")
+
+        YoutubeAPI.publish(self.context)
+
+        self.local_playlist.refresh_from_db()
+        self.assertTrue(self.local_playlist.has_pending_work, "Pending work flag was not raised again")
 
     @patch.object(YoutubeAPI, "_get_youtube_service")
     def test_get_liked_videos_success(
@@ -120,7 +258,7 @@ class YoutubeAPITestCase(SyncYoutubeTestCase):
         # Executing tested code #
         # --------------------- #
 
-        results = YoutubeAPI.get_liked_videos(context=self.context)
+        results = list(YoutubeAPI.get_liked_videos(context=self.context))
 
         # --------------------- #
         # Asserting mocks calls #
@@ -187,6 +325,66 @@ class YoutubeAPITestCase(SyncYoutubeTestCase):
             "Unexpected results content"
         )
 
+    @patch("sync_youtube.api.youtube.settings.YOUTUBE_INCREMENTAL_KNOWN_STREAK", 2)
+    @patch.object(YoutubeAPI, "_get_youtube_service")
+    def test_get_liked_videos_incremental(
+        self,
+        mocked__get_youtube_service: MagicMock,
+    ):
+        # ------------------------- #
+        # Setting up data and mocks #
+        # ------------------------- #
+
+        def video(third_party_id: str, category_id: str = YOUTUBE_CATEGORY_ID_MUSIC) -> Dict[str, Any]:
+            return {"id": third_party_id, "snippet": {"categoryId": category_id}}
+
+        mocked_request_execute = MagicMock(
+            spec=[],
+        )
+        mocked_request_execute.side_effect = [
+            {
+                "items": [video("new"), video("known1")],
+                "nextPageToken": "second_page",
+            },
+            {
+                "items": [video("comedy", category_id="23"), video("known2")],
+                "nextPageToken": "third_page",
+            },
+            AssertionError("Crawl did not stop after known songs")
+        ]
+        mocked_youtube_service_videos_list_method = MagicMock(
+            spec=[],
+            return_value=NonCallableMagicMock(spec=[], execute=mocked_request_execute),
+        )
+        mocked__get_youtube_service.return_value = NonCallableMagicMock(
+            spec=[],
+            videos=MagicMock(
+                spec=[],
+                return_value=NonCallableMagicMock(spec=[], list=mocked_youtube_service_videos_list_method),
+            ),
+        )
+
+        # --------------------- #
+        # Executing tested code #
+        # --------------------- #
+
+        results = list(
+            YoutubeAPI.get_liked_videos(
+                context=self.context,
+                known_third_party_ids={"known1", "known2", "known3"},
+            )
+        )
+
+        # ----------- #
+        # Assert data #
+        # ----------- #
+
+        self.assertEqual(
+            ["new", "known1", "comedy", "known2"],
+            [result["id"] for result in results],
+            "Unexpected results content"
+        )
+
     @patch("sync_youtube.api.youtube.logger")
     @patch.object(YoutubeAPI, "_get_youtube_service")
     def test_get_liked_videos_error(
@@ -229,7 +427,7 @@ class YoutubeAPITestCase(SyncYoutubeTestCase):
         # Executing tested code #
         # --------------------- #
         with self.assertRaises(RuntimeError):
-            YoutubeAPI.get_liked_videos(context=self.context)
+            list(YoutubeAPI.get_liked_videos(context=self.context))
 
         # --------------------- #
         # Asserting mocks calls #
@@ -252,10 +450,10 @@ class YoutubeAPITestCase(SyncYoutubeTestCase):
             exc_info=True,
         )
 
-    @patch.object(YoutubeAPI, "get_liked_videos")
+    @patch.object(YoutubeAPI, "get_liked_video_pages")
     def test_extract_liked_musics_success(
         self,
-        mocked_get_liked_videos: MagicMock,
+        mocked_get_liked_video_pages: MagicMock,
     ):
         # -------------------- #
         # Setup mocks and data #
@@ -327,19 +525,24 @@ class YoutubeAPITestCase(SyncYoutubeTestCase):
             },
         ]
 
-        mocked_get_liked_videos.return_value = remote_liked_videos
+        mocked_get_liked_video_pages.return_value = [{"items": remote_liked_videos}]
 
         # ------------------- #
         # Execute tested code #
         # ------------------- #
 
-        created_youtube_songs, removed_songs_third_party_ids = YoutubeAPI.extract_liked_musics(context=self.context)
+        created_third_party_ids, removed_songs_third_party_ids = YoutubeAPI.extract_liked_musics(context=self.context)
 
         # ----------------- #
         # Assert mock calls #
         # ----------------- #
 
-        mocked_get_liked_videos.assert_called_once_with(self.context)
+        mocked_get_liked_video_pages.assert_called_once_with(
+            self.context,
+            known_third_party_ids=None,
+            youtube_service=None,
+            first_page_etag=None,
+        )
 
         # ----------- #
         # Assert data #
@@ -353,12 +556,12 @@ class YoutubeAPITestCase(SyncYoutubeTestCase):
         )
 
         self.assertEqual(
-            1,
-            len(created_youtube_songs),
+            {new_song_created_remote_data["id"]},
+            created_third_party_ids,
             "Unexpected songs were created"
         )
 
-        [created_song] = created_youtube_songs
+        created_song = YoutubeSong.objects.get(user=self.user, third_party_id=new_song_created_remote_data["id"])
 
         self.assertEqual(
             created_song.user,
@@ -414,6 +617,286 @@ class YoutubeAPITestCase(SyncYoutubeTestCase):
             "Unexpectedly found a song that should have been deleted"
         )
 
+        self.local_playlist.refresh_from_db()
+        self.assertIsNotNone(
+            self.local_playlist.last_full_crawl,
+            "Full crawl date was not recorded"
+        )
+
+    @patch.object(YoutubeAPI, "get_liked_video_pages")
+    def test_extract_liked_musics_incremental(
+        self,
+        mocked_get_liked_video_pages: MagicMock,
+    ):
+        # -------------------- #
+        # Setup mocks and data #
+        # -------------------- #
+
+        last_full_crawl = timezone.now() - timedelta(days=1)
+        self.local_playlist.last_full_crawl = last_full_crawl
+        self.local_playlist.liked_videos_etag = "LikedVideosEtag"
+        self.local_playlist.save()
+
+        not_crawled_youtube_song = YoutubeSong.objects.create(
+            user=self.user,
+            local_playlist=self.local_playlist,
+            title="Music 1",
+            description="Description for music 1",
+            image_url="https://music.com/img1.jpg",
+            third_party_id="Music1OnYoutubeID",
+            third_party_etag="Music1OnYoutubeEtag",
+        )
+
+        mocked_get_liked_video_pages.return_value = [{"etag": "NewLikedVideosEtag", "items": [
+            {
+                "id": "Music2OnYoutubeID",
+                "etag": "Music2OnYoutubeEtag",
+                "snippet": {
+                    "title": "Music 2",
+                    "description": "Description for music 2",
+                    "categoryId": YOUTUBE_CATEGORY_ID_MUSIC,
+                    "thumbnails": {
+                        "default": {
+                            "url": "https://music.com/img2.jpg",
+                        },
+                    },
+                }
+            },
+        ]}]
+
+        # ------------------- #
+        # Execute tested code #
+        # ------------------- #
+
+        created_third_party_ids, removed_songs_third_party_ids = YoutubeAPI.extract_liked_musics(context=self.context)
+
+        # ----------------- #
+        # Assert mock calls #
+        # ----------------- #
+
+        mocked_get_liked_video_pages.assert_called_once_with(
+            self.context,
+            known_third_party_ids={not_crawled_youtube_song.third_party_id},
+            youtube_service=None,
+            first_page_etag="LikedVideosEtag",
+        )
+
+        # ----------- #
+        # Assert data #
+        # ----------- #
+
+        self.assertEqual({"Music2OnYoutubeID"}, created_third_party_ids, "Unexpected songs were created")
+        self.assertEqual(set(), removed_songs_third_party_ids, "Incremental crawl removed songs")
+        self.assertTrue(
+            YoutubeSong.objects.filter(id=not_crawled_youtube_song.id).exists(),
+            "Song missing from an incremental crawl was deleted"
+        )
+        self.local_playlist.refresh_from_db()
+        self.assertEqual(
+            last_full_crawl,
+            self.local_playlist.last_full_crawl,
+            "Incremental crawl was recorded as a full crawl"
+        )
+        self.assertEqual(
+            "NewLikedVideosEtag",
+            self.local_playlist.liked_videos_etag,
+            "Liked videos ETag was not stored"
+        )
+
+    @patch.object(YoutubeAPI, "get_liked_video_pages")
+    def test_extract_liked_musics_not_modified(
+        self,
+        mocked_get_liked_video_pages: MagicMock,
+    ):
+        self.local_playlist.last_full_crawl = timezone.now()
+        self.local_playlist.liked_videos_etag = "LikedVideosEtag"
+        self.local_playlist.save()
+
+        def not_modified_liked_video_pages(*args: Any, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+            raise LikedVideosNotModified()
+            yield
+
+        mocked_get_liked_video_pages.side_effect = not_modified_liked_video_pages
+
+        created_third_party_ids, removed_songs_third_party_ids = YoutubeAPI.extract_liked_musics(context=self.context)
+
+        self.assertEqual(
+            (set(), set()),
+            (created_third_party_ids, removed_songs_third_party_ids),
+            "Unmodified liked videos were reconciled",
+        )
+        self.local_playlist.refresh_from_db()
+        self.assertEqual(
+            "LikedVideosEtag",
+            self.local_playlist.liked_videos_etag,
+            "Liked videos ETag was changed",
+        )
+
+    @patch.object(YoutubeAPI, "get_liked_video_pages")
+    def test_extract_liked_musics_quota_exhausted(
+        self,
+        mocked_get_liked_video_pages: MagicMock,
+    ):
+        # -------------------- #
+        # Setup mocks and data #
+        # -------------------- #
+
+        # Liked, but on a page the crawl will not reach
+        YoutubeSong.objects.create(
+            user=self.user,
+            local_playlist=self.local_playlist,
+            third_party_id="OldMusicOnYoutubeID",
+            is_synched=True,
+        )
+
+        def quota_exhausted_liked_video_pages(*args: Any, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+            yield {
+                "etag": "LikedVideosEtag",
+                "items": [{
+                    "id": "Music1OnYoutubeID",
+                    "etag": "Music1OnYoutubeEtag",
+                    "snippet": {
+                        "title": "Music 1",
+                        "description": "Description for music 1",
+                        "categoryId": YOUTUBE_CATEGORY_ID_MUSIC,
+                        "thumbnails": {"default": {"url": "https://music.com/img1.jpg"}},
+                    },
+                }],
+            }
+            raise QuotaExhausted("Daily quota exhausted")
+
+        mocked_get_liked_video_pages.side_effect = quota_exhausted_liked_video_pages
+
+        # ------------------- #
+        # Execute tested code #
+        # ------------------- #
+
+        created_third_party_ids, removed_songs_third_party_ids = YoutubeAPI.extract_liked_musics(context=self.context)
+
+        # ----------- #
+        # Assert data #
+        # ----------- #
+
+        self.assertEqual(
+            ({"Music1OnYoutubeID"}, set()),
+            (created_third_party_ids, removed_songs_third_party_ids),
+            "Musics crawled before running out of quota were not kept, or unreached ones were removed",
+        )
+        self.assertFalse(
+            YoutubeSong.objects.get(third_party_id="OldMusicOnYoutubeID").should_not_exist,
+            "Song missing from the interrupted crawl was flagged for removal",
+        )
+        self.local_playlist.refresh_from_db()
+        self.assertEqual(
+            (None, None),
+            (self.local_playlist.liked_videos_etag, self.local_playlist.last_full_crawl),
+            "Interrupted crawl was recorded as done",
+        )
+
+    @patch.object(YoutubeAPI, "_get_youtube_service")
+    def test_get_liked_video_pages_not_modified(
+        self,
+        mocked__get_youtube_service: MagicMock,
+    ):
+        # ------------------------- #
+        # Setting up data and mocks #
+        # ------------------------- #
+
+        mocked_request = NonCallableMagicMock(
+            spec=[],
+            headers={},
+            execute=MagicMock(
+                spec=[],
+                side_effect=HttpError(httplib2.Response({"status": 304}), b""),
+            ),
+        )
+        mocked__get_youtube_service.return_value = NonCallableMagicMock(
+            spec=[],
+            videos=MagicMock(
+                spec=[],
+                return_value=NonCallableMagicMock(
+                    spec=[],
+                    list=MagicMock(spec=[], return_value=mocked_request),
+                ),
+            ),
+        )
+
+        # --------------------- #
+        # Executing tested code #
+        # --------------------- #
+
+        with self.assertRaises(LikedVideosNotModified):
+            list(YoutubeAPI.get_liked_video_pages(context=self.context, first_page_etag="LikedVideosEtag"))
+
+        # ----------- #
+        # Assert data #
+        # ----------- #
+
+        self.assertEqual(
+            {"If-None-Match": "LikedVideosEtag"},
+            mocked_request.headers,
+            "First page was not requested conditionally",
+        )
+
+    @patch("sync_youtube.api.youtube.settings.YOUTUBE_BULK_CHUNK_SIZE", 2)
+    @patch.object(YoutubeAPI, "get_liked_video_pages")
+    def test_extract_liked_musics_chunks(
+        self,
+        mocked_get_liked_video_pages: MagicMock,
+    ):
+        # -------------------- #
+        # Setup mocks and data #
+        # -------------------- #
+
+        def music(index: int) -> Dict[str, Any]:
+            return {
+                "id": f"Music{index}OnYoutubeID",
+                "etag": f"Music{index}OnYoutubeEtag",
+                "snippet": {
+                    "title": f"Music {index}",
+                    "description": f"Description for music {index}",
+                    "categoryId": YOUTUBE_CATEGORY_ID_MUSIC,
+                    "thumbnails": {"default": {"url": f"https://music.com/img{index}.jpg"}},
+                }
+            }
+
+        mocked_get_liked_video_pages.return_value = iter([
+            {"items": [music(1), music(2)]},
+            {"items": [music(3), music(1)]},
+        ])
+
+        # ------------------- #
+        # Execute tested code #
+        # ------------------- #
+
+        with patch.object(YoutubeSong.objects, "bulk_create", wraps=YoutubeSong.objects.bulk_create) as bulk_create:
+            created_third_party_ids, _ = YoutubeAPI.extract_liked_musics(context=self.context)
+
+        # ----------------- #
+        # Assert mock calls #
+        # ----------------- #
+
+        self.assertEqual(
+            2,
+            bulk_create.call_count,
+            "Songs were not created by chunks",
+        )
+
+        # ----------- #
+        # Assert data #
+        # ----------- #
+
+        self.assertEqual(
+            {"Music1OnYoutubeID", "Music2OnYoutubeID", "Music3OnYoutubeID"},
+            created_third_party_ids,
+            "Unexpected songs were created",
+        )
+        self.assertEqual(
+            3,
+            YoutubeSong.objects.filter(user=self.user).count(),
+            "Unexpected amount of youtube songs found for user",
+        )
+
     @patch("sync_youtube.api.youtube.YOUTUBE_MAX_VIDEO_PER_PLAYLIST", 2)
     def test_make_playlists_split_success(self):
         # -------------------- #
@@ -529,6 +1012,7 @@ class YoutubeAPITestCase(SyncYoutubeTestCase):
         mocked__get_youtube_service.return_value = NonCallableMagicMock(
             spec=[],
             playlists=mocked_youtube_service_playlists_method,
+            new_batch_http_request=make_new_batch_http_request_mock(),
         )
 
         remote_playlist_to_sync = RemotePlaylist.objects.create(
@@ -600,8 +1084,9 @@ class YoutubeAPITestCase(SyncYoutubeTestCase):
         mocked_request_execute = MagicMock(
             spec=[],
         )
+        raised_error = RuntimeError()
         mocked_request_execute.side_effect = [
-            RuntimeError(),
+            raised_error,
         ]
         mocked_request = NonCallableMagicMock(
             spec=[],
@@ -622,6 +1107,7 @@ class YoutubeAPITestCase(SyncYoutubeTestCase):
         mocked__get_youtube_service.return_value = NonCallableMagicMock(
             spec=[],
             playlists=mocked_youtube_service_playlists_method,
+            new_batch_http_request=make_new_batch_http_request_mock(),
         )
 
         remote_playlist_to_sync = RemotePlaylist.objects.create(
@@ -660,7 +1146,7 @@ class YoutubeAPITestCase(SyncYoutubeTestCase):
         mocked_logger.exception.assert_called_once_with(
             "Failed to sync RemotePlaylist %s",
             remote_playlist_to_sync.id,
-            exc_info=True,
+            exc_info=raised_error,
         )
 
         # ----------- #
@@ -738,6 +1224,7 @@ class YoutubeAPITestCase(SyncYoutubeTestCase):
         mocked__get_youtube_service.return_value = NonCallableMagicMock(
             spec=[],
             playlistItems=mocked_youtube_service_playlistItems_method,
+            new_batch_http_request=make_new_batch_http_request_mock(),
         )
 
         remote_playlist = RemotePlaylist.objects.create(
@@ -787,6 +1274,9 @@ class YoutubeAPITestCase(SyncYoutubeTestCase):
             is_synched=True,
             should_not_be_published=True,
         )
+        journal.record(self.user.id, [song_to_add.id], SongChange.Kind.ADDED)
+        journal.record(self.user.id, [song_to_remove.id], SongChange.Kind.REMOVED)
+        journal.record(self.user.id, [song_to_unpublish.id], SongChange.Kind.UNPUBLISHED)
 
         # ------------------- #
         # Execute tested code #
@@ -870,3 +1360,73 @@ class YoutubeAPITestCase(SyncYoutubeTestCase):
             song_to_unpublish.is_synched,
             "song_to_unpublish is inadequatly flagged as synched"
         )
+        self.assertFalse(journal.has_unread(self.user.id), "Published changes were left in the journal")
+
+    @patch.object(YoutubeAPI, "_get_youtube_service")
+    def test_sync_remote_playlists_content_journals_leftovers(
+        self,
+        mocked__get_youtube_service: MagicMock,
+    ):
+        # ------------------------- #
+        # Setting up data and mocks #
+        # ------------------------- #
+
+        mocked_request_insert = NonCallableMagicMock(
+            spec=[],
+            execute=MagicMock(spec=[], side_effect=RuntimeError("Insert failed")),
+        )
+        mocked_youtube_service_playlistItems_object = NonCallableMagicMock(
+            spec=[],
+            insert=MagicMock(spec=[], return_value=mocked_request_insert),
+        )
+        mocked__get_youtube_service.return_value = NonCallableMagicMock(
+            spec=[],
+            playlistItems=MagicMock(spec=[], return_value=mocked_youtube_service_playlistItems_object),
+            new_batch_http_request=make_new_batch_http_request_mock(),
+        )
+
+        synched_remote_playlist = RemotePlaylist.objects.create(
+            local_playlist=self.local_playlist,
+            title="foo",
+            third_party_id="remote_playlist_id",
+            is_synched=True,
+        )
+        not_synched_remote_playlist = RemotePlaylist.objects.create(
+            local_playlist=self.local_playlist,
+            title="bar",
+        )
+
+        def create_song(index: int, remote_playlist: RemotePlaylist) -> YoutubeSong:
+            return YoutubeSong.objects.create(
+                user=self.user,
+                local_playlist=self.local_playlist,
+                remote_playlist=remote_playlist,
+                title=f"Music {index}",
+                description=f"Description for music {index}",
+                image_url=f"https://music.com/img{index}.jpg",
+                third_party_id=f"Music{index}OnYoutubeID",
+                third_party_etag=f"Music{index}OnYoutubeEtag",
+            )
+
+        failing_song = create_song(1, synched_remote_playlist)
+        waiting_song = create_song(2, not_synched_remote_playlist)
+        # Pending according to its flags, but unchanged since it was last published
+        create_song(3, synched_remote_playlist)
+        journal.record(self.user.id, [failing_song.id, waiting_song.id], SongChange.Kind.ADDED)
+
+        # ------------------- #
+        # Execute tested code #
+        # ------------------- #
+
+        YoutubeAPI.sync_remote_playlists_content(context=self.context)
+
+        # --------------------- #
+        # Assert calls and data #
+        # --------------------- #
+
+        mocked_youtube_service_playlistItems_object.insert.assert_called_once()
+        self.assertEqual(
+            {failing_song.id, waiting_song.id},
+            journal.read(self.user.id)[0],
+            "Songs left to publish were not journaled again",
+        )
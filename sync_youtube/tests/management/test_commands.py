@@ -0,0 +1,229 @@
+import json
+from contextlib import contextmanager
+from io import StringIO
+from typing import Iterator
+from unittest.mock import MagicMock, call, patch
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from sync_youtube.api.youtube import DummyRequest
+from sync_youtube.models.job import SyncJob
+from sync_youtube.models.playlist import LocalPlaylist, RemotePlaylist
+from sync_youtube.models.song import YoutubeSong
+from sync_youtube.tests.shared import SyncYoutubeTestCase
+
+
+class CommandsTestCase(SyncYoutubeTestCase):
+    def setUp(self) -> None:
+        self.other_user = User.objects.create_user(username="Other User", email="other_user@test.te")
+        LocalPlaylist.objects.create(user=self.other_user)
+        return super().setUp()
+
+    @patch("sync_youtube.management.commands.fetch_youtube_songs.YoutubeAPI.make_playlists_split")
+    @patch("sync_youtube.management.commands.fetch_youtube_songs.YoutubeAPI.extract_liked_musics")
+    def test_fetch_youtube_songs_workers(
+        self,
+        mocked_extract_liked_musics: MagicMock,
+        mocked_make_playlists_split: MagicMock,
+    ):
+        # ------------------------- #
+        # Setting up data and mocks #
+        # ------------------------- #
+
+        def extract_liked_musics(context: DummyRequest) -> None:
+            if context.user == self.user:
+                raise RuntimeError("Failing user")
+
+        mocked_extract_liked_musics.side_effect = extract_liked_musics
+        stdout = StringIO()
+
+        # ------------------- #
+        # Execute tested code #
+        # ------------------- #
+
+        call_command("fetch_youtube_songs", workers=2, stdout=stdout)
+
+        # ------------------- #
+        # Assert mocked calls #
+        # ------------------- #
+
+        expected_calls = [
+            call(context=DummyRequest(user=self.user)),
+            call(context=DummyRequest(user=self.other_user)),
+        ]
+        self.assertCountEqual(
+            expected_calls,
+            mocked_extract_liked_musics.call_args_list,
+            "Unexpected calls to extract_liked_musics",
+        )
+        self.assertCountEqual(
+            expected_calls,
+            mocked_make_playlists_split.call_args_list,
+            "A failing user prevented playlists split",
+        )
+
+        # ----------- #
+        # Assert data #
+        # ----------- #
+
+        output = stdout.getvalue()
+        self.assertIn(f"{self.user.email}: FAILED", output, "Failing user missing from summary")
+        self.assertIn(f"{self.other_user.email}: OK", output, "Succeeding user missing from summary")
+        self.assertIn("Processed 2 users (1 failed)", output, "Unexpected summary totals")
+
+    @patch("sync_youtube.management.commands.sync_remote_playlists.YoutubeAPI.publish")
+    def test_sync_remote_playlists_sequential(
+        self,
+        mocked_publish: MagicMock,
+    ):
+        stdout = StringIO()
+
+        call_command("sync_remote_playlists", stdout=stdout)
+
+        self.assertCountEqual(
+            [
+                call(DummyRequest(user=self.user)),
+                call(DummyRequest(user=self.other_user)),
+            ],
+            mocked_publish.call_args_list,
+            "Unexpected calls to publish",
+        )
+        self.assertIn("Processed 2 users (0 failed)", stdout.getvalue(), "Unexpected summary totals")
+
+    @patch("sync_youtube.management.commands.sync_remote_playlists.YoutubeAPI.publish")
+    def test_sync_remote_playlists_shard(
+        self,
+        mocked_publish: MagicMock,
+    ):
+        # Each user belongs to exactly one of the shards
+        for index, user in enumerate([self.user, self.other_user] * 2):
+            mocked_publish.reset_mock()
+
+            call_command("sync_remote_playlists", shard=f"{user.id % 2}/2", stdout=StringIO())
+
+            self.assertIn(
+                call(DummyRequest(user=user)),
+                mocked_publish.call_args_list,
+                f"User {user.email} was not processed by its shard",
+            )
+            self.assertEqual(1, mocked_publish.call_count, "Users of another shard were processed")
+
+    def test_sync_remote_playlists_invalid_shard(self):
+        for shard in ["1", "a/2", "2/2"]:
+            with self.assertRaises(CommandError, msg=f"Shard {shard} was accepted"):
+                call_command("sync_remote_playlists", shard=shard, stdout=StringIO())
+
+    @patch("sync_youtube.management.commands.sync_remote_playlists.YoutubeAPI.publish")
+    @patch("sync_youtube.management.runner.user_lock")
+    def test_sync_remote_playlists_locked_user(
+        self,
+        mocked_user_lock: MagicMock,
+        mocked_publish: MagicMock,
+    ):
+        # ------------------------- #
+        # Setting up data and mocks #
+        # ------------------------- #
+
+        @contextmanager
+        def user_lock(user_id: int) -> Iterator[bool]:
+            # Another node is processing self.user
+            yield user_id != self.user.id
+
+        mocked_user_lock.side_effect = user_lock
+        stdout = StringIO()
+
+        # ------------------- #
+        # Execute tested code #
+        # ------------------- #
+
+        call_command("sync_remote_playlists", stdout=stdout)
+
+        # ------------------------------- #
+        # Assert mocked calls and summary #
+        # ------------------------------- #
+
+        mocked_publish.assert_called_once_with(DummyRequest(user=self.other_user))
+        output = stdout.getvalue()
+        self.assertIn(f"{self.user.email}: SKIPPED", output, "Locked user missing from summary")
+        self.assertIn("Processed 2 users (0 failed), 1 skipped", output, "Unexpected summary totals")
+
+    @patch("sync_youtube.management.commands.sync_remote_playlists.YoutubeAPI._get_youtube_service")
+    def test_sync_remote_playlists_dry_run(
+        self,
+        mocked__get_youtube_service: MagicMock,
+    ):
+        RemotePlaylist.objects.create(local_playlist=self.local_playlist, title="Not synched")
+        stdout = StringIO()
+
+        with override_settings(YOUTUBE_QUOTA_UNITS_PER_DAY=1000):
+            call_command("sync_remote_playlists", dry_run=True, stdout=stdout)
+
+        mocked__get_youtube_service.assert_not_called()
+        output = stdout.getvalue()
+        self.assertIn(
+            f"{self.user.email}: create_playlist 1 (50 units), total 50 units",
+            output,
+            "Plan missing from report",
+        )
+        self.assertIn(f"{self.other_user.email}: nothing to do", output, "Idle user missing from report")
+        self.assertIn("Planned 2 users, total 50 units, 1000 units left today", output, "Unexpected report totals")
+        self.assertFalse(RemotePlaylist.objects.filter(is_synched=True).exists(), "Dry run synced playlists")
+
+    @patch("sync_youtube.management.commands.mirror_remote_playlists.YoutubeAPI.mirror_remote_playlists")
+    def test_mirror_remote_playlists_full(
+        self,
+        mocked_mirror_remote_playlists: MagicMock,
+    ):
+        call_command("mirror_remote_playlists", full=True, stdout=StringIO())
+
+        self.assertCountEqual(
+            [
+                call(DummyRequest(user=self.user), full=True),
+                call(DummyRequest(user=self.other_user), full=True),
+            ],
+            mocked_mirror_remote_playlists.call_args_list,
+            "Unexpected calls to mirror_remote_playlists",
+        )
+
+    @patch("sync_youtube.management.commands.run_sync_jobs.run_job")
+    def test_run_sync_jobs_once(
+        self,
+        mocked_run_job: MagicMock,
+    ):
+        job = SyncJob.objects.create(user=self.user, kind=SyncJob.Kind.FETCH_SONGS)
+
+        call_command("run_sync_jobs", once=True)
+
+        mocked_run_job.assert_called_once_with(job)
+
+    def test_benchmark_sync(self):
+        stdout = StringIO()
+
+        call_command("benchmark_sync", sizes="120", no_memory=True, stdout=stdout)
+
+        results = json.loads(stdout.getvalue())
+        run = results["runs"][0]
+        stages = {stage["stage"]: stage for stage in run["stages"]}
+        self.assertEqual((120, 108), (run["liked_videos"], run["songs"]), "Unexpected synthetic user size")
+        self.assertEqual(
+            {"youtube.videos.list": 3},
+            stages["extract_liked_musics"]["api_calls"],
+            "Liked videos were not paged",
+        )
+        self.assertEqual(
+            ({"youtube.playlistItems.insert": 108}, 3),
+            (
+                stages["sync_remote_playlists_content"]["api_calls"],
+                stages["sync_remote_playlists_content"]["http_round_trips"],
+            ),
+            "Songs were not published through batches",
+        )
+        self.assertLess(
+            stages["sync_remote_playlists_content"]["db_queries"],
+            20,
+            "Published songs were not written with bulk updates",
+        )
+        self.assertFalse(
+            YoutubeSong.objects.exclude(user__in=[self.user, self.other_user]).exists(),
+            "Synthetic users were not rolled back",
+        )
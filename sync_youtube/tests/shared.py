@@ -1,13 +1,58 @@
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from django.contrib.auth.models import User
 from allauth.socialaccount.models import SocialAccount, SocialApp, SocialToken
 from allauth.socialaccount.providers.google.provider import GoogleProvider
 from sync_youtube.models.playlist import LocalPlaylist
-from sync_youtube.api.youtube import GOOGLE_SOCIAL_APP_NAME, DummyRequest
+from sync_youtube.api.youtube import GOOGLE_SOCIAL_APP_NAME, DummyRequest, YoutubeAPI
+from sync_youtube.index_cache import INDEX_CACHE_ALIAS
 from datetime import timedelta
+from typing import Any, Callable, List, Optional, Tuple
+from unittest.mock import MagicMock
 
 
+class FakeBatchHttpRequest:
+    """
+    Stand-in for googleapiclient's BatchHttpRequest: executes each added request in turn and reports
+    its outcome to the batch callback, the way the real batch maps sub-responses back to request ids.
+    """
+    def __init__(self, callback: Callable[[str, Any, Optional[Exception]], None]) -> None:
+        self.callback = callback
+        self.requests: List[Tuple[Optional[str], Any]] = []
+
+    def add(self, request: Any, callback: Any = None, request_id: Optional[str] = None) -> None:
+        self.requests.append((request_id, request))
+
+    def execute(self, http: Any = None) -> None:
+        for request_id, request in self.requests:
+            try:
+                response = request.execute()
+            except Exception as exception:
+                self.callback(request_id, None, exception)
+            else:
+                self.callback(request_id, response, None)
+
+
+def make_new_batch_http_request_mock() -> MagicMock:
+    return MagicMock(
+        spec=[],
+        side_effect=lambda callback: FakeBatchHttpRequest(callback),
+    )
+
+
+# Metrics and cached pages of the test runs must not end up in the ones of the application
+@override_settings(
+    METRICS_DIRECTORY=None,
+    CACHES={
+        **settings.CACHES,
+        INDEX_CACHE_ALIAS: {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "sync-youtube-tests-index",
+        },
+    },
+)
 class SyncYoutubeTestCase(TestCase):
     @classmethod
     def setUpTestData(cls) -> None:
@@ -50,3 +95,8 @@ class SyncYoutubeTestCase(TestCase):
         )
         cls.context = DummyRequest(user=cls.user)
         return super().setUpTestData()
+
+    def setUp(self) -> None:
+        caches[INDEX_CACHE_ALIAS].clear()
+        YoutubeAPI._get_social_app.cache_clear()
+        return super().setUp()
@@ -0,0 +1,216 @@
+import threading
+from typing import Any
+from unittest.mock import MagicMock, patch
+from django.test import override_settings
+from googleapiclient.errors import HttpError
+from sync_youtube.api.youtube import YoutubeAPI
+from sync_youtube.fake_youtube import FakeResponse, FakeYoutube, make_liked_videos, make_server
+from sync_youtube.models.playlist import RemotePlaylist
+from sync_youtube.models.song import YoutubeSong
+from sync_youtube.tests.shared import SyncYoutubeTestCase
+
+
+class FakeYoutubeServerTestCase(SyncYoutubeTestCase):
+    def serve(self, youtube: FakeYoutube) -> None:
+        server = make_server(youtube, "127.0.0.1", 0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        settings_override = override_settings(
+            YOUTUBE_API_ROOT_URL="http://{}:{}/".format(*server.server_address),
+            YOUTUBE_QUOTA_ENABLED=False,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        YoutubeAPI._get_discovery_document.cache_clear()
+        self.addCleanup(YoutubeAPI._get_discovery_document.cache_clear)
+
+    def test_fetch_and_publish(self):
+        youtube = FakeYoutube(make_liked_videos(120))
+        self.serve(youtube)
+
+        YoutubeAPI.extract_liked_musics(self.context, full_crawl=True)
+        YoutubeAPI.make_playlists_split(self.context)
+        YoutubeAPI.publish(self.context)
+
+        self.assertEqual(
+            (1, 108),
+            (len(youtube.playlists), len(youtube.playlist_items)),
+            "Liked musics were not published to the fake account",
+        )
+        self.assertFalse(
+            YoutubeSong.objects.filter(user=self.user, is_synched=False).exists(),
+            "Published songs were not marked as synched",
+        )
+
+    def test_publish_within_budget(self):
+        youtube = FakeYoutube(make_liked_videos(3, music_ratio=1))
+        self.serve(youtube)
+        YoutubeAPI.extract_liked_musics(self.context, full_crawl=True)
+        YoutubeAPI.make_playlists_split(self.context)
+
+        # Enough units for the playlist and a single song
+        with patch("sync_youtube.api.youtube.quota.remaining_units", return_value=100):
+            YoutubeAPI.publish(self.context)
+        published_within_budget = (len(youtube.playlists), len(youtube.playlist_items))
+        YoutubeAPI.publish(self.context)
+
+        self.assertEqual(
+            ((1, 1), (1, 3)),
+            (published_within_budget, (len(youtube.playlists), len(youtube.playlist_items))),
+            "Operations over budget were not deferred to the next run",
+        )
+
+    def test_mirror_fixes_drift(self):
+        # ------------------------- #
+        # Setting up data and mocks #
+        # ------------------------- #
+
+        youtube = FakeYoutube(make_liked_videos(20, music_ratio=1))
+        self.serve(youtube)
+        YoutubeAPI.extract_liked_musics(self.context, full_crawl=True)
+        YoutubeAPI.make_playlists_split(self.context)
+        YoutubeAPI.publish(self.context)
+        YoutubeAPI.mirror_remote_playlists(self.context, full=True)
+
+        songs = list(YoutubeSong.objects.filter(user=self.user).order_by("third_party_id"))
+        removed_by_hand, not_saved, duplicated = songs[:3]
+        # An item removed on YouTube, and the same video inserted twice
+        del youtube.playlist_items[removed_by_hand.third_party_playlist_item_id]
+        youtube.playlist_items["duplicate"] = dict(
+            youtube.playlist_items[duplicated.third_party_playlist_item_id],
+            id="duplicate",
+        )
+        youtube.playlist_revisions[removed_by_hand.remote_playlist.third_party_id] += 1
+        # An item inserted whose song was not saved as synched
+        YoutubeSong.objects.filter(id=not_saved.id).update(is_synched=False, third_party_playlist_item_id=None)
+        youtube.calls.clear()
+
+        # ------------------- #
+        # Execute tested code #
+        # ------------------- #
+
+        YoutubeAPI.mirror_remote_playlists(self.context)
+        mirror_calls = dict(youtube.calls)
+        YoutubeAPI.publish(self.context)
+        youtube.calls.clear()
+        YoutubeAPI.mirror_remote_playlists(self.context)
+
+        # ----------- #
+        # Assert data #
+        # ----------- #
+
+        self.assertEqual(
+            {
+                "youtube.playlists.list": 1,
+                "youtube.playlistItems.list": 1,
+                "youtube.playlistItems.delete": 1,
+            },
+            mirror_calls,
+            "Drifting playlist was not listed and deduplicated",
+        )
+        not_saved.refresh_from_db()
+        self.assertTrue(not_saved.is_synched, "Inserted item was not adopted by its song")
+        self.assertEqual(
+            sorted(song.third_party_id for song in songs),
+            sorted(item["snippet"]["resourceId"]["videoId"] for item in youtube.playlist_items.values()),
+            "Remote playlist does not hold every song exactly once",
+        )
+        self.assertEqual(
+            {"youtube.playlists.list": 1},
+            dict(youtube.calls),
+            "Playlist items were listed although nothing drifted",
+        )
+
+    @patch("sync_youtube.api.youtube.YOUTUBE_MAX_VIDEO_PER_PLAYLIST", 10)
+    def test_mirror_deleted_playlist(self):
+        # ------------------------- #
+        # Setting up data and mocks #
+        # ------------------------- #
+
+        youtube = FakeYoutube(make_liked_videos(20, music_ratio=1))
+        self.serve(youtube)
+        YoutubeAPI.extract_liked_musics(self.context, full_crawl=True)
+        YoutubeAPI.make_playlists_split(self.context)
+        YoutubeAPI.publish(self.context)
+
+        deleted_playlist, kept_playlist = RemotePlaylist.objects.filter(
+            local_playlist=self.local_playlist,
+        ).order_by("created")
+        removed_by_hand = kept_playlist.songs.first()
+        # Deleted by hand on YouTube, while playlists.list still returns it
+        listed_playlists = dict(youtube.playlists)
+        del youtube.playlists[deleted_playlist.third_party_id]
+        youtube.playlist_items = {
+            item_id: item
+            for item_id, item in youtube.playlist_items.items()
+            if item["snippet"]["playlistId"] != deleted_playlist.third_party_id
+            and item_id != removed_by_hand.third_party_playlist_item_id
+        }
+        list_playlists = youtube._list_playlists
+
+        def stale_list_playlists(*args: Any) -> FakeResponse:
+            with patch.object(youtube, "playlists", listed_playlists):
+                return list_playlists(*args)
+
+        # ------------------- #
+        # Execute tested code #
+        # ------------------- #
+
+        with patch.object(youtube, "_list_playlists", stale_list_playlists):
+            YoutubeAPI.mirror_remote_playlists(self.context, full=True)
+
+        # ----------- #
+        # Assert data #
+        # ----------- #
+
+        deleted_playlist.refresh_from_db()
+        self.assertEqual(
+            (False, None),
+            (deleted_playlist.is_synched, deleted_playlist.third_party_id),
+            "Deleted playlist was not left to be created again",
+        )
+        self.assertFalse(
+            deleted_playlist.songs.filter(is_synched=True).exists(),
+            "Songs of the deleted playlist are still synched",
+        )
+        removed_by_hand.refresh_from_db()
+        self.assertFalse(removed_by_hand.is_synched, "Other playlists were not mirrored")
+
+        YoutubeAPI.publish(self.context)
+        self.assertEqual(
+            (2, 20),
+            (len(youtube.playlists), len(youtube.playlist_items)),
+            "Deleted playlist and removed item were not published again",
+        )
+
+    @patch("sync_youtube.api.execution.time.sleep")
+    def test_injected_errors_are_retried(
+        self,
+        mocked_sleep: MagicMock,
+    ):
+        youtube = FakeYoutube(make_liked_videos(10), error_rates={429: 1})
+        self.serve(youtube)
+
+        with override_settings(YOUTUBE_RETRY_MAX_ATTEMPTS=3), self.assertRaises(HttpError) as error:
+            list(YoutubeAPI.get_liked_video_pages(self.context))
+
+        self.assertEqual(429, error.exception.resp.status, "Unexpected error status")
+        self.assertEqual(3, youtube.calls["youtube.videos.list"], "Throttled call was not retried")
+
+    def test_quota_exceeded(self):
+        youtube = FakeYoutube(make_liked_videos(100), quota_units_per_day=1)
+        self.serve(youtube)
+
+        pages = []
+        with self.assertRaises(HttpError) as error:
+            for page in YoutubeAPI.get_liked_video_pages(self.context):
+                pages.append(page)
+
+        self.assertEqual(
+            (1, 403, 2),
+            (len(pages), error.exception.resp.status, youtube.calls["youtube.videos.list"]),
+            "Calls over the quota were not denied, or were retried",
+        )
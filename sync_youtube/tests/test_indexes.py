@@ -0,0 +1,45 @@
+from django.db import connection
+from django.db.models import QuerySet
+from sync_youtube.models.journal import SongChange
+from sync_youtube.models.song import YoutubeSong
+from sync_youtube.tests.shared import SyncYoutubeTestCase
+
+
+class IndexesTestCase(SyncYoutubeTestCase):
+    """
+    Hot lookups must keep being answered through their index: these querysets mirror the ones of the index view
+    and of sync_youtube.journal.
+    """
+
+    def setUp(self) -> None:
+        if connection.vendor not in ("postgresql", "sqlite"):
+            self.skipTest(f"Query plans are not checked on {connection.vendor}")
+        if connection.vendor == "postgresql":
+            # Test tables are tiny: make the planner pick an index whenever one applies
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return super().setUp()
+
+    def assertUsesIndex(self, index_name: str, queryset: QuerySet) -> None:
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"Query does not use {index_name}:\n{plan}")
+
+    def test_unread_song_changes(self):
+        self.assertUsesIndex(
+            "sync_youtube_songchange_user_id",
+            SongChange.objects.filter(user_id=self.user.id).values_list("id", "song_id"),
+        )
+
+    def test_listed_songs(self):
+        self.assertUsesIndex(
+            "ytsong_listed_idx",
+            YoutubeSong.objects.filter(
+                local_playlist__user=self.user,
+                should_not_exist=False,
+            ).order_by(
+                "should_not_be_published",
+                "is_synched",
+                "title",
+                "id",
+            ),
+        )
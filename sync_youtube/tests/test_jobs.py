@@ -0,0 +1,103 @@
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+from django.test import override_settings
+from django.utils import timezone
+from sync_youtube import jobs
+from sync_youtube.api.youtube import DummyRequest
+from sync_youtube.models.job import SyncJob
+from sync_youtube.tests.shared import SyncYoutubeTestCase
+
+
+class JobsTestCase(SyncYoutubeTestCase):
+    def test_claim_next_job(self):
+        first_job = jobs.enqueue(self.user, SyncJob.Kind.FETCH_SONGS)
+        second_job = jobs.enqueue(self.user, SyncJob.Kind.PUBLISH_SONGS)
+
+        self.assertEqual(first_job, jobs.claim_next_job(), "Oldest job was not claimed first")
+        self.assertEqual(second_job, jobs.claim_next_job(), "Second job was not claimed")
+        self.assertIsNone(jobs.claim_next_job(), "A running job was claimed again")
+
+        first_job.refresh_from_db()
+        self.assertEqual(SyncJob.Status.RUNNING, first_job.status, "Claimed job is not running")
+        self.assertIsNotNone(first_job.started, "Claimed job has no start date")
+
+    def test_enqueue_reuses_active_job(self):
+        job = jobs.enqueue(self.user, SyncJob.Kind.FETCH_SONGS)
+
+        self.assertEqual(job, jobs.enqueue(self.user, SyncJob.Kind.FETCH_SONGS), "Active job was queued twice")
+
+        SyncJob.objects.filter(id=job.id).update(status=SyncJob.Status.SUCCEEDED)
+        self.assertNotEqual(job, jobs.enqueue(self.user, SyncJob.Kind.FETCH_SONGS), "Finished job was reused")
+
+    def test_run_job_success(self):
+        mocked_extract_liked_musics = MagicMock()
+        mocked_make_playlists_split = MagicMock()
+        job = jobs.enqueue(self.user, SyncJob.Kind.FETCH_SONGS)
+
+        with patch.dict(jobs.JOB_STAGES, {
+            SyncJob.Kind.FETCH_SONGS: [
+                ("Extracting liked musics", mocked_extract_liked_musics),
+                ("Splitting songs into playlists", mocked_make_playlists_split),
+            ],
+        }):
+            jobs.run_job(jobs.claim_next_job())
+
+        mocked_extract_liked_musics.assert_called_once_with(DummyRequest(user=self.user))
+        mocked_make_playlists_split.assert_called_once_with(DummyRequest(user=self.user))
+
+        job.refresh_from_db()
+        self.assertEqual(SyncJob.Status.SUCCEEDED, job.status, "Job was not flagged as succeeded")
+        self.assertIsNotNone(job.finished, "Job has no end date")
+
+    def test_run_job_error(self):
+        job = jobs.enqueue(self.user, SyncJob.Kind.PUBLISH_SONGS)
+        mocked_publish = MagicMock(side_effect=RuntimeError("Publish failed"))
+
+        with patch.dict(jobs.JOB_STAGES, {SyncJob.Kind.PUBLISH_SONGS: [("Publishing songs", mocked_publish)]}):
+            jobs.run_job(jobs.claim_next_job())
+
+        job.refresh_from_db()
+        self.assertEqual(SyncJob.Status.FAILED, job.status, "Job was not flagged as failed")
+        self.assertIn("Publish failed", job.error, "Job error was not recorded")
+
+    def test_run_job_interrupted(self):
+        job = jobs.enqueue(self.user, SyncJob.Kind.PUBLISH_SONGS)
+        mocked_publish = MagicMock(side_effect=KeyboardInterrupt)
+
+        with patch.dict(jobs.JOB_STAGES, {SyncJob.Kind.PUBLISH_SONGS: [("Publishing songs", mocked_publish)]}):
+            with self.assertRaises(KeyboardInterrupt):
+                jobs.run_job(jobs.claim_next_job())
+
+        job.refresh_from_db()
+        self.assertEqual(SyncJob.Status.FAILED, job.status, "Interrupted job was left running")
+        self.assertIn("Interrupted", job.error, "Interruption was not recorded")
+
+    @override_settings(SYNC_JOB_TIMEOUT=60)
+    def test_stale_job(self):
+        job = jobs.enqueue(self.user, SyncJob.Kind.FETCH_SONGS)
+        jobs.claim_next_job()
+        SyncJob.objects.filter(id=job.id).update(started=timezone.now() - timedelta(seconds=61))
+
+        new_job = jobs.enqueue(self.user, SyncJob.Kind.FETCH_SONGS)
+        self.assertNotEqual(job, new_job, "Stale job prevented queuing a new one")
+
+        self.assertEqual(new_job, jobs.claim_next_job(), "New job was not claimed")
+        job.refresh_from_db()
+        self.assertEqual(SyncJob.Status.FAILED, job.status, "Stale job was not failed")
+        self.assertIsNotNone(job.finished, "Stale job has no end date")
+
+    @patch("sync_youtube.jobs.user_lock")
+    def test_run_job_locked_user(self, mocked_user_lock: MagicMock):
+        # Another run is processing self.user
+        mocked_user_lock.return_value.__enter__.return_value = False
+        job = jobs.enqueue(self.user, SyncJob.Kind.PUBLISH_SONGS)
+        mocked_publish = MagicMock()
+
+        with patch.dict(jobs.JOB_STAGES, {SyncJob.Kind.PUBLISH_SONGS: [("Publishing songs", mocked_publish)]}):
+            jobs.run_job(jobs.claim_next_job())
+
+        mocked_user_lock.assert_called_once_with(self.user.id)
+        mocked_publish.assert_not_called()
+        job.refresh_from_db()
+        self.assertEqual(SyncJob.Status.FAILED, job.status, "Job of a locked user was not failed")
+        self.assertIn("another run", job.error, "Lock error was not recorded")
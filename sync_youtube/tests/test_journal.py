@@ -0,0 +1,24 @@
+import uuid
+from sync_youtube import journal
+from sync_youtube.models.journal import SongChange
+from sync_youtube.tests.shared import SyncYoutubeTestCase
+
+
+class JournalTestCase(SyncYoutubeTestCase):
+    def test_acknowledge_keeps_late_changes(self):
+        read_song_id, late_song_id = uuid.uuid4(), uuid.uuid4()
+        SongChange.objects.create(id=100, user=self.user, song_id=read_song_id, kind=SongChange.Kind.ADDED)
+
+        song_ids, change_ids = journal.read(self.user.id)
+        self.assertEqual({read_song_id}, song_ids, "Unexpected changed songs")
+
+        # Allocated before the read change but committed after it was read
+        SongChange.objects.create(id=50, user=self.user, song_id=late_song_id, kind=SongChange.Kind.ADDED)
+        journal.acknowledge(change_ids)
+
+        self.assertEqual(
+            ({late_song_id}, {50}),
+            journal.read(self.user.id),
+            "Change committed after the read was dropped",
+        )
+        self.assertTrue(journal.has_unread(self.user.id), "Late change was not left unread")
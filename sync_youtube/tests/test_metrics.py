@@ -0,0 +1,135 @@
+import json
+import os
+import tempfile
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.test import override_settings
+from sync_youtube import metrics
+from sync_youtube.models.job import SyncJob
+from sync_youtube.tests.shared import SyncYoutubeTestCase
+
+
+class MetricsTestCase(SyncYoutubeTestCase):
+    def make_metric(self, metric_class, name, *args, **kwargs):
+        metric = metric_class(name, *args, **kwargs)
+        self.addCleanup(metrics.REGISTRY.pop, name)
+        return metric
+
+    def test_render_counter_and_histogram(self):
+        counter = self.make_metric(metrics.Counter, "test_calls_total", "Calls", labelnames=("method",))
+        histogram = self.make_metric(metrics.Histogram, "test_latency_seconds", "Latency", buckets=(0.1, 1))
+
+        counter.inc(method='say "hi"')
+        counter.inc(2, method='say "hi"')
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        rendered = metrics.render()
+
+        self.assertIn(
+            "# TYPE test_calls_total counter\n"
+            'test_calls_total{method="say \\"hi\\""} 3\n',
+            rendered,
+            "Counter was not rendered",
+        )
+        self.assertIn(
+            "# TYPE test_latency_seconds histogram\n"
+            'test_latency_seconds_bucket{le="0.1"} 1\n'
+            'test_latency_seconds_bucket{le="1"} 2\n'
+            'test_latency_seconds_bucket{le="+Inf"} 3\n'
+            "test_latency_seconds_sum 5.55\n"
+            "test_latency_seconds_count 3\n",
+            rendered,
+            "Histogram buckets were not rendered cumulatively",
+        )
+
+    def metrics_directory(self) -> str:
+        """
+        Temporary METRICS_DIRECTORY, this process being considered as never having dumped its metrics.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(METRICS_DIRECTORY=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for patcher in [
+            patch.object(metrics, "_flushed_pid", None),
+            patch.object(metrics, "_finished", False),
+            patch.object(metrics.atexit, "register"),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        return directory.name
+
+    def write_dump(self, path: str, dump: dict) -> None:
+        with open(path, "w") as dump_file:
+            json.dump(dump, dump_file)
+
+    def test_render_merges_other_processes(self):
+        counter = self.make_metric(metrics.Counter, "test_songs_total", "Songs", labelnames=("operation",))
+        counter.inc(operation="created")
+        metrics_directory = self.metrics_directory()
+        self.write_dump(
+            os.path.join(metrics_directory, "metrics-other-host-1.json"),
+            {"test_songs_total": [[["created"], 4], [["removed"], 2]]},
+        )
+
+        metrics.flush()
+        rendered = metrics.render()
+
+        self.assertTrue(
+            os.path.exists(os.path.join(metrics_directory, f"metrics-{metrics._process_name()}.json")),
+            "Metrics of the current process were not dumped",
+        )
+
+        self.assertIn('test_songs_total{operation="created"} 5\n', rendered, "Dumped counter was not merged")
+        self.assertIn('test_songs_total{operation="removed"} 2\n', rendered, "Dumped counter was not merged")
+
+    def test_finish_folds_dumps(self):
+        counter = self.make_metric(metrics.Counter, "test_songs_total", "Songs", labelnames=("operation",))
+        counter.inc(3, operation="created")
+        metrics_directory = self.metrics_directory()
+        own_path = os.path.join(metrics_directory, f"metrics-{metrics._process_name()}.json")
+        # Left by a killed process which had the same pid
+        self.write_dump(own_path, {"test_songs_total": [[["created"], 4]]})
+        self.write_dump(
+            os.path.join(metrics_directory, f"metrics-{metrics.FINISHED_PROCESSES}.json"),
+            {"test_songs_total": [[["created"], 1]]},
+        )
+
+        metrics.flush()
+        metrics.finish()
+
+        self.assertEqual(
+            ["metrics-finished.json", "metrics.lock"],
+            sorted(os.listdir(metrics_directory)),
+            "Dumps of the finished processes were not folded",
+        )
+        with open(os.path.join(metrics_directory, "metrics-finished.json")) as dump_file:
+            self.assertEqual(
+                [[["created"], 8]],
+                json.load(dump_file)["test_songs_total"],
+                "Folded counters were not added up",
+            )
+
+
+class StageTrackingTestCase(SyncYoutubeTestCase):
+    def test_track_stage_counts_queries(self):
+        queries_before = metrics.sync_stage_db_queries.count(stage="test_stage")
+        sum_before = metrics.sync_stage_db_queries.snapshot().get(("test_stage",), [0, 0])[-2]
+
+        with metrics.track_stage("test_stage"):
+            User.objects.count()
+            SyncJob.objects.count()
+
+        self.assertEqual(
+            queries_before + 1,
+            metrics.sync_stage_db_queries.count(stage="test_stage"),
+            "Stage run was not recorded",
+        )
+        self.assertEqual(
+            sum_before + 2,
+            metrics.sync_stage_db_queries.snapshot()[("test_stage",)][-2],
+            "Stage queries were not counted",
+        )
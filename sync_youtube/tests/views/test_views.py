@@ -1,8 +1,13 @@
-from unittest.mock import MagicMock, patch
-from sync_youtube.models.playlist import RemotePlaylist
+import re
+import uuid
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from sync_youtube import jobs
+from sync_youtube.models.job import SyncJob
+from sync_youtube.models.playlist import LocalPlaylist, RemotePlaylist
 from sync_youtube.models.song import YoutubeSong
 from sync_youtube.tests.shared import SyncYoutubeTestCase
-from django.test import Client
+from django.test import Client, override_settings
 from django.contrib.auth.models import User
 
 
@@ -93,6 +98,41 @@ class ViewsTestCase(SyncYoutubeTestCase):
             "Wrong user found in the response"
         )
 
+    def test_index_cached_until_changed(self):
+        youtube_song = YoutubeSong.objects.create(
+            user=self.user,
+            local_playlist=self.local_playlist,
+            title="Music 1",
+            description="Description for music 1",
+            image_url="https://music.com/img1.jpg",
+            third_party_id="Music1OnYoutubeID",
+            third_party_etag="Music1OnYoutubeEtag",
+        )
+        self.logged_in_client.get("/")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.logged_in_client.get("/")
+
+        self.assertEqual(
+            [],
+            [query["sql"] for query in queries.captured_queries if "sync_youtube_" in query["sql"]],
+            "Cached index page queried the songs, playlists or jobs",
+        )
+        self.assertFalse(response.context["liked_songs"][0].should_not_be_published, "Unexpected song state")
+
+        self.logged_in_client.post("/switch-song/", data={"id": str(youtube_song.id)}, content_type="application/json")
+        response = self.logged_in_client.get("/")
+
+        self.assertTrue(
+            response.context["liked_songs"][0].should_not_be_published,
+            "Switching a song did not invalidate the cached index page",
+        )
+
+        job = jobs.enqueue(self.user, SyncJob.Kind.FETCH_SONGS)
+        response = self.logged_in_client.get("/")
+
+        self.assertEqual([job], response.context["active_jobs"], "Queuing a job did not invalidate the cached index page")
+
     def test_policies_success(self):
         response = self.anonymous_client.get("/policies/")
         self.assertTemplateUsed(
@@ -107,17 +147,18 @@ class ViewsTestCase(SyncYoutubeTestCase):
             "sync_youtube/terms-of-service.html",
         )
 
-    @patch("sync_youtube.views.YoutubeAPI.extract_liked_musics")
-    @patch("sync_youtube.views.YoutubeAPI.make_playlists_split")
-    def test_fetch_songs_success(
-        self,
-        mocked_make_playlist_split: MagicMock,
-        mocked_extract_liked_musics: MagicMock,
-    ):
+    def test_fetch_songs_success(self):
         response = self.logged_in_client.get("/fetch-songs/")
 
-        mocked_extract_liked_musics.assert_called_once_with(response.wsgi_request)
-        mocked_make_playlist_split.assert_called_once_with(response.wsgi_request)
+        self.assertEqual(
+            1,
+            SyncJob.objects.filter(
+                user=self.user,
+                kind=SyncJob.Kind.FETCH_SONGS,
+                status=SyncJob.Status.QUEUED,
+            ).count(),
+            "Fetch job was not queued",
+        )
 
         self.assertRedirects(
             response,
@@ -125,17 +166,19 @@ class ViewsTestCase(SyncYoutubeTestCase):
             status_code=301,
         )
 
-    @patch("sync_youtube.views.YoutubeAPI.sync_remote_playlists")
-    @patch("sync_youtube.views.YoutubeAPI.sync_remote_playlists_content")
-    def test_publish_songs_success(
-        self,
-        mocked_sync_remote_playlists_content: MagicMock,
-        mocked_sync_remote_playlists: MagicMock,
-    ):
+    def test_publish_songs_success(self):
         response = self.logged_in_client.get("/publish-songs/")
+        self.logged_in_client.get("/publish-songs/")
 
-        mocked_sync_remote_playlists_content.assert_called_once_with(response.wsgi_request)
-        mocked_sync_remote_playlists.assert_called_once_with(response.wsgi_request)
+        self.assertEqual(
+            1,
+            SyncJob.objects.filter(
+                user=self.user,
+                kind=SyncJob.Kind.PUBLISH_SONGS,
+                status=SyncJob.Status.QUEUED,
+            ).count(),
+            "Publish job was not queued exactly once",
+        )
 
         self.assertRedirects(
             response,
@@ -143,6 +186,138 @@ class ViewsTestCase(SyncYoutubeTestCase):
             status_code=301,
         )
 
+    def test_publish_songs_no_pending_work(self):
+        LocalPlaylist.objects.filter(id=self.local_playlist.id).update(has_pending_work=False)
+
+        response = self.logged_in_client.get("/publish-songs/")
+
+        self.assertFalse(
+            SyncJob.objects.filter(user=self.user, kind=SyncJob.Kind.PUBLISH_SONGS).exists(),
+            "Publish job was queued without pending work",
+        )
+        self.assertRedirects(
+            response,
+            expected_url="/",
+            status_code=301,
+        )
+
+    @override_settings(LIKED_SONGS_PAGE_SIZE=2)
+    def test_liked_songs_pagination(self):
+        # ------------------------- #
+        # Setting up data and mocks #
+        # ------------------------- #
+
+        def create_song(title: str, **kwargs) -> YoutubeSong:
+            song_id = uuid.uuid4()
+            return YoutubeSong.objects.create(
+                id=song_id,
+                user=self.user,
+                local_playlist=self.local_playlist,
+                title=title,
+                description=f"Description for {title}",
+                image_url="https://music.com/img.jpg",
+                third_party_id=f"{song_id}OnYoutubeID",
+                third_party_etag=f"{song_id}OnYoutubeEtag",
+                **kwargs
+            )
+
+        expected_songs = [
+            create_song("A"),
+            create_song("B"),
+            create_song("B"),
+            create_song("A", is_synched=True),
+            create_song("C", should_not_be_published=True),
+        ]
+        expected_songs[1:3] = sorted(expected_songs[1:3], key=lambda song: song.id)
+        create_song("Removed", should_not_exist=True)
+
+        # --------------------- #
+        # Executing tested code #
+        # --------------------- #
+
+        response = self.logged_in_client.get("/")
+        listed_song_ids = [song.id for song in response.context["liked_songs"]]
+        next_cursor = response.context["next_cursor"]
+        requests = 0
+        while next_cursor is not None:
+            page = self.logged_in_client.get("/liked-songs/", {"cursor": next_cursor}).json()
+            listed_song_ids.extend(uuid.UUID(song_id) for song_id in re.findall(r'id="([0-9a-f-]{36})"', page["html"]))
+            next_cursor = page["next_cursor"]
+            requests += 1
+
+        # ----------- #
+        # Assert data #
+        # ----------- #
+
+        self.assertEqual(2, requests, "Unexpected amount of further pages")
+        self.assertEqual(
+            [song.id for song in expected_songs],
+            listed_song_ids,
+            "Songs were not listed once each, in order",
+        )
+
+    def test_liked_songs_invalid_cursor(self):
+        response = self.logged_in_client.get("/liked-songs/", {"cursor": "not a cursor"})
+
+        self.assertEqual(400, response.status_code, "Response status was not 400")
+
+    def test_sync_job_status_success(self):
+        job = SyncJob.objects.create(
+            user=self.user,
+            kind=SyncJob.Kind.FETCH_SONGS,
+            status=SyncJob.Status.RUNNING,
+            progress="Extracting liked musics",
+        )
+
+        response = self.logged_in_client.get(f"/jobs/{job.id}/")
+
+        self.assertEqual(200, response.status_code, "Response status was not 200")
+        body = response.json()
+        self.assertEqual(
+            (str(job.id), SyncJob.Status.RUNNING, "Extracting liked musics"),
+            (body["id"], body["status"], body["progress"]),
+            "Unexpected job status",
+        )
+
+    def test_sync_job_status_other_user(self):
+        job = SyncJob.objects.create(user=self.user, kind=SyncJob.Kind.FETCH_SONGS)
+        User.objects.create_user(username="foo", password="bar")
+        client = Client()
+        client.login(username="foo", password="bar")
+
+        response = client.get(f"/jobs/{job.id}/")
+
+        self.assertEqual(404, response.status_code, "Response status was not 404")
+
+    @override_settings(METRICS_ALLOWED_IPS=["127.0.0.1"])
+    def test_export_metrics_success(self):
+        SyncJob.objects.create(user=self.user, kind=SyncJob.Kind.FETCH_SONGS)
+
+        response = self.anonymous_client.get("/metrics")
+
+        self.assertEqual(200, response.status_code, "Response status was not 200")
+        self.assertIn(
+            'sync_job_queue_depth{status="queued"} 1\n',
+            response.content.decode(),
+            "Queue depth was not exposed",
+        )
+        self.assertIn(
+            "# TYPE youtube_api_request_duration_seconds histogram\n",
+            response.content.decode(),
+            "YouTube API latency was not exposed",
+        )
+
+    def test_export_metrics_forbidden(self):
+        response = self.anonymous_client.get("/metrics")
+        self.assertEqual(403, response.status_code, "Metrics were exposed to an anonymous client")
+
+        response = self.logged_in_client.get("/metrics")
+        self.assertEqual(403, response.status_code, "Metrics were exposed to a non staff user")
+
+        User.objects.filter(id=self.user.id).update(is_staff=True)
+        response = self.logged_in_client.get("/metrics")
+        self.assertEqual(200, response.status_code, "Metrics were not exposed to a staff user")
+
     def test_switch_song_get_error(self):
         response = self.anonymous_client.get('/switch-song/')
         self.assertEqual(
@@ -163,24 +338,36 @@ class ViewsTestCase(SyncYoutubeTestCase):
             is_synched=False,
             should_not_be_published=True,
         )
+        LocalPlaylist.objects.filter(id=self.local_playlist.id).update(has_pending_work=False)
 
-        response = self.logged_in_client.post(
-            '/switch-song/',
-            data={"id": str(youtube_song.id)},
-            content_type="application/json"
-        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.logged_in_client.post(
+                '/switch-song/',
+                data={"id": str(youtube_song.id)},
+                content_type="application/json"
+            )
 
         self.assertEqual(
             200,
             response.status_code,
             "Response status was not 200"
         )
+        self.assertEqual(
+            1,
+            len([
+                query for query in queries.captured_queries
+                if query["sql"].startswith('UPDATE "sync_youtube_youtubesong"')
+            ]),
+            "Song was not switched with a single statement",
+        )
 
         youtube_song.refresh_from_db()
         self.assertFalse(
             youtube_song.should_not_be_published,
             "youtube_song.should_not_be_published has not been toggled"
         )
+        self.local_playlist.refresh_from_db()
+        self.assertTrue(self.local_playlist.has_pending_work, "Toggled song was not flagged for publishing")
 
     def test_switch_song_post_error_malformed_input_id(self):
         youtube_song = YoutubeSong.objects.create(
@@ -246,3 +433,68 @@ class ViewsTestCase(SyncYoutubeTestCase):
             youtube_song.should_not_be_published,
             "youtube_song.should_not_be_published has been toggled"
         )
+
+    def test_switch_songs_success(self):
+        # ------------------------- #
+        # Setting up data and mocks #
+        # ------------------------- #
+
+        songs = [
+            YoutubeSong.objects.create(
+                user=self.user,
+                local_playlist=self.local_playlist,
+                title=f"Music {index}",
+                description=f"Description for music {index}",
+                image_url="https://music.com/img1.jpg",
+                third_party_id=f"Music{index}OnYoutubeID",
+                third_party_etag=f"Music{index}OnYoutubeEtag",
+                should_not_be_published=index % 2 == 0,
+            )
+            for index in range(4)
+        ]
+        other_user = User.objects.create_user(username="foo", password="bar")
+        other_song = YoutubeSong.objects.create(
+            user=other_user,
+            title="Other music",
+            description="Description for other music",
+            image_url="https://music.com/img1.jpg",
+            third_party_id="OtherMusicOnYoutubeID",
+            third_party_etag="OtherMusicOnYoutubeEtag",
+        )
+
+        # --------------------- #
+        # Executing tested code #
+        # --------------------- #
+
+        response = self.logged_in_client.post(
+            "/switch-songs/",
+            data={
+                "ids": [str(song.id) for song in songs[:3]] + [str(other_song.id)],
+                "should_not_be_published": True,
+            },
+            content_type="application/json",
+        )
+
+        # ----------- #
+        # Assert data #
+        # ----------- #
+
+        self.assertEqual({"updated": 3}, response.json(), "Unexpected amount of updated songs")
+        self.assertEqual(
+            [True, True, True, False],
+            [YoutubeSong.objects.get(id=song.id).should_not_be_published for song in songs],
+            "Unexpected songs state",
+        )
+        other_song.refresh_from_db()
+        self.assertFalse(other_song.should_not_be_published, "Song of another user was switched")
+
+    def test_switch_songs_malformed_body(self):
+        malformed_bodies = [
+            {"ids": ["not an id"], "should_not_be_published": True},
+            {"ids": [], "should_not_be_published": "yes"},
+            {"should_not_be_published": True},
+        ]
+        for body in malformed_bodies:
+            response = self.logged_in_client.post("/switch-songs/", data=body, content_type="application/json")
+
+            self.assertEqual(400, response.status_code, f"Response status was not 400 for {body}")
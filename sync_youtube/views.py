@@ -1,46 +1,132 @@
+import base64
+import binascii
 import logging
 import json
-from django.http import HttpRequest, HttpResponse, HttpResponseNotFound
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Case, Q, Value, When
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    HttpResponseNotFound,
+    JsonResponse,
+)
 from django.shortcuts import render, redirect
+from django.template.loader import render_to_string
 from django.contrib.auth.decorators import login_required
 from sync_youtube.models.song import YoutubeSong
-from sync_youtube.models.playlist import RemotePlaylist
-from sync_youtube.api.youtube import YoutubeAPI
+from sync_youtube.models.playlist import LocalPlaylist, RemotePlaylist
+from sync_youtube import index_cache, jobs, journal, metrics, pending_work
+from sync_youtube.models.journal import SongChange
+from sync_youtube.models.job import SyncJob
 # Create your views here.
 
 logger = logging.getLogger("app")
 
+# Listed songs are ordered by these fields, `id` breaking ties so that the keyset pagination cursor is unique
+LIKED_SONGS_ORDERING = ("should_not_be_published", "is_synched", "title", "id")
+# Columns used by the liked songs template
+LIKED_SONGS_COLUMNS = ("id", "title", "image_url", "third_party_id", "is_synched", "should_not_be_published")
 
-def index(request: HttpRequest):
-    liked_songs = []
-    user_playlist_ids = []
-    if request.user.is_authenticated:
-        liked_songs.extend(
-            list(
-                YoutubeSong.objects.filter(
-                    local_playlist__user=request.user,
-                    should_not_exist=False,
-                ).order_by(
-                    "should_not_be_published",
-                    "is_synched",
-                    "title",
-                )
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_cursor(song: YoutubeSong) -> str:
+    position = [song.should_not_be_published, song.is_synched, song.title, str(song.id)]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[bool, bool, str, uuid.UUID]:
+    try:
+        should_not_be_published, is_synched, title, song_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return bool(should_not_be_published), bool(is_synched), str(title), uuid.UUID(song_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor(cursor)
+
+
+def _liked_songs_page(user: User, cursor: Optional[str] = None) -> Tuple[List[YoutubeSong], Optional[str]]:
+    """
+    Page of the songs listed to `user`, starting after `cursor`, and the cursor of the next page if any.
+
+    Pages are selected by keyset - the position of the last song of the previous page in the listing ordering -
+    so that deep pages cost as much as the first one.
+    """
+    songs = YoutubeSong.objects.filter(
+        local_playlist__user=user,
+        should_not_exist=False,
+    ).order_by(
+        *LIKED_SONGS_ORDERING
+    ).only(
+        *LIKED_SONGS_COLUMNS
+    )
+
+    if cursor is not None:
+        should_not_be_published, is_synched, title, song_id = _decode_cursor(cursor)
+        songs = songs.filter(
+            Q(should_not_be_published__gt=should_not_be_published)
+            | Q(should_not_be_published=should_not_be_published, is_synched__gt=is_synched)
+            | Q(should_not_be_published=should_not_be_published, is_synched=is_synched, title__gt=title)
+            | Q(
+                should_not_be_published=should_not_be_published,
+                is_synched=is_synched,
+                title=title,
+                id__gt=song_id,
             )
         )
-        user_playlist_ids.extend(
+
+    page = list(songs[:settings.LIKED_SONGS_PAGE_SIZE + 1])
+    if len(page) <= settings.LIKED_SONGS_PAGE_SIZE:
+        return page, None
+    page = page[:settings.LIKED_SONGS_PAGE_SIZE]
+    return page, _encode_cursor(page[-1])
+
+
+def _index_context(user: User) -> Dict[str, Any]:
+    context, generation = index_cache.get(user.id)
+    if context is not None:
+        return context
+
+    liked_songs, next_cursor = _liked_songs_page(user)
+    context = {
+        "liked_songs": liked_songs,
+        "next_cursor": next_cursor,
+        "user_playlist_ids": list(
             RemotePlaylist.objects.filter(
-                local_playlist__user=request.user,
+                local_playlist__user=user,
                 is_synched=True,
             ).values_list("third_party_id", flat=True)
-        )
+        ),
+        "active_jobs": list(
+            SyncJob.objects.filter(
+                jobs.active_jobs(),
+                user=user,
+            ).order_by("created")
+        ),
+    }
+    index_cache.store(user.id, context, generation)
+    return context
+
+
+def index(request: HttpRequest):
+    context: Dict[str, Any] = {
+        "liked_songs": [],
+        "next_cursor": None,
+        "user_playlist_ids": [],
+        "active_jobs": [],
+    }
+    if request.user.is_authenticated:
+        context = _index_context(request.user)
 
     return render(
         request,
         "sync_youtube/index.html",
-        context={
-            "liked_songs": liked_songs,
-            "user_playlist_ids": user_playlist_ids
-        }
+        context=context,
     )
 
 
@@ -58,41 +144,139 @@ def terms_of_service(request: HttpRequest):
     )
 
 
+def export_metrics(request: HttpRequest):
+    if not request.user.is_staff and request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # FIXME Following views should probably request being logged in
 
 @login_required(login_url="/")
 def fetch_songs(request: HttpRequest):
-    YoutubeAPI.extract_liked_musics(request)
-    YoutubeAPI.make_playlists_split(request)
+    jobs.enqueue(request.user, SyncJob.Kind.FETCH_SONGS)
     return redirect("index", permanent=True)
 
 
 @login_required(login_url="/")
 def publish_songs(request: HttpRequest):
-    YoutubeAPI.sync_remote_playlists(request)
-    YoutubeAPI.sync_remote_playlists_content(request)
+    if LocalPlaylist.objects.filter(user=request.user, has_pending_work=True).exists():
+        jobs.enqueue(request.user, SyncJob.Kind.PUBLISH_SONGS)
     return redirect("index", permanent=True)
 
 
+@login_required(login_url="/")
+def liked_songs(request: HttpRequest):
+    try:
+        page, next_cursor = _liked_songs_page(request.user, request.GET.get("cursor"))
+    except InvalidCursor:
+        return HttpResponseBadRequest()
+
+    return JsonResponse(
+        {
+            "html": render_to_string("sync_youtube/liked-songs.html", {"liked_songs": page}, request=request),
+            "next_cursor": next_cursor,
+        }
+    )
+
+
+@login_required(login_url="/")
+def sync_job_status(request: HttpRequest, job_id: uuid.UUID):
+    job = SyncJob.objects.filter(user=request.user, id=job_id).first()
+    if job is None:
+        return HttpResponseNotFound()
+
+    return JsonResponse(
+        {
+            "id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "progress": job.progress,
+            "error": job.error,
+            "created": job.created,
+            "started": job.started,
+            "finished": job.finished,
+        }
+    )
+
+
+def _parse_song_id(song_id: Any) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(str(song_id))
+    except ValueError:
+        return None
+
+
 @login_required(login_url="/")
 def switch_song(request: HttpRequest):
     if request.method == "POST":
         body = json.loads(request.body)
-        song_id = body.get("id")
+        song_id = _parse_song_id(body.get("id"))
 
         if song_id is None:
             return HttpResponseNotFound()
 
-        song = YoutubeSong.objects.filter(
+        # Flipped by the database in a single statement, so that quick successive clicks cannot lose an update
+        updated = YoutubeSong.objects.filter(
             local_playlist__user=request.user,
             id=song_id,
-        ).first()
-        if song is None:
+        ).update(
+            should_not_be_published=Case(
+                When(should_not_be_published=True, then=Value(False)),
+                default=Value(True),
+            )
+        )
+        if not updated:
             logger.warning("Failed to fetch song with id %s in user %s", song_id, request.user)
             return HttpResponseNotFound()
 
-        song.should_not_be_published = not song.should_not_be_published
-        song.save()
+        should_not_be_published = YoutubeSong.objects.filter(
+            id=song_id,
+        ).values_list("should_not_be_published", flat=True).first()
+        journal.record(
+            request.user.id,
+            [song_id],
+            SongChange.Kind.UNPUBLISHED if should_not_be_published else SongChange.Kind.REPUBLISHED,
+        )
+        pending_work.mark(request.user.id)
+        index_cache.invalidate(request.user.id)
         return HttpResponse(status=200)
     else:
         return HttpResponseNotFound()
+
+
+@login_required(login_url="/")
+def switch_songs(request: HttpRequest):
+    """
+    Set `should_not_be_published` of every song in `ids` to the given state, with a single UPDATE.
+    """
+    if request.method != "POST":
+        return HttpResponseNotFound()
+
+    try:
+        body = json.loads(request.body)
+        song_ids = [uuid.UUID(str(song_id)) for song_id in body["ids"]]
+        should_not_be_published = body["should_not_be_published"]
+    except (ValueError, TypeError, KeyError):
+        return HttpResponseBadRequest()
+    if not isinstance(should_not_be_published, bool) or len(song_ids) > settings.SWITCH_SONGS_MAX_IDS:
+        return HttpResponseBadRequest()
+
+    songs = YoutubeSong.objects.filter(
+        local_playlist__user=request.user,
+        id__in=song_ids,
+    )
+    switched_song_ids = list(songs.values_list("id", flat=True))
+    updated = songs.update(
+        should_not_be_published=should_not_be_published,
+    )
+    if updated:
+        journal.record(
+            request.user.id,
+            switched_song_ids,
+            SongChange.Kind.UNPUBLISHED if should_not_be_published else SongChange.Kind.REPUBLISHED,
+        )
+        pending_work.mark(request.user.id)
+        index_cache.invalidate(request.user.id)
+    return JsonResponse({"updated": updated})